@@ -0,0 +1,6 @@
+import sys
+from src.cli import EntryPoint
+
+
+if __name__ == '__main__':
+    sys.exit(EntryPoint().main())
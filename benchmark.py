@@ -0,0 +1,260 @@
+import csv
+import json
+import time
+import shutil
+import platform
+import argparse
+import tempfile
+from datetime import datetime
+from os.path import dirname
+from contextlib import contextmanager
+from typing import List, Dict, Callable, Any
+from src import VERSION
+from src.io import IO
+from src.lazy import load
+from src.ledger import Ledger
+from src.timing import SubmissionTimer
+from src.submit import ConnectionPool, RunSubmission
+from src.model import BuildSubmissionCommands, iter_run_table, fill_default_parameters, pd
+
+
+PROG = 'python benchmark.py'
+DESCRIPTION = 'Benchmark command generation, parameter IO and submission throughput'
+REQUIRED = []
+OPTIONAL = [
+    {
+        'keys': ['-s', '--sizes'],
+        'properties': {
+            'type': str,
+            'required': False,
+            'default': '1000,10000,100000',
+            'help': 'comma-separated numbers of run-table rows (default: %(default)s)',
+        }
+    },
+    {
+        'keys': ['-r', '--repeats'],
+        'properties': {
+            'type': int,
+            'required': False,
+            'default': 3,
+            'help': 'repeats of each measurement, the fastest is reported (default: %(default)s)',
+        }
+    },
+    {
+        'keys': ['-o', '--output'],
+        'properties': {
+            'type': str,
+            'required': False,
+            'default': f'{tempfile.gettempdir()}/somatic_app_benchmark.json',  # not into the working tree
+            'help': 'output JSON file (default: %(default)s)',
+        }
+    },
+    {
+        'keys': ['-h', '--help'],
+        'properties': {
+            'action': 'help',
+            'help': 'show this help message',
+        }
+    },
+]
+
+
+class EntryPoint:
+
+    parser: argparse.ArgumentParser
+
+    def main(self):
+        self.set_parser()
+        self.add_required_arguments()
+        self.add_optional_arguments()
+        args = self.parser.parse_args()
+        Benchmark().main(
+            sizes=[int(s) for s in args.sizes.split(',')],
+            repeats=args.repeats,
+            output=args.output)
+
+    def set_parser(self):
+        self.parser = argparse.ArgumentParser(
+            prog=PROG,
+            description=DESCRIPTION,
+            add_help=False,
+            formatter_class=argparse.RawTextHelpFormatter)
+
+    def add_required_arguments(self):
+        group = self.parser.add_argument_group('required arguments')
+        for item in REQUIRED:
+            group.add_argument(*item['keys'], **item['properties'])
+
+    def add_optional_arguments(self):
+        group = self.parser.add_argument_group('optional arguments')
+        for item in OPTIONAL:
+            group.add_argument(*item['keys'], **item['properties'])
+
+
+class Benchmark:
+
+    IO_ROUND_TRIPS = 1000
+
+    sizes: List[int]
+    repeats: int
+    output: str
+
+    workdir: str
+    results: List[Dict[str, Any]]
+
+    def main(self, sizes: List[int], repeats: int, output: str):
+        self.sizes = sizes
+        self.repeats = repeats
+        self.output = output
+
+        load(pd)  # pandas is imported lazily, keep its import out of the first measurement
+        self.workdir = tempfile.mkdtemp(prefix='somatic_app_benchmark_')
+        self.results = []
+        try:
+            self.benchmark_parameter_io()
+            for size in self.sizes:
+                run_table = f'{self.workdir}/run_table_{size}.csv'
+                write_run_table(file=run_table, n_rows=size)
+                self.benchmark_run_table(run_table=run_table, size=size)
+        finally:
+            shutil.rmtree(self.workdir)
+
+        self.write_output()
+
+    def benchmark_parameter_io(self):
+        parameters = {}
+        fill_default_parameters(parameters)
+        parameters = {k: v if type(v) is bool else str(v) for k, v in parameters.items()}
+
+        for ext in ['txt', 'tsv', 'csv']:
+            file = f'{self.workdir}/parameters.{ext}'
+
+            def round_trips():
+                for _ in range(self.IO_ROUND_TRIPS):
+                    IO().write(parameters=parameters, file=file)
+                    IO().read(file=file)
+
+            self.measure(name=f'parameter_io_{ext}', n=self.IO_ROUND_TRIPS, func=round_trips)
+
+    def benchmark_run_table(self, run_table: str, size: int):
+        self.measure(
+            name='read_run_table', n=size,
+            func=lambda: sum(1 for _ in iter_run_table(run_table)))
+
+        for launch_mode in ['immediate', 'queue', 'pipelined']:
+            self.measure(
+                name=f'build_commands_{launch_mode}', n=size,
+                func=lambda: BuildSubmissionCommands().main(
+                    run_table=run_table, parameters={'Launch Mode': launch_mode}))
+
+        for submission_mode in ['per-job', 'batch']:
+            self.measure(
+                name=f'submit_{submission_mode}', n=size,
+                func=lambda: BenchmarkSubmission(
+                    run_table=run_table,
+                    parameters={'Submission Mode': submission_mode, 'Pre-flight Check': False},
+                    ssh_password='',
+                    ledger_file=f'{self.workdir}/ledger.sqlite').main())
+
+    def measure(self, name: str, n: int, func: Callable[[], Any]):
+        seconds = []
+        for _ in range(self.repeats):
+            start = time.perf_counter()
+            func()
+            seconds.append(time.perf_counter() - start)
+        best = min(seconds)
+        self.results.append({
+            'name': name,
+            'n': n,
+            'seconds': best,
+            'per_second': n / best if best > 0 else None,
+        })
+        print(f'{name:<28}{n:>8} {best:10.3f} s', flush=True)
+
+    def write_output(self):
+        data = {
+            'version': VERSION,
+            'time': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'repeats': self.repeats,
+            'results': self.results,
+        }
+        with open(self.output, 'w') as fh:
+            json.dump(data, fh, indent=2)
+        print(f'Results written to {self.output}', flush=True)
+
+
+class NullConnection:
+    """
+    Stand-in for fabric.Connection that accepts every command without running it,
+    so that only the cost on the submitting side is measured
+    """
+
+    class Result:
+        stdout = ''
+        stderr = ''
+        return_code = 0
+
+    @contextmanager
+    def cd(self, path: str):
+        yield
+
+    @contextmanager
+    def prefix(self, command: str):
+        yield
+
+    def run(self, command: str, **kwargs) -> 'NullConnection.Result':
+        return self.Result()
+
+    def put(self, local: Any, remote: str, **kwargs):
+        if hasattr(local, 'read'):
+            local.read()
+
+    def close(self):
+        pass
+
+
+class BenchmarkSubmission(RunSubmission):
+
+    ledger_file: str
+
+    def __init__(self, ledger_file: str, **kwargs):
+        super().__init__(**kwargs)
+        self.ledger_file = ledger_file
+
+    def set_connection(self):
+        self.pool = ConnectionPool(
+            new_connection=NullConnection,
+            max_size=int(self.parameters['Submission Connections']))
+        self.host_to_pool = {host: self.pool for host in self.hosts}
+
+    def set_ledger(self):
+        self.ledger = Ledger(file=self.ledger_file)
+
+    def set_timer(self):
+        self.timer = SubmissionTimer(file=f'{dirname(self.ledger_file)}/submission_timing.jsonl')
+
+
+def write_run_table(file: str, n_rows: int):
+    # mixed tumor-only and paired samples, with and without BED
+    with open(file, 'w', newline='') as fh:
+        writer = csv.writer(fh)
+        writer.writerow([
+            'Sequencing Batch ID', 'Tumor Fastq R1', 'Tumor Fastq R2',
+            'Normal Fastq R1', 'Normal Fastq R2', 'BED File', 'Output Name'])
+        for i in range(n_rows):
+            paired = i % 2 == 0
+            writer.writerow([
+                f'NGS{i // 96:06d}',
+                f'S{i}_T_R1.fastq.gz',
+                f'S{i}_T_R2.fastq.gz',
+                f'S{i}_N_R1.fastq.gz' if paired else '',
+                f'S{i}_N_R2.fastq.gz' if paired else '',
+                'exome_v8.bed' if i % 3 != 0 else '',
+                f'S{i}',
+            ])
+
+
+if __name__ == '__main__':
+    EntryPoint().main()
@@ -10,6 +10,7 @@ from os.path import dirname, basename
 PROG = 'python build_app.py'
 APP_NAME = basename(dirname(__file__))
 DESCRIPTION = f'Build MacOS app or Windows exe for {APP_NAME}-{VERSION}'
+LAZY_IMPORTS = ['pandas', 'fabric', 'paramiko', 'invoke']  # imported on first use, unseen by the import scan of bundlers
 REQUIRED = []
 OPTIONAL = [
     {
@@ -93,7 +94,7 @@ setup(
     options={{
         'py2app': {{
             'iconfile': './icon/logo.ico',
-            'packages': ['cffi', 'pandas', 'PyQt5']
+            'packages': {['cffi', 'PyQt5'] + LAZY_IMPORTS}
         }}
     }},
     setup_requires=['py2app'],
@@ -116,7 +117,8 @@ setup(
             os.remove(file)
 
     def build_windows_exe(self):
-        cmd = f'pyinstaller --clean --onefile --icon="icon/logo.ico" --add-data="icon;icon" {self.entrypoint_py}'
+        hidden_imports = ' '.join(f'--hidden-import {m}' for m in LAZY_IMPORTS)
+        cmd = f'pyinstaller --clean --onefile --icon="icon/logo.ico" --add-data="icon;icon" {hidden_imports} {self.entrypoint_py}'
         subprocess.check_call(cmd, shell=True)
 
         f = self.entrypoint_py[:-3]
@@ -1,8 +1,9 @@
+import time
+_IMPORT_START = time.perf_counter()  # before anything else of the package is imported
+
 import sys
-from PyQt5.QtWidgets import QApplication
-from .view import View
 from .io import IO
-from .controller import Controller
+from .timing import StartupTimer, startup_timing_enabled
 
 
 VERSION = 'v1.2.1-beta'
@@ -18,20 +19,37 @@ class Main:
     APP_ID = f'NYCU.Dentistry.SomaticApp.{VERSION}'
 
     io: IO
-    view: View
-    controller: Controller
+    view: 'View'
+    controller: 'Controller'
 
     def main(self):
+        timer = StartupTimer(start=_IMPORT_START)
+        timer.mark('import src')
+
+        # Qt is imported here rather than at the top, so that the command line never loads it
+        from PyQt5.QtCore import QTimer
+        from PyQt5.QtWidgets import QApplication
+        timer.mark('import PyQt5')
+        from .view import View
+        from .controller import Controller
+        timer.mark('import view, controller')
+
         self.config_taskbar_icon()
 
         app = QApplication(sys.argv)
+        timer.mark('QApplication')
 
         self.io = IO()
         self.view = View()
+        timer.mark('View')
         self.controller = Controller(io=self.io, view=self.view)
+        timer.mark('Controller')
 
         print(STARTING_MESSAGE, flush=True)
 
+        if startup_timing_enabled():
+            QTimer.singleShot(0, lambda: (timer.mark('first event loop tick'), timer.print_report()))
+
         sys.exit(app.exec_())
 
     def config_taskbar_icon(self):
@@ -0,0 +1,162 @@
+import os
+import sys
+import getpass
+import argparse
+from typing import List, Dict, Union, Optional
+from .io import IO
+from .submit import RunSubmission, is_local_executor
+from .validate import validate_submission
+from .timing import SUBMISSION_PROFILE_FLAG, submission_profile_enabled
+from .model import BuildSubmissionCommands, PARAMETER_SCHEMA
+
+
+PROG = 'python SomaticAppCLI.py'
+DESCRIPTION = 'Submit somatic pipeline jobs without the GUI'
+PASSWORD_ENV = 'SOMATIC_APP_SSH_PASSWORD'
+REQUIRED = [
+    {
+        'keys': ['-p', '--parameters'],
+        'properties': {
+            'type': str,
+            'required': True,
+            'help': 'parameters file (.txt, .tsv or .csv) saved from the GUI',
+        }
+    },
+    {
+        'keys': ['-r', '--run-table'],
+        'properties': {
+            'type': str,
+            'required': True,
+            'help': 'run table (.csv)',
+        }
+    },
+]
+OPTIONAL = [
+    {
+        'keys': ['--dry-run'],
+        'properties': {
+            'action': 'store_true',
+            'help': 'print the submission commands without connecting',
+        }
+    },
+    {
+        'keys': [SUBMISSION_PROFILE_FLAG],
+        'properties': {
+            'action': 'store_true',
+            'help': 'save a cProfile capture of the submission next to the timing log',
+        }
+    },
+    {
+        'keys': ['-h', '--help'],
+        'properties': {
+            'action': 'help',
+            'help': 'show this help message',
+        }
+    },
+]
+EPILOG = f'''\
+The SSH password of the compute node is read from ${PASSWORD_ENV},
+or prompted for if the variable is not set (leave it empty for key-based login)
+'''
+
+
+class EntryPoint:
+
+    parser: argparse.ArgumentParser
+
+    def main(self, argv: Optional[List[str]] = None) -> int:
+        self.set_parser()
+        self.add_required_arguments()
+        self.add_optional_arguments()
+        args = self.parser.parse_args(argv)
+        return Cli().main(
+            parameters_file=args.parameters,
+            run_table=args.run_table,
+            dry_run=args.dry_run,
+            profile=args.submission_profile or submission_profile_enabled())
+
+    def set_parser(self):
+        self.parser = argparse.ArgumentParser(
+            prog=PROG,
+            description=DESCRIPTION,
+            epilog=EPILOG,
+            add_help=False,
+            formatter_class=argparse.RawTextHelpFormatter)
+
+    def add_required_arguments(self):
+        group = self.parser.add_argument_group('required arguments')
+        for item in REQUIRED:
+            group.add_argument(*item['keys'], **item['properties'])
+
+    def add_optional_arguments(self):
+        group = self.parser.add_argument_group('optional arguments')
+        for item in OPTIONAL:
+            group.add_argument(*item['keys'], **item['properties'])
+
+
+class Cli:
+
+    parameters_file: str
+    run_table: str
+    dry_run: bool
+    profile: bool
+
+    parameters: Dict[str, Union[str, bool]]
+
+    def main(self, parameters_file: str, run_table: str, dry_run: bool, profile: bool = False) -> int:
+        self.parameters_file = parameters_file
+        self.run_table = run_table
+        self.dry_run = dry_run
+        self.profile = profile
+
+        self.set_parameters()
+        if self.dry_run:
+            return self.print_commands()
+        return self.submit()
+
+    def set_parameters(self):
+        self.parameters = read_parameters(self.parameters_file)
+
+    def print_commands(self) -> int:
+        try:
+            validate_submission(parameters=self.parameters, run_table=self.run_table)
+        except ValueError as e:
+            print(e, file=sys.stderr, flush=True)
+            return 1
+        builder = BuildSubmissionCommands()
+        builder.prepare(run_table=self.run_table, parameters=self.parameters)
+        for job in builder.iter_jobs():  # each script is uploaded as a file, then launched by its command
+            print(f'# {job.script_file}', job.get_script_content(), sep='\n', flush=True)
+            print(job.command, end='\n\n', flush=True)
+        return 0
+
+    def submit(self) -> int:
+        submission = RunSubmission(
+            run_table=self.run_table,
+            parameters=self.parameters,
+            ssh_password='' if is_local_executor(self.parameters) else get_ssh_password(),
+            on_jobs_built=lambda job_names: print(f'Submitting {len(job_names)} job(s)', flush=True),
+            on_status=lambda job_name, status: print(f'{job_name}: {status}', flush=True),
+            profile=self.profile)
+        try:
+            report, success = submission.main()
+        except Exception as e:
+            print(e, file=sys.stderr, flush=True)
+            return 1
+        print(report, flush=True)
+        return 0 if success else 1
+
+
+def read_parameters(file: str) -> Dict[str, Union[str, bool]]:
+    # as in View.set_parameters(), a flag absent from the file is unchecked, whatever its default
+    parameters = IO().read(file=file)
+    for key, field in PARAMETER_SCHEMA.items():
+        if field.dtype is bool and key not in parameters:
+            parameters[key] = False
+    return parameters
+
+
+def get_ssh_password() -> str:
+    if PASSWORD_ENV in os.environ:
+        return os.environ[PASSWORD_ENV]
+    return getpass.getpass('SSH password: ')
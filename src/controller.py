@@ -1,19 +1,37 @@
-from typing import List
-from fabric import Connection
+from io import BytesIO
+from typing import List, Dict, Set, Tuple, Union, Callable, Optional, Any
+from datetime import datetime
+from PyQt5.QtCore import QObject, QThread, QTimer, pyqtSignal
 from .io import IO
 from .view import View
-from .model import BuildSubmissionCommands, COMPUTE_ROOT_DIR, COMPUTE_PROFILE
+from .model import build_queue_status_cmd, parse_queue_status, COMPUTE_ROOT_DIR
+from .ledger import Ledger
+from .hosts import HostCapacity, Sizing, SuggestSizing, get_compute_hosts, with_host, build_capacity_cmd, parse_capacity, \
+    get_sized_parameters
+from .submit import RunSubmission, new_connection, is_local_executor, sftp_path
+from .timing import submission_profile_enabled
+from .status import ParseStatus, JobStatus, read_output_names, build_status_cmd, build_outdirs_file_content, \
+    build_status_rows, summarize_status, STATUS_DIR
 
 
 class Controller:
 
     io: IO
     view: View
+    submission: Optional['ActionSubmitJobs']
+    job_status: Optional['ActionJobStatus']
+    queue_status: Optional['ActionQueueStatus']
+    probe_capacity: Optional['ActionProbeCapacity']
 
     def __init__(self, io: IO, view: View):
         self.io = io
         self.view = view
+        self.submission = None
+        self.job_status = None
+        self.queue_status = None
+        self.probe_capacity = None
         self.__connect_buttons_to_actions()
+        self.view.status_dialog.dialog.finished.connect(self.stop_job_status)
         self.view.show()
 
     def __connect_buttons_to_actions(self):
@@ -29,7 +47,38 @@ class Controller:
         ActionSaveParameters(self).exec()
 
     def action_submit_jobs(self):
-        ActionSubmitJobs(self).exec()
+        if self.submission is not None and self.submission.is_running():
+            self.view.message_box_error(msg='A submission is already in progress')
+            return
+        self.submission = ActionSubmitJobs(self)
+        self.submission.exec()
+
+    def action_cancel_submission(self):
+        if self.submission is not None:
+            self.submission.cancel()
+
+    def action_queue_status(self):
+        if self.queue_status is not None and self.queue_status.is_running():
+            self.view.message_box_error(msg='The queue status is already being fetched')
+            return
+        self.queue_status = ActionQueueStatus(self)
+        self.queue_status.exec()
+
+    def action_job_status(self):
+        self.stop_job_status()
+        self.job_status = ActionJobStatus(self)
+        self.job_status.exec()
+
+    def stop_job_status(self):
+        if self.job_status is not None:
+            self.job_status.stop()
+
+    def action_probe_capacity(self):
+        if self.probe_capacity is not None and self.probe_capacity.is_running():
+            self.view.message_box_error(msg='The compute hosts are already being probed')
+            return
+        self.probe_capacity = ActionProbeCapacity(self)
+        self.probe_capacity.exec()
 
 
 class Action:
@@ -41,6 +90,13 @@ class Action:
         self.io = controller.io
         self.view = controller.view
 
+    def ask_ssh_password(self) -> Optional[str]:
+        # None if cancelled, no password is needed to run on this machine
+        if is_local_executor(self.view.get_parameters()):
+            return ''
+        ssh_password = self.view.password_dialog()
+        return None if ssh_password == '' else ssh_password
+
 
 class ActionLoadParameters(Action):
 
@@ -70,14 +126,298 @@ class ActionSaveParameters(Action):
             self.view.message_box_error(msg=str(e))
 
 
+class ActionQueueStatus(Action):
+
+    worker: 'HostCommandWorker'
+
+    def exec(self):
+        ssh_password = self.ask_ssh_password()
+        if ssh_password is None:
+            return
+
+        self.worker = HostCommandWorker(
+            parameters=self.view.get_parameters(),
+            ssh_password=ssh_password,
+            cmd=build_queue_status_cmd(),
+            parse=summarize_queues)
+        self.worker.parsed.connect(self.view.message_box_info)
+        self.worker.failed.connect(self.view.message_box_error)
+        self.worker.start()
+
+    def is_running(self) -> bool:
+        return hasattr(self, 'worker') and self.worker.isRunning()
+
+
+class ActionProbeCapacity(Action):
+
+    parameters: Dict[str, Union[str, bool]]
+    worker: 'HostCommandWorker'
+
+    def exec(self):
+        ssh_password = self.ask_ssh_password()
+        if ssh_password is None:
+            return
+
+        self.parameters = self.view.get_parameters()
+        self.worker = HostCommandWorker(
+            parameters=self.parameters,
+            ssh_password=ssh_password,
+            cmd=build_capacity_cmd(),
+            parse=self.size)
+        self.worker.parsed.connect(self.suggest)
+        self.worker.failed.connect(self.view.message_box_error)
+        self.worker.start()
+
+    def is_running(self) -> bool:
+        return hasattr(self, 'worker') and self.worker.isRunning()
+
+    def size(self, host_to_stdout: Dict[str, str]) -> Tuple[List[HostCapacity], Sizing]:
+        capacities = [parse_capacity(host=host, stdout=stdout) for host, stdout in host_to_stdout.items()]
+        smallest = min(capacities, key=lambda c: (c.cores, c.memory_gb))
+        sizing = SuggestSizing().main(
+            capacity=smallest,
+            memory_per_thread_gb=int(self.parameters['Memory per Thread (GB)']))
+        return capacities, sizing
+
+    def suggest(self, result: Tuple[List[HostCapacity], Sizing]):
+        capacities, sizing = result
+        sized_parameters = get_sized_parameters(parameters=self.parameters, sizing=sizing)
+        lines = [c.summary() for c in capacities] + [
+            '',
+            f'Suggested: {sizing.threads} threads per job, {sizing.concurrent_jobs} concurrent job(s) per host',
+            '',
+            'Set ' + ', '.join(f"'{k}' to {v}" for k, v in sized_parameters.items()) + '?',
+        ]
+        if self.view.message_box_yes_no(msg='\n'.join(lines)):
+            for key, val in sized_parameters.items():
+                self.view.set_parameter(key=key, val=val)
+
+
+class HostCommandWorker(QThread):
+    """
+    Runs one command on every compute host off the GUI thread,
+    then emits what `parse` makes of their outputs, host -> stdout in the order of the hosts
+    """
+
+    parsed = pyqtSignal(object)
+    failed = pyqtSignal(str)
+
+    parameters: Dict[str, Union[str, bool]]
+    ssh_password: str
+    cmd: str
+    parse: Callable[[Dict[str, str]], Any]
+
+    def __init__(
+            self,
+            parameters: Dict[str, Union[str, bool]],
+            ssh_password: str,
+            cmd: str,
+            parse: Callable[[Dict[str, str]], Any]):
+        super().__init__()
+        self.parameters = parameters
+        self.ssh_password = ssh_password
+        self.cmd = cmd
+        self.parse = parse
+
+    def run(self):
+        try:
+            host_to_stdout = {}
+            for host in get_compute_hosts(self.parameters):
+                connection = new_connection(parameters=with_host(self.parameters, host), ssh_password=self.ssh_password)
+                with connection:
+                    with connection.cd(COMPUTE_ROOT_DIR):
+                        result = connection.run(self.cmd, hide=True)
+                host_to_stdout[host] = result.stdout
+            parsed = self.parse(host_to_stdout)
+        except Exception as e:
+            self.failed.emit(str(e))
+            return
+        self.parsed.emit(parsed)
+
+
+class ActionJobStatus(Action):
+
+    POLL_INTERVAL_MSEC = 30 * 1000
+
+    outdirs: List[str]
+    host_to_outdirs: Dict[str, List[str]]
+    host_to_submitted: Dict[str, Set[str]]  # output names recorded as submitted to each host
+    host_to_outdirs_file: Dict[str, str]
+    host_to_connection: Dict[str, 'fabric.Connection']
+    uploaded: Set[str]  # hosts which already have their outdirs_file
+    timer: QTimer
+    poller: Optional['StatusPoller']
+    polling: bool
+
+    def __init__(self, controller: Controller):
+        super().__init__(controller)
+        self.host_to_connection = {}
+        self.uploaded = set()
+        self.poller = None
+        self.polling = False
+
+    def exec(self):
+        run_table = self.view.file_dialog_open()
+        if run_table == '':
+            return
+
+        ssh_password = self.ask_ssh_password()
+        if ssh_password is None:
+            return
+
+        parameters = self.view.get_parameters()
+        try:
+            self.outdirs = read_output_names(run_table)
+            self.set_host_to_outdirs(parameters)
+        except Exception as e:
+            self.view.message_box_error(msg=str(e))
+            return
+
+        stamp = datetime.now().strftime('%Y%m%d_%H%M%S_%f')
+        for host in self.host_to_outdirs.keys():
+            self.host_to_connection[host] = new_connection(
+                parameters=with_host(parameters, host), ssh_password=ssh_password)
+            self.host_to_outdirs_file[host] = f'{STATUS_DIR}/{stamp}_{host}.txt'  # hosts may share a home directory
+        self.timer = QTimer()
+        self.timer.timeout.connect(self.poll)
+        self.view.status_dialog.open()
+
+        self.poll()
+        self.timer.start(self.POLL_INTERVAL_MSEC)
+
+    def set_host_to_outdirs(self, parameters: Dict[str, Union[str, bool]]):
+        # each sample is looked for on the host it was last submitted to, by default the first host
+        default_host = get_compute_hosts(parameters)[0]
+        sample_to_host = Ledger().get_hosts()
+        self.host_to_outdirs = {}
+        self.host_to_submitted = {}
+        self.host_to_outdirs_file = {}
+        for outdir in self.outdirs:
+            host = sample_to_host.get(outdir, default_host)
+            self.host_to_outdirs.setdefault(host, []).append(outdir)
+            if outdir in sample_to_host:
+                self.host_to_submitted.setdefault(host, set()).add(outdir)
+
+    def poll(self):
+        if self.polling:
+            return  # the previous poll is still on its way
+        self.polling = True
+        self.poller = StatusPoller(
+            host_to_connection=self.host_to_connection,
+            host_to_outdirs=self.host_to_outdirs,
+            host_to_submitted=self.host_to_submitted,
+            host_to_outdirs_file=self.host_to_outdirs_file,
+            uploaded=self.uploaded,
+            outdirs=self.outdirs,
+            parent=self.view.status_dialog.dialog)  # not owned by this action, which a new one may replace mid-poll
+        self.poller.polled.connect(self.show_status)
+        self.poller.failed.connect(self.view.status_dialog.set_error)
+        self.poller.finished.connect(self.poll_finished)
+        self.poller.finished.connect(self.poller.deleteLater)
+        self.poller.start()
+
+    def poll_finished(self):
+        self.polling = False
+
+    def show_status(self, statuses: List[JobStatus]):
+        summary = f"{datetime.now().strftime('%H:%M:%S')}   {summarize_status(statuses)}"
+        self.view.status_dialog.set_rows(rows=build_status_rows(statuses), summary=summary)
+
+    def stop(self):
+        if hasattr(self, 'timer'):
+            self.timer.stop()
+        connections = list(self.host_to_connection.values())
+        self.host_to_connection = {}
+        if not self.polling:
+            close_connections(connections)
+            return
+
+        # an SSH round trip is on its way, the poller is left to finish it instead of the GUI waiting for it
+        self.poller.polled.disconnect()
+        self.poller.failed.disconnect()
+        self.poller.cancel()
+        self.poller.finished.connect(lambda: close_connections(connections))
+        if self.poller.isFinished():  # before the connection above
+            close_connections(connections)
+
+
+class StatusPoller(QThread):
+
+    polled = pyqtSignal(list)
+    failed = pyqtSignal(str)
+
+    host_to_connection: Dict[str, 'fabric.Connection']
+    host_to_outdirs: Dict[str, List[str]]
+    host_to_submitted: Dict[str, Set[str]]
+    host_to_outdirs_file: Dict[str, str]
+    uploaded: Set[str]  # shared by the successive pollers, which never run at the same time
+    outdirs: List[str]
+    cancelled: bool
+
+    def __init__(
+            self,
+            host_to_connection: Dict[str, 'fabric.Connection'],
+            host_to_outdirs: Dict[str, List[str]],
+            host_to_submitted: Dict[str, Set[str]],
+            host_to_outdirs_file: Dict[str, str],
+            uploaded: Set[str],
+            outdirs: List[str],
+            parent: Optional[QObject] = None):
+        super().__init__(parent)
+        self.host_to_connection = host_to_connection
+        self.host_to_outdirs = host_to_outdirs
+        self.host_to_submitted = host_to_submitted
+        self.host_to_outdirs_file = host_to_outdirs_file
+        self.uploaded = uploaded
+        self.outdirs = outdirs
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+    def run(self):
+        name_to_status = {}
+        errors = []
+        for host, outdirs in self.host_to_outdirs.items():
+            if self.cancelled:
+                return
+            connection = self.host_to_connection[host]
+            outdirs_file = self.host_to_outdirs_file[host]
+            try:
+                if host not in self.uploaded:
+                    self.upload_outdirs_file(connection=connection, outdirs=outdirs, outdirs_file=outdirs_file)
+                    self.uploaded.add(host)
+                with connection.cd(COMPUTE_ROOT_DIR):
+                    result = connection.run(build_status_cmd(outdirs_file=outdirs_file), hide=True, warn=True)
+                statuses = ParseStatus().main(
+                    stdout=result.stdout, outdirs=outdirs, submitted=self.host_to_submitted.get(host, set()))
+                for status in statuses:
+                    name_to_status[status.name] = status
+            except Exception as e:
+                errors.append(f'{host}: {e}')
+
+        statuses = [name_to_status[o] for o in self.outdirs if o in name_to_status]  # in run table order
+        if len(statuses) > 0:
+            self.polled.emit(statuses)
+        if len(errors) > 0:
+            self.failed.emit('\n'.join(errors))
+
+    def upload_outdirs_file(self, connection: 'fabric.Connection', outdirs: List[str], outdirs_file: str):
+        # read by the status command instead of one block per sample in the command itself
+        with connection.cd(COMPUTE_ROOT_DIR):
+            connection.run(f'mkdir -p {STATUS_DIR}', hide=True)
+        connection.put(
+            BytesIO(build_outdirs_file_content(outdirs).encode('utf-8')),
+            remote=sftp_path(f'{COMPUTE_ROOT_DIR}/{outdirs_file}'),
+            preserve_mode=False)
+
+
 class ActionSubmitJobs(Action):
 
     run_table: str
     ssh_password: str
 
-    connection: Connection
-    env_cmd: str
-    submission_commands: List[str]
+    worker: 'SubmitWorker'
 
     def exec(self):
 
@@ -85,46 +425,89 @@ class ActionSubmitJobs(Action):
         if self.run_table == '':
             return
 
-        self.ssh_password = self.view.password_dialog()
-        if self.ssh_password == '':
+        self.ssh_password = self.ask_ssh_password()
+        if self.ssh_password is None:
             return
 
         if not self.view.message_box_yes_no(msg='Are you sure you want to submit?'):
             return
 
-        self.set_connection()
-        self.build_submission_commands()
+        self.worker = SubmitWorker(
+            run_table=self.run_table,
+            parameters=self.view.get_parameters(),
+            ssh_password=self.ssh_password)
+        self.worker.jobs_built.connect(self.view.start_progress)
+        self.worker.job_submitted.connect(self.view.update_progress)
+        self.worker.failed.connect(self.show_error)
+        self.worker.reported.connect(self.show_report)
 
-        success = True
-        for command in self.submission_commands:
-            try:
-                self.submit_one(command)
-            except Exception as e:
-                self.view.message_box_error(msg=str(e))
-                success = False
-                break
+        self.view.start_progress(job_names=[])  # busy indicator while connecting and building commands
+        self.worker.start()
 
+    def is_running(self) -> bool:
+        return hasattr(self, 'worker') and self.worker.isRunning()
+
+    def cancel(self):
+        if self.is_running():
+            self.worker.cancel()
+
+    def show_error(self, msg: str):
+        self.view.stop_progress()
+        self.view.message_box_error(msg=msg)
+
+    def show_report(self, report: str, success: bool):
+        self.view.stop_progress()  # all jobs may have been skipped
         if success:
-            self.view.message_box_info(msg=f'All {len(self.submission_commands)} job(s) submitted!')
+            self.view.message_box_info(msg=report)
+        else:
+            self.view.message_box_error(msg=report)
+
+
+class SubmitWorker(QThread):
+    """
+    Runs the whole submission off the GUI thread, talking to the View only through signals
+    """
+
+    jobs_built = pyqtSignal(list)
+    job_submitted = pyqtSignal(str, str)
+    failed = pyqtSignal(str)
+    reported = pyqtSignal(str, bool)
+
+    submission: RunSubmission
+
+    def __init__(
+            self,
+            run_table: str,
+            parameters: Dict[str, Union[str, bool]],
+            ssh_password: str):
+        super().__init__()
+        self.submission = RunSubmission(
+            run_table=run_table,
+            parameters=parameters,
+            ssh_password=ssh_password,
+            on_jobs_built=self.jobs_built.emit,
+            on_status=self.job_submitted.emit,
+            profile=submission_profile_enabled())
+
+    def cancel(self):
+        self.submission.cancel()
+
+    def run(self):
+        try:
+            report, success = self.submission.main()
+        except Exception as e:
+            self.failed.emit(str(e))
+            return
+        self.reported.emit(report, success)
 
-        self.connection.close()
 
-    def set_connection(self):
-        p = self.view.get_parameters()
-        self.connection = Connection(
-            host=p['Compute Public IP'],
-            user=p['Compute User'],
-            port=p['Compute Port'],
-            connect_kwargs={'password': self.ssh_password}
-        )
+def close_connections(connections: List['fabric.Connection']):
+    for connection in connections:
+        connection.close()
 
-    def build_submission_commands(self):
-        self.submission_commands = BuildSubmissionCommands().main(
-            run_table=self.run_table,
-            parameters=self.view.get_parameters()
-        )
 
-    def submit_one(self, command: str):
-        with self.connection.cd(COMPUTE_ROOT_DIR):
-            with self.connection.prefix(f'source {COMPUTE_PROFILE}'):
-                self.connection.run(command, echo=True)  # echo=True for printing out the command
+def summarize_queues(host_to_stdout: Dict[str, str]) -> str:
+    msgs = [parse_queue_status(stdout) for stdout in host_to_stdout.values()]
+    if len(msgs) == 1:
+        return msgs[0]
+    return '\n\n'.join(f'{host}\n{msg}' for host, msg in zip(host_to_stdout.keys(), msgs))
@@ -0,0 +1,44 @@
+import shutil
+import invoke
+from os.path import expanduser, isabs, join
+from typing import Union, IO
+
+
+class LocalConnection(invoke.Context):
+    """
+    Drop-in for fabric.Connection that runs everything on this machine, against the local ~/SomaticApp
+
+    The executor interface is the part of fabric.Connection used by the submission:
+        cd(path), prefix(command)  context managers chained into 'cd path && command && ...'
+        run(command, hide, warn, echo) -> result with stdout, stderr, return_code
+        put(local, remote, preserve_mode), remote paths relative to the home directory as in SFTP
+        close()
+    invoke.Context, which fabric.Connection itself is built on, already provides the first two locally
+    """
+
+    def run(self, command: str, **kwargs) -> invoke.Result:
+        kwargs.setdefault('in_stream', False)  # never forward stdin, which is not ours in the GUI
+        return super().run(command, **kwargs)
+
+    def put(self, local: Union[str, IO], remote: str, preserve_mode: bool = True):
+        remote = expanduser(remote)
+        if not isabs(remote):
+            remote = join(expanduser('~'), remote)
+
+        if hasattr(local, 'read'):
+            data = local.read()
+            with open(remote, 'wb' if type(data) is bytes else 'w') as fh:
+                fh.write(data)
+        elif preserve_mode:
+            shutil.copy(local, remote)
+        else:
+            shutil.copyfile(local, remote)
+
+    def close(self):
+        pass
+
+    def __enter__(self) -> 'LocalConnection':
+        return self
+
+    def __exit__(self, *args):
+        self.close()
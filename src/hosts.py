@@ -0,0 +1,186 @@
+from typing import List, Dict, Union, Optional
+
+
+def get_compute_hosts(parameters: Dict[str, Union[str, bool]]) -> List[str]:
+    """
+    Hosts of 'Compute Host Pool' as 'IP' or 'IP:PORT', or the single 'Compute Public IP' if the pool is empty
+    """
+    hosts = [h.strip() for h in str(parameters.get('Compute Host Pool', '')).split(',') if h.strip() != '']
+    if len(hosts) == 0:
+        hosts = [parameters['Compute Public IP']]
+    return list(dict.fromkeys(hosts))  # unique, in order
+
+
+def with_host(parameters: Dict[str, Union[str, bool]], host: str) -> Dict[str, Union[str, bool]]:
+    # parameters with 'Compute Public IP' and 'Compute Port' pointing to one host of the pool
+    ret = parameters.copy()
+    ip, _, port = host.partition(':')
+    ret['Compute Public IP'] = ip
+    if port != '':
+        ret['Compute Port'] = port
+    return ret
+
+
+def build_probe_cmd() -> str:
+    # 'cores load running_jobs', where queued jobs count as running; run in the compute root directory
+    return (
+        'echo "$(nproc) $(cut -d " " -f 1 /proc/loadavg) '
+        "$(($(screen -ls 2>/dev/null | grep -cE '^\\s+[0-9]+\\.') + $(ls queue/pending 2>/dev/null | wc -l)))\""
+    )
+
+
+class HostProbe:
+
+    host: str
+    cores: int
+    load: float
+    running_jobs: int
+
+    def __init__(self, host: str, cores: int, load: float, running_jobs: int):
+        self.host = host
+        self.cores = cores
+        self.load = load
+        self.running_jobs = running_jobs
+
+    def free_cores(self) -> int:
+        return max(self.cores - round(self.load), 0)
+
+
+def parse_probe(host: str, stdout: str) -> HostProbe:
+    cores, load, running_jobs = stdout.split()[-3:]
+    return HostProbe(host=host, cores=int(cores), load=float(load), running_jobs=int(running_jobs))
+
+
+class PlaceJobs:
+    """
+    Spread jobs across hosts in proportion to their free cores, counting the jobs already running there:
+    each job goes to the host with the fewest (running + placed) jobs per free core
+    """
+
+    job_names: List[str]
+    probes: List[HostProbe]
+
+    host_to_n_jobs: Dict[str, int]
+
+    def main(self, job_names: List[str], probes: List[HostProbe]) -> Dict[str, str]:
+        self.job_names = job_names
+        self.probes = probes
+
+        assert len(self.probes) > 0, 'No compute host to place jobs on'
+
+        self.host_to_n_jobs = {p.host: p.running_jobs for p in self.probes}
+        return {name: self.place() for name in self.job_names}
+
+    def place(self) -> str:
+        best = min(self.probes, key=lambda p: (self.host_to_n_jobs[p.host] + 1) / max(p.free_cores(), 1))
+        self.host_to_n_jobs[best.host] += 1
+        return best.host
+
+
+def build_capacity_cmd() -> str:
+    # 'cores memory_gb available_memory_gb disk_free_gb' of the node, disk of the compute root where it is run
+    return (
+        'echo "$(nproc) '
+        "$(awk '/MemTotal/ {print int($2 / 1048576)}' /proc/meminfo) "
+        "$(awk '/MemAvailable/ {print int($2 / 1048576)}' /proc/meminfo) "
+        "$(df -Pk . | awk 'NR == 2 {print int($4 / 1048576)}')\""
+    )
+
+
+class HostCapacity:
+
+    host: str
+    cores: int
+    memory_gb: int
+    available_memory_gb: int
+    disk_free_gb: int
+
+    def __init__(self, host: str, cores: int, memory_gb: int, available_memory_gb: int, disk_free_gb: int):
+        self.host = host
+        self.cores = cores
+        self.memory_gb = memory_gb
+        self.available_memory_gb = available_memory_gb
+        self.disk_free_gb = disk_free_gb
+
+    def summary(self) -> str:
+        return (
+            f'{self.host}: {self.cores} cores, {self.available_memory_gb} / {self.memory_gb} GB memory available, '
+            f'{self.disk_free_gb} GB free disk')
+
+
+def parse_capacity(host: str, stdout: str) -> HostCapacity:
+    cores, memory_gb, available_memory_gb, disk_free_gb = stdout.split()[-4:]
+    return HostCapacity(
+        host=host,
+        cores=int(cores),
+        memory_gb=int(memory_gb),
+        available_memory_gb=int(available_memory_gb),
+        disk_free_gb=int(disk_free_gb))
+
+
+class Sizing:
+
+    threads: int  # per job
+    concurrent_jobs: int
+    max_cores: int  # of the concurrent jobs, for 'Queue Max Cores'
+    max_disk_gb: int  # for 'Queue Max Disk (GB)', so that jobs wait for the disk they reserve
+
+    def __init__(self, threads: int, concurrent_jobs: int, max_cores: int, max_disk_gb: int):
+        self.threads = threads
+        self.concurrent_jobs = concurrent_jobs
+        self.max_cores = max_cores
+        self.max_disk_gb = max_disk_gb
+
+
+class SuggestSizing:
+    """
+    Threads per job and number of concurrent jobs that use all cores of the node without exceeding its memory,
+    with at least MIN_THREADS per job and no more than MAX_THREADS, beyond which the pipeline hardly speeds up.
+    The free disk is left to the queue, which holds back the jobs whose disk reservation would not fit
+    """
+
+    MIN_THREADS = 4
+    MAX_THREADS = 16
+    DISK_FRACTION = 0.9  # of the free disk, the rest for anything else written on the node
+
+    capacity: HostCapacity
+    n_jobs: Optional[int]
+    memory_per_thread_gb: int
+
+    def main(self, capacity: HostCapacity, memory_per_thread_gb: int, n_jobs: Optional[int] = None) -> Sizing:
+        """
+        n_jobs is the size of the batch, None to fill the whole node
+        """
+        self.capacity = capacity
+        self.memory_per_thread_gb = max(memory_per_thread_gb, 1)
+        self.n_jobs = n_jobs
+
+        cores = max(self.capacity.cores, 1)
+        max_threads = min(self.MAX_THREADS, cores, max(self.capacity.memory_gb // self.memory_per_thread_gb, 1))
+
+        concurrent_jobs = max(cores // self.MIN_THREADS, 1)
+        if self.n_jobs is not None:
+            concurrent_jobs = min(concurrent_jobs, max(self.n_jobs, 1))
+
+        threads = min(max(cores // concurrent_jobs, self.MIN_THREADS), max_threads)
+        by_memory = self.capacity.memory_gb // (threads * self.memory_per_thread_gb)
+        concurrent_jobs = max(min(concurrent_jobs, cores // threads, by_memory), 1)
+
+        return Sizing(
+            threads=threads,
+            concurrent_jobs=concurrent_jobs,
+            max_cores=threads * concurrent_jobs,
+            max_disk_gb=max(int(self.capacity.disk_free_gb * self.DISK_FRACTION), 1))
+
+
+def get_sized_parameters(parameters: Dict[str, Union[str, bool]], sizing: Sizing) -> Dict[str, str]:
+    """
+    Parameters to set from the sizing, the queue budgets only for the queue launch mode,
+    and the disk budget only with the pre-flight check, which finds the FASTQ sizes that jobs reserve
+    """
+    ret = {'threads': str(sizing.threads)}
+    if parameters.get('Launch Mode') == 'queue':
+        ret['Queue Max Cores'] = str(sizing.max_cores)
+        if parameters.get('Pre-flight Check', False):
+            ret['Queue Max Disk (GB)'] = str(sizing.max_disk_gb)
+    return ret
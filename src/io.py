@@ -1,5 +1,6 @@
 import csv
 from typing import Dict, Union
+from .model import PARAMETER_SCHEMA
 
 
 class IO:
@@ -25,7 +26,7 @@ class IO:
                 key, val = line.split(sep)[0:2]  # first two elements: key and value
                 val = val.strip()
                 if val == '':  # flag without value
-                    val = True
+                    val = self.__empty_value(key)
                 ret[key] = val
         return ret
 
@@ -38,14 +39,21 @@ class IO:
             reader = csv.reader(fh)
             for row in reader:
                 if len(row) == 1:
-                    key, val = row[0], True # flag without value
+                    key, val = row[0], self.__empty_value(row[0])  # flag without value
                 else:
                     key, val = row[0:2]
                     if val == '':  # flag without value
-                        val = True
+                        val = self.__empty_value(key)
                 ret[key] = val
         return ret
 
+    def __empty_value(self, key: str) -> Union[str, bool]:
+        # an optional field saved empty, e.g. 'Transfer Streams', is not a flag
+        field = PARAMETER_SCHEMA.get(key, None)
+        if field is None or field.dtype is bool:
+            return True
+        return ''
+
     def write(self,
               parameters: Dict[str, Union[str, bool]],
               file: str):
@@ -0,0 +1,46 @@
+import time
+import importlib
+from types import ModuleType
+from typing import Dict, Optional
+
+
+class LazyModule:
+    """
+    Stands in for a heavy module (pandas, fabric), which is imported on first attribute access
+    instead of at startup, e.g. `pd = lazy_import('pandas')` and then `pd.read_csv(...)` as usual
+    """
+
+    name: str
+    module: Optional[ModuleType]
+    seconds: Optional[float]  # time taken by the actual import, None until loaded
+
+    def __init__(self, name: str):
+        self.name = name
+        self.module = None
+        self.seconds = None
+
+    def __getattr__(self, attr: str):
+        # only called for attributes not found on the proxy itself
+        return getattr(load(self), attr)
+
+
+def load(module: LazyModule) -> ModuleType:
+    """
+    Imports the module now if not yet, e.g. to keep its import out of a measurement,
+    a function rather than a method so as not to hide an attribute of the module, such as json.load
+    """
+    if module.module is None:
+        start = time.perf_counter()
+        module.module = importlib.import_module(module.name)
+        module.seconds = time.perf_counter() - start
+    return module.module
+
+
+LAZY_MODULES: Dict[str, LazyModule] = {}
+
+
+def lazy_import(name: str) -> LazyModule:
+    # one proxy per module, so that the import time is measured where it actually happens
+    if name not in LAZY_MODULES:
+        LAZY_MODULES[name] = LazyModule(name)
+    return LAZY_MODULES[name]
@@ -0,0 +1,69 @@
+import os
+import sqlite3
+from datetime import datetime
+from contextlib import closing
+from os.path import expanduser, dirname
+from typing import Set, List, Dict, Tuple
+
+
+LEDGER_DB = '~/.somatic_app/ledger.sqlite'
+
+SUBMITTED = 'submitted'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+
+
+class Ledger:
+    """
+    Local record of every submission attempt, one row per sample per attempt
+    """
+
+    file: str
+
+    def __init__(self, file: str = LEDGER_DB):
+        self.file = expanduser(file)
+        os.makedirs(dirname(self.file) or '.', exist_ok=True)
+        with closing(self.connect()) as conn:
+            with conn:
+                conn.execute('''
+                    CREATE TABLE IF NOT EXISTS submissions (
+                        sample TEXT NOT NULL,
+                        parameter_hash TEXT NOT NULL,
+                        host TEXT NOT NULL,
+                        batch_id TEXT NOT NULL,
+                        time TEXT NOT NULL,
+                        state TEXT NOT NULL
+                    )''')
+                conn.execute('CREATE INDEX IF NOT EXISTS idx_sample ON submissions (sample, parameter_hash, host)')
+
+    def connect(self) -> sqlite3.Connection:
+        # one connection per call, so that the ledger can be written from the submission threads
+        return sqlite3.connect(self.file, timeout=30)
+
+    def record(self, sample: str, parameter_hash: str, host: str, batch_id: str, state: str):
+        with closing(self.connect()) as conn:
+            with conn:
+                conn.execute(
+                    'INSERT INTO submissions (sample, parameter_hash, host, batch_id, time, state) VALUES (?, ?, ?, ?, ?, ?)',
+                    (sample, parameter_hash, host, batch_id, datetime.now().isoformat(timespec='seconds'), state))
+
+    def get_submitted(self, host: str) -> Set[Tuple[str, str]]:
+        with closing(self.connect()) as conn:
+            rows = conn.execute(
+                'SELECT DISTINCT sample, parameter_hash FROM submissions WHERE host = ? AND state = ?',
+                (host, SUBMITTED)).fetchall()
+        return set(rows)
+
+    def get_hosts(self) -> Dict[str, str]:
+        # sample -> host of its latest submission, to know where to look for it
+        with closing(self.connect()) as conn:
+            rows = conn.execute(
+                'SELECT sample, host FROM submissions WHERE state = ? ORDER BY rowid',
+                (SUBMITTED, )).fetchall()
+        return dict(rows)
+
+    def get_history(self, sample: str) -> List[Tuple[str, str, str, str, str]]:
+        with closing(self.connect()) as conn:
+            return conn.execute(
+                'SELECT parameter_hash, host, batch_id, time, state FROM submissions WHERE sample = ? ORDER BY rowid',
+                (sample, )).fetchall()
@@ -1,17 +1,44 @@
-import pandas as pd
+import io
+import math
+import tarfile
+import hashlib
 from os.path import abspath, expanduser
-from typing import Dict, Union, List
+from datetime import datetime
+from typing import Dict, Set, Union, List, Optional, Callable, Iterable, Iterator
+from .lazy import lazy_import
+from .scripts import QUEUE_DIR, QUEUE_SESSION, QUEUE_SCHEDULER_SH, QUEUE_SCHEDULER, \
+    FASTQ_CACHE_DIR, FASTQ_CACHE_SH, FASTQ_CACHE, PIPELINED_SH, PIPELINED, CHECKPOINT_DIR
+
+
+pd = lazy_import('pandas')  # only needed when the run table is read
 
 
 COMPUTE_ROOT_DIR = '~/SomaticApp'
 COMPUTE_PROFILE = '~/SomaticApp/.profile'
 NAS_OUTPUT_ROOT_DIR = '~/SomaticApp'
+LOCAL_EXECUTOR = 'local'  # run on this machine instead of the compute node over ssh
 DEFAULT_COMPUTE_PARAMETERS = {
     'Compute User': [''],
     'Compute Public IP': ['255.255.255.255'],
     'Compute Port': ['22'],
+    'Executor': ['ssh', LOCAL_EXECUTOR],
+    'Compute Host Pool': [''],  # comma-separated 'IP' or 'IP:PORT', jobs are spread across them
     'Somatic Pipeline': ['somatic_pipeline-1.0.0'],
     'BED Directory': ['resource/bed'],
+    'Submission Connections': ['4'],
+    'Submission Mode': ['per-job', 'batch'],
+    'Launch Mode': ['immediate', 'queue', 'pipelined'],
+    'Queue Max Cores': ['0'],
+    'Queue Max Memory (GB)': ['0'],
+    'Queue Max Disk (GB)': ['0'],  # 0 for no disk limit, reservations need the pre-flight check for FASTQ sizes
+    'Output Size Multiplier': ['3'],  # peak output size per FASTQ size, for the disk reservation
+    'Memory per Thread (GB)': ['8'],
+    'Auto-size Threads': False,  # set threads from the cores and memory of the compute host
+    'FASTQ Cache Size (GB)': ['0'],
+    'Pipelined Look-ahead': ['1'],
+    'Resume Submission': False,
+    'Pre-flight Check': True,
+    'Stage Checkpoints': False,  # a resubmitted job skips the stages it already completed
 }
 DEFAULT_NAS_PARAMETERS = {
     'NAS User': [''],
@@ -19,6 +46,13 @@ DEFAULT_NAS_PARAMETERS = {
     'NAS Port': ['22'],
     'NAS Sequencing Directory': [''],
     'NAS Destination Directory': [''],
+    'Transfer Profile': ['default', 'lan', 'wan', 'throttled'],
+    'Transfer Streams': [''],
+    'Transfer Bandwidth Limit (KB/s)': [''],
+    'Transfer Estimate Bandwidth (MB/s)': ['100'],
+    'FASTQ Input': ['staged', 'streamed'],  # streamed feeds the pipeline from the NAS through named pipes
+    'Output Transfer': ['rsync', 'tar-zstd'],  # tar-zstd streams the output as one compressed tar over ssh
+    'Output Manifest': [''],  # comma-separated paths in the output directory to upload, e.g. '*.vcf.gz,*.html'
 }
 DEFAULT_PIPELINE_PARAMETERS = {
     'ref-fa': ['resource/GRCh38.primary_assembly.genome.fa'],
@@ -60,6 +94,229 @@ DEFAULT_PIPELINE_PARAMETERS = {
 }
 
 
+class Field:
+    """
+    Type and constraints of one parameter, resolved once from its default and the overrides below
+    """
+
+    __slots__ = ('key', 'dtype', 'choices', 'minimum', 'maximum', 'min_exclusive', 'optional')
+
+    key: str
+    dtype: type
+    choices: Optional[List[str]]  # None for free text
+    minimum: Optional[float]
+    maximum: Optional[float]
+    min_exclusive: bool
+    optional: bool  # an empty value is allowed
+
+    def __init__(
+            self,
+            dtype: type,
+            choices: Optional[List[str]] = None,
+            minimum: Optional[float] = None,
+            maximum: Optional[float] = None,
+            min_exclusive: bool = False,
+            optional: bool = False):
+        self.key = ''  # set when the schema is built
+        self.dtype = dtype
+        self.choices = choices
+        self.minimum = minimum
+        self.maximum = maximum
+        self.min_exclusive = min_exclusive
+        self.optional = optional
+
+    def parse(self, value: Union[str, int, float, bool]) -> Union[str, int, float, bool, None]:
+        """
+        Returns the typed value, raises ValueError with a message naming the parameter
+        """
+        if self.dtype is bool:
+            if type(value) is not bool:
+                raise ValueError(f"'{self.key}' is a flag, got '{value}'")
+            return value
+
+        text = str(value).strip()
+        if text == '':
+            if self.optional or self.dtype is str:
+                return None if self.optional else ''
+            raise ValueError(f"'{self.key}' is empty")
+
+        if self.choices is not None and text not in self.choices:
+            raise ValueError(f"'{self.key}' should be one of {self.choices}, got '{text}'")
+
+        if self.dtype is str:
+            return text
+
+        try:
+            ret = self.dtype(text)
+        except ValueError:
+            name = 'an integer' if self.dtype is int else 'a number'
+            raise ValueError(f"'{self.key}' should be {name}, got '{text}'")
+
+        if self.minimum is not None:
+            if ret < self.minimum or (self.min_exclusive and ret == self.minimum):
+                sign = '>' if self.min_exclusive else '>='
+                raise ValueError(f"'{self.key}' should be {sign} {self.minimum:g}, got '{text}'")
+        if self.maximum is not None and ret > self.maximum:
+            raise ValueError(f"'{self.key}' should be <= {self.maximum:g}, got '{text}'")
+
+        return ret
+
+
+FIELD_OVERRIDES = {  # where the default value alone does not tell the type or the valid range
+    'Compute Port': Field(int, minimum=1, maximum=65535),
+    'Executor': Field(str, choices=DEFAULT_COMPUTE_PARAMETERS['Executor']),
+    'Submission Connections': Field(int, minimum=1),
+    'Submission Mode': Field(str, choices=DEFAULT_COMPUTE_PARAMETERS['Submission Mode']),
+    'Launch Mode': Field(str, choices=DEFAULT_COMPUTE_PARAMETERS['Launch Mode']),
+    'Queue Max Cores': Field(int, minimum=0),
+    'Queue Max Memory (GB)': Field(int, minimum=0),
+    'Queue Max Disk (GB)': Field(int, minimum=0),
+    'Output Size Multiplier': Field(float, minimum=0),
+    'Memory per Thread (GB)': Field(int, minimum=1),
+    'FASTQ Cache Size (GB)': Field(int, minimum=0),
+    'Pipelined Look-ahead': Field(int, minimum=0),
+    'NAS Port': Field(int, minimum=1, maximum=65535),
+    'Transfer Profile': Field(str, choices=DEFAULT_NAS_PARAMETERS['Transfer Profile']),
+    'Transfer Streams': Field(int, minimum=1, optional=True),
+    'Transfer Bandwidth Limit (KB/s)': Field(int, minimum=0, optional=True),
+    'Transfer Estimate Bandwidth (MB/s)': Field(float, minimum=0, min_exclusive=True),
+    'FASTQ Input': Field(str, choices=DEFAULT_NAS_PARAMETERS['FASTQ Input']),
+    'Output Transfer': Field(str, choices=DEFAULT_NAS_PARAMETERS['Output Transfer']),
+    'threads': Field(int, minimum=1),
+    'umi-length': Field(int, minimum=0),
+    'clip-r1-5-prime': Field(int, minimum=0),
+    'clip-r2-5-prime': Field(int, minimum=0),
+    'min-snv-callers': Field(int, minimum=1),
+    'min-indel-callers': Field(int, minimum=1),
+    'vep-buffer-size': Field(int, minimum=1),
+    'pcgr-tumor-site': Field(int, minimum=0, maximum=30),
+    'pcgr-tmb-target-size-mb': Field(float, minimum=0, min_exclusive=True),
+    'pcgr-tmb-display': Field(str, choices=DEFAULT_PIPELINE_PARAMETERS['pcgr-tmb-display']),
+    'segmentation-threshold': Field(float, minimum=0, maximum=1, min_exclusive=True),
+}
+
+
+def build_parameter_schema() -> Dict[str, Field]:
+    ret = {}
+    for default in [DEFAULT_COMPUTE_PARAMETERS, DEFAULT_NAS_PARAMETERS, DEFAULT_PIPELINE_PARAMETERS]:
+        for key, values in default.items():
+            if key in FIELD_OVERRIDES:
+                field = FIELD_OVERRIDES[key]
+            elif type(values) is bool:
+                field = Field(bool)
+            else:  # type determined by default value, not by input value, which is always str
+                field = Field(type(values[0]))
+            field.key = key
+            ret[key] = field
+    return ret
+
+
+PARAMETER_SCHEMA = build_parameter_schema()
+
+
+class TransferProfile:
+
+    compress: bool
+    skip_compress: str  # suffixes not worth compressing again, e.g. 'gz/bam'
+    streams: int  # parallel rsync processes per sample
+    bwlimit: int  # KB/s in total, shared by the parallel streams, 0 for unlimited
+
+    def __init__(self, compress: bool, skip_compress: str, streams: int, bwlimit: int):
+        self.compress = compress
+        self.skip_compress = skip_compress
+        self.streams = streams
+        self.bwlimit = bwlimit
+
+    def rsync(self, parallel: int = 1) -> str:
+        """
+        One of `parallel` rsync processes running at the same time, which split the bandwidth limit
+        """
+        ret = 'rsync -avz' if self.compress else 'rsync -av'
+        if self.compress and self.skip_compress != '':
+            ret += f' --skip-compress={self.skip_compress}'
+        if self.bwlimit > 0:
+            ret += f' --bwlimit={max(self.bwlimit // parallel, 1)}'
+        return ret
+
+
+RUN_TABLE_REQUIRED_COLUMNS = ['Sequencing Batch ID', 'Tumor Fastq R1', 'Tumor Fastq R2', 'Output Name']
+RUN_TABLE_OPTIONAL_COLUMNS = ['Normal Fastq R1', 'Normal Fastq R2', 'BED File']
+RUN_TABLE_CHUNK_SIZE = 1000
+DISCARD_BAM_OUTPUT_FACTOR = 0.5  # of the output size multiplier, when BAMs are not kept
+LAUNCHED = '@@launched'  # printed by the batch launcher after each launch, with the job index and exit status
+
+
+ALREADY_COMPRESSED_SUFFIXES = 'gz/bgz/bz2/zst/zip/bam/cram/bai/crai/csi/tbi'
+TRANSFER_PROFILES = {
+    'default': TransferProfile(compress=True, skip_compress='', streams=1, bwlimit=0),
+    'lan': TransferProfile(compress=False, skip_compress='', streams=4, bwlimit=0),
+    'wan': TransferProfile(compress=True, skip_compress=ALREADY_COMPRESSED_SUFFIXES, streams=2, bwlimit=0),
+    'throttled': TransferProfile(compress=True, skip_compress=ALREADY_COMPRESSED_SUFFIXES, streams=1, bwlimit=50000),
+}
+
+
+class Job:
+
+    name: str
+    outdir: str
+    script: str
+    launch_cmd: str  # starts (or enqueues) the job once its commands.txt is in place
+    script_file: str  # commands.txt relative to the compute root, uploaded over SFTP
+    checksum: str  # sha256 of the uploaded script_file
+    command: str
+    parameter_hash: str  # the script covers both the parameters and the sample row
+    files: Dict[str, str]  # installed with the script, path relative to the compute root -> content
+
+    def __init__(
+            self,
+            name: str,
+            outdir: str,
+            script: str,
+            launch_cmd: Optional[str] = None,
+            files: Optional[Dict[str, str]] = None):
+        self.name = name
+        self.outdir = outdir
+        self.script = script
+        self.files = {} if files is None else files
+        self.parameter_hash = hashlib.sha256(script.encode('utf-8')).hexdigest()[:16]
+        self.launch_cmd = build_launch_cmd(job_name=name, outdir=outdir) if launch_cmd is None else launch_cmd
+        self.script_file = f"{outdir.rstrip('/')}/commands.txt"
+        self.checksum = hashlib.sha256(self.get_script_content().encode('utf-8')).hexdigest()
+        self.command = build_submit_cmd(
+            job_name=name, outdir=outdir, checksum=self.checksum, launch_cmd=self.launch_cmd)
+
+    def get_script_content(self) -> str:
+        return self.script + '\n'
+
+
+class Batch:
+
+    batch_id: str
+    jobs: Iterable[Job]  # iterated once, so that it may build each job as it is sent
+    job_names: List[str]  # of the jobs in order, to be given if jobs is not a list
+    files: Dict[str, str]  # helper files to be installed, path relative to the compute root -> content
+    setup_cmds: List[str]  # run once before any job is submitted
+    launched_by_setup: bool  # the setup commands already start every job, e.g. the pipelined batch runner
+    cancel_cmds: List[str]  # stop what the setup commands started, if cancelled right after them
+
+    def __init__(
+            self,
+            batch_id: str,
+            jobs: Iterable[Job],
+            files: Optional[Dict[str, str]] = None,
+            setup_cmds: Optional[List[str]] = None,
+            launched_by_setup: bool = False,
+            cancel_cmds: Optional[List[str]] = None,
+            job_names: Optional[List[str]] = None):
+        self.batch_id = batch_id
+        self.jobs = jobs
+        self.job_names = [job.name for job in jobs] if job_names is None else job_names
+        self.files = {} if files is None else files
+        self.setup_cmds = [] if setup_cmds is None else setup_cmds
+        self.launched_by_setup = launched_by_setup
+        self.cancel_cmds = [] if cancel_cmds is None else cancel_cmds
+
+
 class BuildSubmissionCommands:
 
     LOCAL_FASTQ_DIR = './fastq'
@@ -67,32 +324,175 @@ class BuildSubmissionCommands:
     run_table: str
     parameters: Dict[str, Union[str, int, bool]]
 
+    skip: Optional[Callable[[Job], bool]]
+    sample_bytes: Dict[str, int]  # output name -> FASTQ bytes, for the disk reservation in the queue
+    rows: Optional[List[Dict[str, Optional[str]]]]  # the run table if already read, else read by each iter_jobs()
+
+    template: 'PipelineTemplate'
+    batch_id: str
+    jobs: List[Job]
+    skipped: List[str]  # output names
+    batch: Batch
     commands: List[str]
 
     def main(
             self,
             run_table: str,
-            parameters: Dict[str, Union[str, int]]) -> List[str]:
+            parameters: Dict[str, Union[str, int]],
+            skip: Optional[Callable[[Job], bool]] = None,
+            sample_bytes: Optional[Dict[str, int]] = None,
+            rows: Optional[List[Dict[str, Optional[str]]]] = None) -> List[str]:
 
+        self.prepare(run_table=run_table, parameters=parameters, skip=skip, sample_bytes=sample_bytes, rows=rows)
+        self.jobs = list(self.iter_jobs())
+
+        self.set_batch()
+        self.commands = [job.command for job in self.jobs]
+
+        return self.commands
+
+    def prepare(
+            self,
+            run_table: str,
+            parameters: Dict[str, Union[str, int]],
+            skip: Optional[Callable[[Job], bool]] = None,
+            sample_bytes: Optional[Dict[str, int]] = None,
+            rows: Optional[List[Dict[str, Optional[str]]]] = None):
+        """
+        Everything but the jobs, which iter_jobs() then builds one at a time,
+        so that they can be sent as they are built instead of being held all at once
+        """
         self.run_table = run_table
         self.parameters = parameters.copy()
+        self.skip = skip
+        self.sample_bytes = {} if sample_bytes is None else sample_bytes
+        self.rows = rows
+        fill_default_parameters(self.parameters)
+        self.template = PipelineTemplate(self.parameters)
+        self.batch_id = datetime.now().strftime('batch_%Y%m%d_%H%M%S_%f')
+        self.skipped = []
 
-        self.commands = []
-        for _, row in pd.read_csv(self.run_table).iterrows():
+    def iter_jobs(self, names: Optional[Set[str]] = None) -> Iterator[Job]:
+        # names, if given, are output names of jobs not skipped, e.g. the share of one host
+        rows = iter_run_table(self.run_table) if self.rows is None else self.rows
+        for i, row in enumerate(rows):
+            if names is not None and row['Output Name'] not in names:
+                continue
 
-            script = BuildExecutionScript().main(
+            builder = BuildExecutionScript()
+            script = builder.main(
                 parameters=self.parameters,
-                sample_row=row)
+                sample_row=row,
+                template=self.template)
 
-            cmd = build_submit_cmd(
-                job_name=row['Output Name'],
+            job = Job(
+                name=row['Output Name'],
                 outdir=row['Output Name'],
-                script=script
+                script=script,
+                launch_cmd=self.build_launch_cmd(row=row, position=i)
             )
 
-            self.commands.append(cmd)
+            if self.skip is not None and self.skip(job):
+                self.skipped.append(job.name)
+                continue
+
+            if self.parameters['Launch Mode'] == 'pipelined':
+                outdir = row['Output Name'].rstrip('/')
+                for name, stage_script in builder.get_stage_scripts().items():
+                    job.files[f'{outdir}/{name}'] = stage_script + '\n'
 
-        return self.commands
+            yield job
+
+    def build_launch_cmd(self, row: Dict[str, Optional[str]], position: int) -> str:
+        if self.parameters['Launch Mode'] == 'pipelined':
+            return ': started by the pipelined batch runner'
+
+        if self.parameters['Launch Mode'] != 'queue':
+            return build_launch_cmd(job_name=row['Output Name'], outdir=row['Output Name'])
+
+        threads = int(self.parameters['threads'])
+        return build_enqueue_cmd(
+            job_name=row['Output Name'],
+            outdir=row['Output Name'],
+            key=f'{self.batch_id}_{position:06d}',  # file name order is the queue order
+            threads=threads,
+            memory_gb=threads * int(self.parameters['Memory per Thread (GB)']),
+            disk_gb=estimate_disk_gb(
+                fastq_bytes=self.sample_bytes.get(row['Output Name'], 0),
+                parameters=self.parameters))
+
+    def set_batch(self):
+        self.batch = self.build_batch(jobs=self.jobs, job_names=[job.name for job in self.jobs])
+
+    def build_batch(self, jobs: Iterable[Job], job_names: List[str]) -> Batch:
+        # also used for the share of each host when the jobs are spread across a host pool
+        batch = Batch(batch_id=self.batch_id, jobs=jobs, job_names=job_names)
+        if use_fastq_cache(self.parameters):
+            batch.files[FASTQ_CACHE_SH] = FASTQ_CACHE
+            batch.setup_cmds.append(build_set_fastq_cache_size_cmd(
+                max_gb=int(self.parameters['FASTQ Cache Size (GB)'])))
+        if self.parameters['Launch Mode'] == 'queue':
+            batch.files[QUEUE_SCHEDULER_SH] = QUEUE_SCHEDULER
+            batch.setup_cmds.append(build_start_queue_cmd(
+                max_cores=int(self.parameters['Queue Max Cores']),
+                max_memory_gb=int(self.parameters['Queue Max Memory (GB)']),
+                max_disk_gb=int(self.parameters['Queue Max Disk (GB)'])))
+        if self.parameters['Launch Mode'] == 'pipelined':
+            samples_txt = f'batches/{self.batch_id}/samples.txt'
+            outdirs = [name.rstrip('/') for name in job_names]  # the output name is the output directory
+            batch.files[samples_txt] = ''.join(f'{outdir}\n' for outdir in outdirs)
+            batch.files[PIPELINED_SH] = PIPELINED
+            batch.setup_cmds.append(build_start_pipelined_cmd(
+                batch_id=self.batch_id,
+                samples_txt=samples_txt,
+                lookahead=int(self.parameters['Pipelined Look-ahead'])))
+            batch.launched_by_setup = True
+            batch.cancel_cmds.append(build_stop_pipelined_cmd(batch_id=self.batch_id))
+        return batch
+
+
+class PipelineTemplate:
+    """
+    The parts of the execution script that are the same for every sample,
+    compiled once per batch so that only the per-sample fields are rendered for each row
+    """
+
+    parameters: Dict[str, Union[str, int, bool]]
+    profile: TransferProfile
+    use_fastq_cache: bool
+    stream_fastqs: bool
+    nas_dstdir: str
+    output_manifest: List[str]  # find -path patterns relative to the output directory, empty for everything
+    pipeline_flags: List[str]  # '--key=value' of the pipeline parameters
+
+    def __init__(self, parameters: Dict[str, Union[str, int, bool]]):
+        self.parameters = parameters
+        fill_default_parameters(self.parameters)
+        self.profile = get_transfer_profile(self.parameters)
+        self.use_fastq_cache = use_fastq_cache(self.parameters)
+        self.stream_fastqs = self.parameters['FASTQ Input'] == 'streamed'
+        self.nas_dstdir = get_nas_dstdir(self.parameters)
+        self.output_manifest = get_output_manifest(self.parameters)
+        self.set_pipeline_flags()
+
+    def set_pipeline_flags(self):
+        p = self.parameters
+
+        self.pipeline_flags = []
+        for key in DEFAULT_PIPELINE_PARAMETERS.keys():
+
+            if key not in p:
+                continue
+
+            dtype = PARAMETER_SCHEMA[key].dtype
+
+            if dtype is bool:
+                if p[key]:
+                    self.pipeline_flags.append(f"--{key}")
+            elif dtype is int or dtype is float:
+                self.pipeline_flags.append(f"--{key}={p[key]}")
+            else:  # str
+                self.pipeline_flags.append(f"--{key}='{p[key]}'")
 
 
 class BuildExecutionScript:
@@ -100,45 +500,43 @@ class BuildExecutionScript:
     LOCAL_FASTQ_DIR = './fastq'
 
     parameters: Dict[str, Union[str, int, bool]]
-    sample_row: pd.Series
+    template: PipelineTemplate
+    sample_row: Union['pd.Series', Dict[str, Optional[str]]]  # a dict from iter_run_table()
 
     stdout: str
     rsync_fastq_cmds: List[str]
     somatic_pipeline_cmd: str
     rsync_output_cmd: str
     rm_cmds: List[str]
+    stage_cmds: Dict[str, str]  # stage -> its commands, checkpointed if enabled
 
     def main(
             self,
             parameters: Dict[str, Union[str, int, bool]],
-            sample_row: pd.Series) -> str:
+            sample_row: Union['pd.Series', Dict[str, Optional[str]]],
+            template: Optional[PipelineTemplate] = None) -> str:
 
-        self.parameters = parameters
+        self.template = PipelineTemplate(parameters) if template is None else template
+        self.parameters = self.template.parameters
         self.sample_row = sample_row
 
-        self.load_default_parameters()
         self.set_stdout()
         self.set_rsync_fastq_cmds()
         self.set_somatic_pipeline_cmd()
         self.set_rsync_output_cmd()
         self.set_rm_cmds()
+        self.set_stage_cmds()
 
-        cmds = self.rsync_fastq_cmds + [self.somatic_pipeline_cmd] + [self.rsync_output_cmd] + self.rm_cmds
-
-        return '   &&   \\\n'.join(cmds)
+        return '   &&   \\\n'.join(self.stage_cmds.values())
 
-    def load_default_parameters(self):
-        for default in [
-            DEFAULT_COMPUTE_PARAMETERS,
-            DEFAULT_NAS_PARAMETERS,
-            DEFAULT_PIPELINE_PARAMETERS
-        ]:
-            for key, values in default.items():
-                if key not in self.parameters:
-                    if type(values) is bool:
-                        self.parameters[key] = values
-                    else:  # list
-                        self.parameters[key] = values[0]
+    def get_stage_scripts(self) -> Dict[str, str]:
+        # for the pipelined launch mode, in which transfer and compute of different samples overlap
+        s = self.stage_cmds
+        return {
+            'stage_in.sh': '   &&   \\\n'.join(v for k, v in s.items() if k in ['checkpoint_dir', 'staging']),
+            'compute.sh': s['pipeline'],
+            'stage_out.sh': '   &&   \\\n'.join([s['upload'], s['cleanup']]),
+        }
 
     def set_stdout(self):
         outdir = self.sample_row['Output Name']
@@ -152,20 +550,30 @@ class BuildExecutionScript:
         ip = p['NAS Local IP']
         port = p['NAS Port']
         srcdir = f"{p['NAS Sequencing Directory'].rstrip('/')}/{row['Sequencing Batch ID']}"
-        tumor_fq1 = row['Tumor Fastq R1']
-        tumor_fq2 = row['Tumor Fastq R2']
-        normal_fq1 = row.get('Normal Fastq R1', pd.NA)
-        normal_fq2 = row.get('Normal Fastq R2', pd.NA)
+        fqs = self.get_fastqs()
 
-        fqs = [tumor_fq1, tumor_fq2]
-        if pd.notna(normal_fq1):
-            fqs += [normal_fq1, normal_fq2]
+        if self.template.stream_fastqs:  # only the named pipes, fed by set_somatic_pipeline_cmd()
+            fifos = ' '.join(f"'{self.get_local_fastq(fq)}'" for fq in fqs)
+            self.rsync_fastq_cmds = [f"mkdir -p '{self.get_fifo_dir()}'   &&   rm -f {fifos}   &&   mkfifo {fifos}"]
+            return
 
-        self.rsync_fastq_cmds = []
-        for fq in fqs:
-            self.rsync_fastq_cmds.append(
-                f"rsync -avz -e 'ssh -p {port}' {user}@{ip}:'{srcdir}/{fq}' '{self.LOCAL_FASTQ_DIR}/' {self.stdout}"
-            )
+        profile = self.template.profile
+        rsync = profile.rsync(parallel=min(profile.streams, len(fqs)))
+
+        def download(fq: str) -> str:
+            if not self.template.use_fastq_cache:
+                return f"{rsync} -e 'ssh -p {port}' {user}@{ip}:'{srcdir}/{fq}' '{self.LOCAL_FASTQ_DIR}/'"
+            # to the exact keyed path, whose directory is made by the cache script
+            cmd = f"{rsync} -e 'ssh -p {port}' {user}@{ip}:'{srcdir}/{fq}' '{self.get_local_fastq(fq)}'"
+            return f"bash {FASTQ_CACHE_SH} acquire '{row['Output Name']}' '{self.get_cache_key(fq)}' {cmd}"
+
+        if profile.streams > 1:  # xargs exits non-zero if any of the downloads fails
+            names = ' '.join(f"'{fq}'" for fq in fqs)
+            self.rsync_fastq_cmds = [
+                f"printf '%s\\n' {names} | xargs -P {profile.streams} -I {{}} {download('{}')} {self.stdout}"
+            ]
+        else:
+            self.rsync_fastq_cmds = [f'{download(fq)} {self.stdout}' for fq in fqs]
 
     def set_somatic_pipeline_cmd(self):
         p = self.parameters
@@ -173,8 +581,8 @@ class BuildExecutionScript:
 
         lines = [
             f"python {p['Somatic Pipeline']} main",
-            f"--tumor-fq1='{self.LOCAL_FASTQ_DIR}/{row['Tumor Fastq R1']}'",
-            f"--tumor-fq2='{self.LOCAL_FASTQ_DIR}/{row['Tumor Fastq R2']}'",
+            f"--tumor-fq1='{self.get_local_fastq(row['Tumor Fastq R1'])}'",
+            f"--tumor-fq2='{self.get_local_fastq(row['Tumor Fastq R2'])}'",
             f"--outdir='{row['Output Name']}'",
         ]
 
@@ -184,37 +592,54 @@ class BuildExecutionScript:
 
         normal_fq1 = row.get('Normal Fastq R1', pd.NA)
         if pd.notna(normal_fq1):
-            lines.append(f"--normal-fq1='{self.LOCAL_FASTQ_DIR}/{normal_fq1}'")
+            lines.append(f"--normal-fq1='{self.get_local_fastq(normal_fq1)}'")
 
         normal_fq2 = row.get('Normal Fastq R2', pd.NA)
         if pd.notna(normal_fq2):
-            lines.append(f"--normal-fq2='{self.LOCAL_FASTQ_DIR}/{normal_fq2}'")
+            lines.append(f"--normal-fq2='{self.get_local_fastq(normal_fq2)}'")
 
-        for key in DEFAULT_PIPELINE_PARAMETERS.keys():
+        lines += self.template.pipeline_flags
+        lines.append(self.stdout)
 
-            if key not in p:
-                continue
+        self.somatic_pipeline_cmd = ' \\\n'.join(lines)
+        if self.template.stream_fastqs:
+            self.somatic_pipeline_cmd = self.stream_into(self.somatic_pipeline_cmd)
 
-            dtype = self.__get_type(key)
+    def stream_into(self, cmd: str) -> str:
+        """
+        Run cmd while each FASTQ is fed into its named pipe by a background ssh,
+        so that the pipeline starts with the first bytes instead of after the whole transfer.
+        A feeder that fails fails the stage; feeders are killed if the pipeline exits without reading them
+        """
+        p = self.parameters
+        row = self.sample_row
+        srcdir = f"{p['NAS Sequencing Directory'].rstrip('/')}/{row['Sequencing Batch ID']}"
+        ssh = f"ssh -p {p['NAS Port']} -o BatchMode=yes {p['NAS User']}@{p['NAS Local IP']}"
 
-            if dtype is bool:
-                if p[key]:
-                    lines.append(f"--{key}")
-            elif dtype is int or dtype is float:
-                lines.append(f"--{key}={p[key]}")
-            else:  # str
-                lines.append(f"--{key}='{p[key]}'")
+        fqs = self.get_fastqs()
+        feeders = [
+            f"{ssh} {ssh_quote('cat ' + quote_path(f'{srcdir}/{fq}'))} > '{self.get_local_fastq(fq)}' "
+            f"2>> '{row['Output Name']}/progress.txt' &"
+            for fq in fqs
+        ]
+        jobs = [f'%{i + 1}' for i in range(len(fqs))]
+        waits = ' && '.join(f'wait {j}' for j in jobs)
+        return f"( {' '.join(feeders)} if {cmd}; then {waits}; else kill {' '.join(jobs)} 2>/dev/null; false; fi )"
 
-        lines.append(self.stdout)
+    def get_fifo_dir(self) -> str:
+        # per sample, as samples may share a FASTQ
+        return f"{self.LOCAL_FASTQ_DIR}/{self.sample_row['Output Name'].rstrip('/')}"
 
-        self.somatic_pipeline_cmd = ' \\\n'.join(lines)
+    def get_local_fastq(self, fq: str) -> str:
+        if self.template.stream_fastqs:
+            return f'{self.get_fifo_dir()}/{fq}'
+        if self.template.use_fastq_cache:
+            return f'{self.LOCAL_FASTQ_DIR}/{self.get_cache_key(fq)}'
+        return f'{self.LOCAL_FASTQ_DIR}/{fq}'
 
-    def __get_type(self, key: str) -> type:
-        # type determined by default value, not by input value, which is always str
-        values = DEFAULT_PIPELINE_PARAMETERS.get(key)
-        if type(values) is bool:
-            return bool
-        return type(values[0])
+    def get_cache_key(self, fq: str) -> str:
+        # the same file name may come back in a later sequencing batch, with different reads
+        return f"{self.sample_row['Sequencing Batch ID']}/{fq}"
 
     def set_rsync_output_cmd(self):
         p = self.parameters
@@ -224,32 +649,315 @@ class BuildExecutionScript:
         user = p['NAS User']
         ip = p['NAS Local IP']
         port = p['NAS Port']
-        dstdir = p['NAS Destination Directory'].lstrip('.').lstrip('/').rstrip('/')  # remove leading './' and trailing '/'
+        dstdir = self.template.nas_dstdir
+        manifest = self.template.output_manifest
 
-        if dstdir != '':
-            dstdir += '/'
+        if p['Output Transfer'] == 'tar-zstd':
+            # one compressed stream instead of one file at a time, unpacked on the NAS
+            outdir = outdir.rstrip('/')
+            files = '.' if len(manifest) == 0 else f"--null -T - < '{get_manifest_file(outdir)}'"
+            tar = f"tar -C '{outdir}' -cf - {files} | zstd -q -T0"
+            nas_outdir = quote_path(f'{NAS_OUTPUT_ROOT_DIR}/{dstdir}{outdir}')
+            untar = ssh_quote(f'mkdir -p {nas_outdir} && zstd -dcq | tar -xf - -C {nas_outdir}')
+            cmd = f"set -o pipefail   &&   {tar} | ssh -p {port} {user}@{ip} {untar}"
+            if len(manifest) > 0:
+                cmd = f'{build_find_manifest_cmd(outdir=outdir, manifest=manifest)}   &&   {cmd}'
+            self.rsync_output_cmd = cmd
+            return
 
-        if not is_subdir(parent=NAS_OUTPUT_ROOT_DIR, child=f'{NAS_OUTPUT_ROOT_DIR}/{dstdir}'):
-            raise ValueError(f"Destination directory '{NAS_OUTPUT_ROOT_DIR}/{dstdir}' is not a subdirectory of NAS root directory '{NAS_OUTPUT_ROOT_DIR}'")
+        rsync = self.template.profile.rsync()
+        if len(manifest) == 0:
+            self.rsync_output_cmd = f"{rsync} -e 'ssh -p {port}' '{outdir}' {user}@{ip}:'{NAS_OUTPUT_ROOT_DIR}/{dstdir}'"
+            return
 
-        self.rsync_output_cmd = f"rsync -avz -e 'ssh -p {port}' '{outdir}' {user}@{ip}:'{NAS_OUTPUT_ROOT_DIR}/{dstdir}'"
+        outdir = outdir.rstrip('/')
+        find = build_find_manifest_cmd(outdir=outdir, manifest=manifest)
+        rsync = f"{rsync} --from0 --files-from='{get_manifest_file(outdir)}' -e 'ssh -p {port}' '{outdir}' {user}@{ip}:'{NAS_OUTPUT_ROOT_DIR}/{dstdir}{outdir}/'"
+        self.rsync_output_cmd = f'{find}   &&   {rsync}'
 
     def set_rm_cmds(self):
         row = self.sample_row
 
         self.rm_cmds = [f"rm -r '{row['Output Name']}'"]
+        if len(self.template.output_manifest) > 0:
+            self.rm_cmds.append(f"rm -f '{get_manifest_file(row['Output Name'])}'")
 
-        tumor_fq1 = row['Tumor Fastq R1']
-        tumor_fq2 = row['Tumor Fastq R2']
-        normal_fq1 = row.get('Normal Fastq R1', pd.NA)
-        normal_fq2 = row.get('Normal Fastq R2', pd.NA)
+        if self.template.stream_fastqs:
+            self.rm_cmds.append(f"rm -r '{self.get_fifo_dir()}'")
+            return
+
+        for fq in self.get_fastqs():
+            if self.template.use_fastq_cache:  # the FASTQ stays cached until evicted
+                self.rm_cmds.append(f"bash {FASTQ_CACHE_SH} release '{row['Output Name']}' '{self.get_cache_key(fq)}'")
+            else:
+                self.rm_cmds.append(f"rm '{self.LOCAL_FASTQ_DIR}/{fq}'")
+
+    def set_stage_cmds(self):
+        stages = {
+            'staging': '   &&   \\\n'.join(self.rsync_fastq_cmds),
+            'pipeline': self.somatic_pipeline_cmd,
+            'upload': self.rsync_output_cmd,
+            'cleanup': '   &&   \\\n'.join(self.rm_cmds),
+        }
+        if not self.parameters['Stage Checkpoints']:
+            self.stage_cmds = stages
+            return
+
+        checkpoint_dir = f"{CHECKPOINT_DIR}/{self.sample_row['Output Name'].rstrip('/')}"
+        test = '-p' if self.template.stream_fastqs else '-f'  # named pipe or file
+        staged = [f"[ {test} '{self.get_local_fastq(fq)}' ]" for fq in self.get_fastqs()]
+        self.stage_cmds = {'checkpoint_dir': f"mkdir -p '{checkpoint_dir}'"}
+        self.stage_cmds.update(BuildCheckpoints().main(
+            stages=stages,
+            checkpoint_dir=checkpoint_dir,
+            preconditions={'staging': staged}))
 
-        fqs = [tumor_fq1, tumor_fq2]
+    def get_fastqs(self) -> List[str]:
+        row = self.sample_row
+        fqs = [row['Tumor Fastq R1'], row['Tumor Fastq R2']]
+        normal_fq1 = row.get('Normal Fastq R1', pd.NA)
         if pd.notna(normal_fq1):
-            fqs += [normal_fq1, normal_fq2]
+            fqs += [normal_fq1, row.get('Normal Fastq R2', pd.NA)]
+        return fqs
+
+
+class BuildCheckpoints:
+    """
+    Wrap each stage so that it writes a marker when it completes, and is skipped when run again
+    if its own marker, or that of any later stage, holds the expected hash.
+    Hashes are chained, so that a stage reruns, with all stages after it, when any earlier stage changes
+    """
+
+    stages: Dict[str, str]  # in order
+    checkpoint_dir: str
+    preconditions: Dict[str, List[str]]  # stage -> tests that must also pass to skip it, e.g. files still present
+
+    names: List[str]
+    name_to_hash: Dict[str, str]
+
+    def main(
+            self,
+            stages: Dict[str, str],
+            checkpoint_dir: str,
+            preconditions: Optional[Dict[str, List[str]]] = None) -> Dict[str, str]:
+
+        self.stages = stages
+        self.checkpoint_dir = checkpoint_dir
+        self.preconditions = {} if preconditions is None else preconditions
+
+        self.names = list(self.stages.keys())
+        self.set_name_to_hash()
+        return {name: self.wrap(name) for name in self.names}
+
+    def set_name_to_hash(self):
+        self.name_to_hash = {}
+        previous = ''
+        for name in self.names:
+            previous = hashlib.sha256(f'{previous}\n{self.stages[name]}'.encode('utf-8')).hexdigest()[:16]
+            self.name_to_hash[name] = previous
+
+    def wrap(self, name: str) -> str:
+        later = self.names[self.names.index(name):]
+        tests = [f"grep -qsxF {self.name_to_hash[n]} '{self.marker(n)}'" for n in later]
+        if name in self.preconditions:
+            tests[0] = f"( {' && '.join(self.preconditions[name] + [tests[0]])} )"
+        marker = f"echo {self.name_to_hash[name]} > '{self.marker(name)}'"
+        return f"( {' || '.join(tests)} || ( {self.stages[name]}   &&   {marker} ) )"
+
+    def marker(self, name: str) -> str:
+        return f'{self.checkpoint_dir}/{name}.done'
+
+
+class BuildBatchArchive:
+    """
+    Pack the commands.txt of all jobs, together with a launcher manifest,
+    into one tar.gz so that a whole batch is sent in a single transfer
+    """
+
+    batch: Batch
+
+    tar: tarfile.TarFile
+    launch_cmds: List[str]  # of the jobs in order, as each job is only built once
+
+    def main(self, batch: Batch) -> bytes:
+        self.batch = batch
+
+        buffer = io.BytesIO()
+        self.launch_cmds = []
+        with tarfile.open(fileobj=buffer, mode='w:gz') as self.tar:
+            for job in self.batch.jobs:
+                add_job_to_tar(tar=self.tar, job=job)
+                self.launch_cmds.append(job.launch_cmd)
+            for name, content in self.batch.files.items():
+                add_to_tar(tar=self.tar, name=name, content=content)
+            add_to_tar(tar=self.tar, name=batch_launcher_path(self.batch.batch_id), content=self.build_launcher())
+
+        return buffer.getvalue()
+
+    def build_launcher(self) -> str:
+        # a failed setup launches nothing, a failed launch does not stop the jobs after it
+        launches = [
+            f'{launch_cmd}; echo "{LAUNCHED} {i} $?"' for i, launch_cmd in enumerate(self.launch_cmds)
+        ]
+        lines = ['set -e'] + self.batch.setup_cmds + ['set +e'] + launches
+        return '\n'.join(lines) + '\n'
+
+
+def add_to_tar(tar: tarfile.TarFile, name: str, content: str):
+    data = content.encode('utf-8')
+    info = tarfile.TarInfo(name=name)
+    info.size = len(data)
+    info.mode = 0o644
+    tar.addfile(info, io.BytesIO(data))
+
+
+def add_job_to_tar(tar: tarfile.TarFile, job: Job):
+    add_to_tar(tar=tar, name=job.script_file, content=job.get_script_content())
+    for name, content in job.files.items():
+        add_to_tar(tar=tar, name=name, content=content)
+
+
+def iter_run_table(run_table: str, chunksize: int = RUN_TABLE_CHUNK_SIZE) -> Iterator[Dict[str, Optional[str]]]:
+    """
+    Yields one dict per row, reading only the used columns as str and chunk by chunk,
+    so that memory stays flat regardless of the size of the run table
+    """
+    columns = pd.read_csv(run_table, nrows=0).columns
+    missing = [c for c in RUN_TABLE_REQUIRED_COLUMNS if c not in columns]
+    if len(missing) > 0:
+        raise ValueError(f'Run table {run_table} is missing column(s): {missing}')
+
+    optional = [c for c in RUN_TABLE_OPTIONAL_COLUMNS if c in columns]
+    for chunk in pd.read_csv(
+            run_table,
+            usecols=RUN_TABLE_REQUIRED_COLUMNS + optional,
+            dtype=str,
+            chunksize=chunksize):
+        chunk = chunk.astype(object).where(chunk.notna(), None)  # empty cells -> None, column-wise
+        for column in RUN_TABLE_OPTIONAL_COLUMNS:
+            if column not in optional:
+                chunk[column] = None
+        yield from chunk.to_dict('records')
+
+
+def batch_launcher_path(batch_id: str) -> str:
+    return f'batches/{batch_id}/launch.sh'
+
+
+def build_batch_launch_cmd(batch_id: str, archive: str) -> str:
+    return f'{build_extract_cmd(archive)}   &&   bash "{batch_launcher_path(batch_id)}"'
+
+
+def build_extract_cmd(archive: str) -> str:
+    return f'tar -xzf "{archive}"   &&   rm "{archive}"'
+
+
+def parse_launch_statuses(stdout: str) -> Dict[int, int]:
+    """
+    Returns the index of each job reached by the batch launcher -> exit status of its launch command
+    """
+    ret = {}
+    for line in stdout.splitlines():
+        fields = line.split()
+        if len(fields) == 3 and fields[0] == LAUNCHED and fields[1].isdigit() and fields[2].isdigit():
+            ret[int(fields[1])] = int(fields[2])
+    return ret
+
+
+def fill_default_parameters(parameters: Dict[str, Union[str, int, bool]]):
+    for default in [
+        DEFAULT_COMPUTE_PARAMETERS,
+        DEFAULT_NAS_PARAMETERS,
+        DEFAULT_PIPELINE_PARAMETERS
+    ]:
+        for key, values in default.items():
+            if key not in parameters:
+                if type(values) is bool:
+                    parameters[key] = values
+                else:  # list
+                    parameters[key] = values[0]
+
+
+def get_transfer_profile(parameters: Dict[str, Union[str, int, bool]]) -> TransferProfile:
+    name = parameters['Transfer Profile']
+    if name not in TRANSFER_PROFILES:
+        raise ValueError(f"Unknown transfer profile '{name}', should be one of {list(TRANSFER_PROFILES.keys())}")
+    profile = TRANSFER_PROFILES[name]
+
+    streams = str(parameters['Transfer Streams']).strip()
+    bwlimit = str(parameters['Transfer Bandwidth Limit (KB/s)']).strip()
+    return TransferProfile(  # empty values follow the profile
+        compress=profile.compress,
+        skip_compress=profile.skip_compress,
+        streams=profile.streams if streams == '' else int(streams),
+        bwlimit=profile.bwlimit if bwlimit == '' else int(bwlimit))
 
-        for fq in fqs:
-            self.rm_cmds.append(f"rm '{self.LOCAL_FASTQ_DIR}/{fq}'")
+
+def get_nas_dstdir(parameters: Dict[str, Union[str, int, bool]]) -> str:
+    dstdir = parameters['NAS Destination Directory'].lstrip('.').lstrip('/').rstrip('/')  # remove leading './' and trailing '/'
+
+    if dstdir != '':
+        dstdir += '/'
+
+    if not is_subdir(parent=NAS_OUTPUT_ROOT_DIR, child=f'{NAS_OUTPUT_ROOT_DIR}/{dstdir}'):
+        raise ValueError(f"Destination directory '{NAS_OUTPUT_ROOT_DIR}/{dstdir}' is not a subdirectory of NAS root directory '{NAS_OUTPUT_ROOT_DIR}'")
+
+    return dstdir
+
+
+def get_output_manifest(parameters: Dict[str, Union[str, int, bool]]) -> List[str]:
+    patterns = [p.strip() for p in str(parameters['Output Manifest']).split(',')]
+    return [p[2:] if p.startswith('./') else p for p in patterns if p != '']
+
+
+def build_find_manifest_cmd(outdir: str, manifest: List[str]) -> str:
+    """
+    Lists the NUL-separated files of the output directory matching the manifest, relative to it,
+    and fails when nothing matches, so that a mistyped manifest never lets the cleanup delete unsent outputs
+    """
+    outdir = outdir.rstrip('/')
+    file = get_manifest_file(outdir)
+    paths = ' -o '.join(f"-path './{pattern}'" for pattern in manifest)
+    return f"(cd '{outdir}' && find . -type f \\( {paths} \\) -print0) > '{file}'   &&   [ -s '{file}' ]"
+
+
+def get_manifest_file(outdir: str) -> str:
+    # next to, not inside, the output directory, so that it never matches the manifest itself
+    return f"{outdir.rstrip('/')}.manifest"
+
+
+def ssh_quote(cmd: str) -> str:
+    # one single-quoted argument for the remote shell of ssh
+    return "'" + cmd.replace("'", "'\\''") + "'"
+
+
+def build_list_nas_outputs_cmd(parameters: Dict[str, Union[str, int, bool]]) -> str:
+    # run on the compute node, which already reaches the NAS with key-based ssh for rsync
+    p = parameters
+    path = quote_path(f'{NAS_OUTPUT_ROOT_DIR}/{get_nas_dstdir(p)}')
+    return f'ssh -p {p["NAS Port"]} -o BatchMode=yes {p["NAS User"]}@{p["NAS Local IP"]} "ls -1 {path}"'
+
+
+def quote_path(path: str) -> str:
+    if path.startswith('~/'):
+        return f"~/'{path[2:]}'"  # keep '~' outside the quotes so that it is expanded
+    return f"'{path}'"
+
+
+def estimate_disk_gb(fastq_bytes: int, parameters: Dict[str, Union[str, int, bool]]) -> int:
+    # the staged FASTQs plus the peak size of the output directory, rounded up
+    multiplier = float(parameters['Output Size Multiplier'])
+    if parameters['discard-bam']:
+        multiplier *= DISCARD_BAM_OUTPUT_FACTOR
+    return math.ceil(fastq_bytes * (1 + multiplier) / 1e9)
+
+
+def use_fastq_cache(parameters: Dict[str, Union[str, int, bool]]) -> bool:
+    return int(parameters['FASTQ Cache Size (GB)']) > 0
+
+
+def build_set_fastq_cache_size_cmd(max_gb: int) -> str:
+    return f"mkdir -p {FASTQ_CACHE_DIR}   &&   echo '{max_gb}' > {FASTQ_CACHE_DIR}/max_gb"
 
 
 def is_subdir(parent: str, child: str) -> bool:
@@ -261,15 +969,110 @@ def is_subdir(parent: str, child: str) -> bool:
 def build_submit_cmd(
         job_name: str,
         outdir: str,
-        script: str) -> str:
-
+        checksum: str,
+        launch_cmd: Optional[str] = None) -> str:
+    """
+    The script is already uploaded to commands.txt over SFTP, so the command keeps
+    the same small size whatever the script, and only launches what arrived intact
+    """
     outdir = outdir.rstrip('/')
-    cmd_txt = f'{outdir}/commands.txt'
+
+    if launch_cmd is None:
+        launch_cmd = build_launch_cmd(job_name=job_name, outdir=outdir)
 
     cmd = f'''\
-mkdir -p "{outdir}"   &&   \\
-echo "{script}" > "{cmd_txt}"   &&   \\
-screen -S {job_name} -dm bash "{cmd_txt}"
+{build_verify_cmd(file=f'{outdir}/commands.txt', checksum=checksum)}   &&   \\
+{launch_cmd}
 '''
 
     return cmd
+
+
+def build_verify_cmd(file: str, checksum: str) -> str:
+    # fails on a missing, truncated or stale file
+    return f"echo '{checksum}  {file}' | sha256sum -c --status"
+
+
+def build_launch_cmd(job_name: str, outdir: str) -> str:
+    outdir = outdir.rstrip('/')
+    return f'screen -S {job_name} -dm bash "{outdir}/commands.txt"'
+
+
+def build_enqueue_cmd(
+        job_name: str,
+        outdir: str,
+        key: str,
+        threads: int,
+        memory_gb: int,
+        disk_gb: int = 0) -> str:
+    outdir = outdir.rstrip('/')
+    disk = f' {disk_gb}' if disk_gb > 0 else ''  # last, so that job files without it are still read
+    return f"echo '{job_name} {threads} {memory_gb} {outdir}{disk}' > '{QUEUE_DIR}/pending/{key}.job'"
+
+
+def build_start_queue_cmd(max_cores: int, max_memory_gb: int, max_disk_gb: int = 0) -> str:
+    # the scheduler holds a lock for its lifetime, so starting it again is a no-op
+    return (
+        f'mkdir -p {QUEUE_DIR}/pending {QUEUE_DIR}/running {QUEUE_DIR}/done   &&   '
+        f"echo '{max_cores} {max_memory_gb} {max_disk_gb}' > {QUEUE_DIR}/config   &&   "
+        f'screen -S {QUEUE_SESSION} -dm flock -n {QUEUE_DIR}/scheduler.lock bash {QUEUE_SCHEDULER_SH}'
+    )
+
+
+def build_start_pipelined_cmd(batch_id: str, samples_txt: str, lookahead: int) -> str:
+    return f'screen -S {get_pipelined_session(batch_id)} -dm bash {PIPELINED_SH} "{samples_txt}" {lookahead}'
+
+
+def build_stop_pipelined_cmd(batch_id: str) -> str:
+    # the stages run by the batch runner are hung up with its screen session
+    return f'screen -S {get_pipelined_session(batch_id)} -X quit'
+
+
+def get_pipelined_session(batch_id: str) -> str:
+    return f'somatic_app_{batch_id}'
+
+
+def build_queue_status_cmd() -> str:
+    return (
+        f'cat {QUEUE_DIR}/capacity 2>/dev/null; '
+        f'for state in pending running; do '
+        f'for f in {QUEUE_DIR}/$state/*.job; do [ -e "$f" ] && echo "$state $(cat "$f")"; done; '
+        f'done; '
+        f'echo "done $(ls {QUEUE_DIR}/done | wc -l)"'
+    )
+
+
+def parse_queue_status(stdout: str) -> str:
+    max_cores, max_memory_gb, max_disk_gb = '?', '?', '0'
+    state_to_jobs = {'pending': [], 'running': []}
+    n_done = 0
+    used_cores, used_memory_gb, used_disk_gb = 0, 0, 0
+
+    for line in stdout.strip().splitlines():
+        fields = line.split()
+        if len(fields) == 2 and fields[0] == 'done':
+            n_done = int(fields[1])
+        elif len(fields) in [2, 3] and fields[0] not in state_to_jobs:
+            max_cores, max_memory_gb = fields[0:2]
+            max_disk_gb = fields[2] if len(fields) == 3 else '0'
+        elif len(fields) >= 5 and fields[0] in state_to_jobs:
+            state, name, threads, memory_gb = fields[0:4]
+            state_to_jobs[state].append(name)
+            if state == 'running':
+                used_cores += int(threads)
+                used_memory_gb += int(memory_gb)
+                used_disk_gb += int(fields[5]) if len(fields) >= 6 else 0
+
+    running, pending = state_to_jobs['running'], state_to_jobs['pending']
+    lines = [
+        f'Cores in use: {used_cores} / {max_cores}',
+        f'Memory in use: {used_memory_gb} / {max_memory_gb} GB',
+    ]
+    if max_disk_gb != '0':
+        lines.append(f'Disk reserved: {used_disk_gb} / {max_disk_gb} GB')
+    return '\n'.join(lines + [
+        '',
+        f'Running ({len(running)}): {", ".join(running)}',
+        f'Pending ({len(pending)}): {", ".join(pending)}',
+        f'Done: {n_done}',
+    ])
@@ -0,0 +1,189 @@
+from typing import List, Dict, Set, Tuple, Union, Optional, Any
+from .model import get_transfer_profile, quote_path
+
+
+FASTQ_COLUMNS = ['Tumor Fastq R1', 'Tumor Fastq R2', 'Normal Fastq R1', 'Normal Fastq R2']
+LISTING_EOF = 'SOMATIC_APP_EOF'
+
+
+def build_list_fastqs_cmd(parameters: Dict[str, Union[str, int, bool]], batch_ids: List[str]) -> str:
+    """
+    One ssh call from the compute node to the NAS, listing 'size PATH' of every file
+    under each sequencing batch directory, after a '@@batch BATCH' line, as FASTQ names may have a subpath,
+    the script is fed through stdin to avoid nested quoting
+    """
+    p = parameters
+    seqdir = p['NAS Sequencing Directory'].rstrip('/')
+    lines = []
+    for batch_id in batch_ids:
+        srcdir = quote_path(f'{seqdir}/{batch_id}')
+        # the batch ID is printed as is, neither in the find format nor through echo, which read '%' and '\\'
+        lines.append(
+            f"printf '%s\\n' '@@batch {batch_id}'; "
+            f"if [ -d {srcdir} ]; then find -L {srcdir} -type f -printf '%s %P\\n' 2>/dev/null; "
+            f"else echo '@@missing'; fi")
+    script = '\n'.join(lines)
+    ssh = f'ssh -p {p["NAS Port"]} -o BatchMode=yes {p["NAS User"]}@{p["NAS Local IP"]}'
+    return f"{ssh} sh -s <<'{LISTING_EOF}'\n{script}\n{LISTING_EOF}"
+
+
+def parse_fastq_listing(stdout: str) -> Tuple[Dict[Tuple[str, str], int], Set[str]]:
+    """
+    Returns the index (batch_id, path relative to the batch directory) -> size in bytes,
+    and the batch IDs without a directory
+    """
+    index = {}
+    missing_dirs = set()
+    batch_id = None
+    for line in stdout.splitlines():
+        if line.startswith('@@batch '):
+            batch_id = line[len('@@batch '):]
+            continue
+        if batch_id is None:
+            continue
+        if line == '@@missing':
+            missing_dirs.add(batch_id)
+            continue
+        fields = line.split(' ', 1)
+        if len(fields) != 2 or not fields[0].isdigit():
+            continue
+        index[(batch_id, fields[1])] = int(fields[0])
+    return index, missing_dirs
+
+
+class PreflightReport:
+
+    n_samples: int
+    missing: List[str]  # one message per missing file
+    total_bytes: int  # of the unique FASTQs found
+    sample_bytes: Dict[str, int]  # output name -> bytes of its FASTQs found
+    bandwidth_mb: float  # MB/s assumed for the estimate
+    estimated_seconds: float
+
+    def __init__(
+            self,
+            n_samples: int,
+            missing: List[str],
+            total_bytes: int,
+            bandwidth_mb: float,
+            sample_bytes: Optional[Dict[str, int]] = None):
+        self.n_samples = n_samples
+        self.missing = missing
+        self.total_bytes = total_bytes
+        self.sample_bytes = {} if sample_bytes is None else sample_bytes
+        self.bandwidth_mb = bandwidth_mb
+        self.estimated_seconds = total_bytes / (bandwidth_mb * 1e6)
+
+    def ok(self) -> bool:
+        return len(self.missing) == 0
+
+    def summary(self) -> str:
+        lines = [
+            f'Pre-flight: {self.total_bytes / 1e9:.1f} GB of FASTQs for {self.n_samples} sample(s), '
+            f'estimated transfer time {format_duration(self.estimated_seconds)} at {self.bandwidth_mb:g} MB/s'
+        ]
+        if not self.ok():
+            lines += ['', f'{len(self.missing)} FASTQ(s) not found on the NAS:']
+            lines += [f'  {m}' for m in self.missing]
+        return '\n'.join(lines)
+
+
+class Preflight:
+    """
+    Checks that every FASTQ of the run table is on the NAS before anything is submitted
+    """
+
+    parameters: Dict[str, Union[str, int, bool]]
+    run_table: List[Dict[str, Optional[str]]]  # rows from iter_run_table()
+
+    def main(
+            self,
+            connection: Any,  # fabric.Connection to the compute node
+            run_table: List[Dict[str, Optional[str]]],
+            parameters: Dict[str, Union[str, int, bool]]) -> PreflightReport:
+
+        self.parameters = parameters
+        self.run_table = run_table
+
+        batch_ids = list(dict.fromkeys(
+            row['Sequencing Batch ID'] for row in self.run_table if row['Sequencing Batch ID'] is not None))
+        cmd = build_list_fastqs_cmd(parameters=self.parameters, batch_ids=batch_ids)
+        result = connection.run(cmd, hide=True, warn=True)
+        if result.return_code == 255:  # ssh itself failed, an incomplete listing would report everything missing
+            raise RuntimeError(f'Failed to list FASTQs on the NAS: {result.stderr.strip()}')
+
+        index, missing_dirs = parse_fastq_listing(result.stdout)
+        return CheckRunTable().main(
+            run_table=self.run_table,
+            parameters=self.parameters,
+            index=index,
+            missing_dirs=missing_dirs)
+
+
+class CheckRunTable:
+
+    run_table: List[Dict[str, Optional[str]]]
+    parameters: Dict[str, Union[str, int, bool]]
+    index: Dict[Tuple[str, str], int]
+    missing_dirs: Set[str]
+
+    missing: List[str]
+    found: Set[Tuple[str, str]]
+    sample_bytes: Dict[str, int]
+
+    def main(
+            self,
+            run_table: List[Dict[str, Optional[str]]],
+            parameters: Dict[str, Union[str, int, bool]],
+            index: Dict[Tuple[str, str], int],
+            missing_dirs: Set[str]) -> PreflightReport:
+
+        self.run_table = run_table
+        self.parameters = parameters
+        self.index = index
+        self.missing_dirs = missing_dirs
+
+        self.missing = []
+        self.found = set()
+        self.sample_bytes = {}
+        for row in self.run_table:
+            self.check_row(row)
+
+        return PreflightReport(
+            n_samples=len(self.run_table),
+            missing=self.missing,
+            total_bytes=sum(self.index[key] for key in self.found),
+            bandwidth_mb=self.get_bandwidth_mb(),
+            sample_bytes=self.sample_bytes)
+
+    def check_row(self, row: Dict[str, Optional[str]]):
+        batch_id = row['Sequencing Batch ID']
+        fqs = [row['Tumor Fastq R1'], row['Tumor Fastq R2']]
+        if row['Normal Fastq R1'] is not None:
+            fqs += [row['Normal Fastq R1'], row['Normal Fastq R2']]
+
+        for fq in fqs:
+            if fq is None:
+                self.missing.append(f'{row["Output Name"]}: FASTQ name is empty')
+            elif (batch_id, fq) in self.index:
+                self.found.add((batch_id, fq))
+                name = row['Output Name']
+                self.sample_bytes[name] = self.sample_bytes.get(name, 0) + self.index[(batch_id, fq)]
+            elif batch_id in self.missing_dirs:
+                self.missing.append(f'{row["Output Name"]}: {batch_id}/{fq} (no such batch directory)')
+            else:
+                self.missing.append(f'{row["Output Name"]}: {batch_id}/{fq}')
+
+    def get_bandwidth_mb(self) -> float:
+        bandwidth_mb = float(self.parameters['Transfer Estimate Bandwidth (MB/s)'])
+        bwlimit = get_transfer_profile(self.parameters).bwlimit  # KB/s, in total however many streams
+        if bwlimit > 0:
+            bandwidth_mb = min(bandwidth_mb, bwlimit * 1024 / 1e6)
+        return bandwidth_mb
+
+
+def format_duration(seconds: float) -> str:
+    minutes = int(round(seconds / 60))
+    if minutes < 60:
+        return f'{minutes} min'
+    return f'{minutes // 60} h {minutes % 60} min'
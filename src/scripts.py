@@ -0,0 +1,200 @@
+# Helper scripts installed on the compute node, paths are relative to the compute root directory
+
+
+QUEUE_DIR = 'queue'
+QUEUE_SESSION = 'somatic_app_queue'
+QUEUE_SCHEDULER_SH = f'{QUEUE_DIR}/scheduler.sh'
+
+
+# Started once in its own screen session and never exits, so that jobs enqueued by later
+#   submissions are picked up without a race between an exiting scheduler and a new one.
+# Job files are 'name threads memory_gb outdir [disk_gb]', started in file name order (FIFO).
+# The disk reservation of a job is held until it exits, a disk budget of 0 means no disk limit.
+QUEUE_SCHEDULER = r'''#!/bin/bash
+QUEUE_DIR="$(dirname "$0")"
+POLL_SECONDS=10
+
+is_alive() {
+    screen -ls | grep -q "[.]$1[[:space:]]"
+}
+
+while true; do
+    MAX_CORES=0
+    MAX_MEMORY_GB=0
+    MAX_DISK_GB=0
+    [ -f "$QUEUE_DIR/config" ] && read -r MAX_CORES MAX_MEMORY_GB MAX_DISK_GB < "$QUEUE_DIR/config"
+    [ -n "$MAX_DISK_GB" ] || MAX_DISK_GB=0
+    [ "$MAX_CORES" -gt 0 ] || MAX_CORES=$(nproc)
+    [ "$MAX_MEMORY_GB" -gt 0 ] || MAX_MEMORY_GB=$(awk '/MemTotal/ {print int($2 / 1048576)}' /proc/meminfo)
+    echo "$MAX_CORES $MAX_MEMORY_GB $MAX_DISK_GB" > "$QUEUE_DIR/capacity"
+
+    used_cores=0
+    used_memory_gb=0
+    used_disk_gb=0
+    for f in "$QUEUE_DIR"/running/*.job; do
+        [ -e "$f" ] || continue
+        read -r name threads memory_gb outdir disk_gb < "$f"
+        if is_alive "$name"; then
+            used_cores=$((used_cores + threads))
+            used_memory_gb=$((used_memory_gb + memory_gb))
+            used_disk_gb=$((used_disk_gb + ${disk_gb:-0}))
+        else
+            mv "$f" "$QUEUE_DIR/done/"
+        fi
+    done
+
+    for f in "$QUEUE_DIR"/pending/*.job; do
+        [ -e "$f" ] || continue
+        read -r name threads memory_gb outdir disk_gb < "$f"
+        disk_gb=${disk_gb:-0}
+        fits_cores=$((used_cores + threads <= MAX_CORES))
+        fits_memory=$((used_memory_gb + memory_gb <= MAX_MEMORY_GB))
+        fits_disk=$((MAX_DISK_GB == 0 || used_disk_gb + disk_gb <= MAX_DISK_GB))
+        # a job larger than the whole node is started alone instead of blocking the queue forever
+        if { [ "$fits_cores" -eq 1 ] && [ "$fits_memory" -eq 1 ] && [ "$fits_disk" -eq 1 ]; } || [ "$used_cores" -eq 0 ]; then
+            mv "$f" "$QUEUE_DIR/running/"
+            screen -S "$name" -dm bash "$outdir/commands.txt"
+            used_cores=$((used_cores + threads))
+            used_memory_gb=$((used_memory_gb + memory_gb))
+            used_disk_gb=$((used_disk_gb + disk_gb))
+        else
+            break  # strict FIFO, small jobs do not overtake large ones
+        fi
+    done
+
+    sleep "$POLL_SECONDS"
+done
+'''
+
+
+CHECKPOINT_DIR = 'checkpoints'  # stage markers of each output name, kept after the output directory is removed
+
+
+FASTQ_DIR = 'fastq'
+FASTQ_CACHE_DIR = f'{FASTQ_DIR}/.cache'
+FASTQ_CACHE_SH = 'bin/fastq_cache.sh'
+
+
+# Usage:
+#   fastq_cache.sh acquire HOLDER KEY DOWNLOAD_CMD...
+#   fastq_cache.sh release HOLDER KEY
+# KEY is 'SEQUENCING_BATCH_ID/FASTQ', also the path of the cached FASTQ under fastq/,
+#   so that a re-sequenced sample with the same file name in a later batch is never mistaken for the old one.
+# A FASTQ is downloaded only if absent, and is referenced by the set of holders (output names)
+#   rather than a counter, so that acquiring or releasing twice for the same job is harmless.
+# Unreferenced FASTQs are evicted in least-recently-acquired order while the cache exceeds max_gb.
+FASTQ_CACHE = r'''#!/bin/bash
+FASTQ_DIR=fastq
+CACHE_DIR="$FASTQ_DIR/.cache"
+mkdir -p "$CACHE_DIR/refs" "$CACHE_DIR/used" "$CACHE_DIR/locks"
+
+action=$1
+holder=$2
+fastq=$3
+shift 3
+
+add_holder() {
+    mkdir -p "$(dirname "$CACHE_DIR/refs/$fastq")" "$(dirname "$CACHE_DIR/used/$fastq")"
+    grep -qxF "$holder" "$CACHE_DIR/refs/$fastq" 2>/dev/null || echo "$holder" >> "$CACHE_DIR/refs/$fastq"
+    touch "$CACHE_DIR/used/$fastq"
+}
+
+remove_holder() {
+    touch "$CACHE_DIR/refs/$fastq"
+    grep -vxF "$holder" "$CACHE_DIR/refs/$fastq" > "$CACHE_DIR/refs/$fastq.tmp"
+    mv "$CACHE_DIR/refs/$fastq.tmp" "$CACHE_DIR/refs/$fastq"
+}
+
+evict() {
+    max_gb=0
+    [ -f "$CACHE_DIR/max_gb" ] && read -r max_gb < "$CACHE_DIR/max_gb"
+    max_bytes=$((max_gb * 1073741824))
+    total=$(find "$FASTQ_DIR" -path "$CACHE_DIR" -prune -o -type f -printf '%s\n' | awk '{s += $1} END {print s + 0}')
+    while read -r name; do
+        [ "$total" -gt "$max_bytes" ] || break
+        if [ ! -s "$CACHE_DIR/refs/$name" ] && [ -f "$FASTQ_DIR/$name" ]; then
+            size=$(stat -c %s "$FASTQ_DIR/$name")
+            rm -f "$FASTQ_DIR/$name" "$CACHE_DIR/used/$name" "$CACHE_DIR/refs/$name"
+            total=$((total - size))
+        fi
+    done < <(find "$CACHE_DIR/used" -type f -printf '%T@ %P\n' | sort -n | cut -d ' ' -f 2-)
+}
+
+if [ "$action" = "acquire" ]; then
+    ( flock 9 && add_holder ) 9> "$CACHE_DIR/lock"
+    mkdir -p "$(dirname "$CACHE_DIR/locks/$fastq")" "$(dirname "$FASTQ_DIR/$fastq")"
+    (
+        flock 8  # jobs sharing a FASTQ wait here for a single download
+        if [ ! -f "$FASTQ_DIR/$fastq" ]; then
+            ( flock 9 && evict ) 9> "$CACHE_DIR/lock"
+            "$@"
+        fi
+    ) 8> "$CACHE_DIR/locks/$fastq"
+    status=$?
+    if [ "$status" -ne 0 ]; then
+        ( flock 9 && remove_holder ) 9> "$CACHE_DIR/lock"
+    fi
+    exit "$status"
+elif [ "$action" = "release" ]; then
+    ( flock 9 && remove_holder && evict ) 9> "$CACHE_DIR/lock"
+else
+    echo "Unknown action: $action" >&2
+    exit 1
+fi
+'''
+
+
+PIPELINED_SH = 'bin/pipelined.sh'
+
+
+# Usage: pipelined.sh SAMPLES_TXT LOOKAHEAD
+# Runs the stage_in.sh, compute.sh and stage_out.sh of every sample (output directory) listed in SAMPLES_TXT,
+#   with the three stages as concurrent loops, so that the FASTQs of the next samples are downloaded
+#   and the outputs of the previous sample are uploaded while the current sample computes.
+# Staging runs at most LOOKAHEAD samples ahead of the compute stage, which bounds the disk usage.
+# A failed sample is marked and skipped by the later stages, the rest of the batch carries on.
+PIPELINED = r'''#!/bin/bash
+samples_txt=$1
+lookahead=$2
+state_dir="$(dirname "$samples_txt")/state"
+mkdir -p "$state_dir"
+mapfile -t samples < "$samples_txt"
+
+wait_for() {
+    while [ ! -e "$1" ]; do sleep 5; done
+}
+
+run_stage() {
+    # run_stage INDEX SCRIPT DONE_MARKER
+    if [ ! -e "$state_dir/$1.failed" ]; then
+        bash "${samples[$1]}/$2" || touch "$state_dir/$1.failed"
+    fi
+    touch "$state_dir/$1.$3"
+}
+
+stage_in() {
+    for i in "${!samples[@]}"; do
+        [ "$i" -gt "$lookahead" ] && wait_for "$state_dir/$((i - lookahead - 1)).computed"
+        run_stage "$i" stage_in.sh staged
+    done
+}
+
+compute() {
+    for i in "${!samples[@]}"; do
+        wait_for "$state_dir/$i.staged"
+        run_stage "$i" compute.sh computed
+    done
+}
+
+stage_out() {
+    for i in "${!samples[@]}"; do
+        wait_for "$state_dir/$i.computed"
+        run_stage "$i" stage_out.sh done
+    done
+}
+
+stage_in &
+compute &
+stage_out &
+wait
+'''
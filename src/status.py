@@ -0,0 +1,191 @@
+from typing import List, Dict, Set, Optional
+from .lazy import lazy_import
+from .scripts import QUEUE_DIR, CHECKPOINT_DIR
+
+
+pd = lazy_import('pandas')
+
+
+QUEUED = 'queued'
+STAGING = 'staging'
+RUNNING = 'running'
+UPLOADING = 'uploading'
+DONE = 'done'
+FAILED = 'failed'
+UNKNOWN = 'unknown'  # no output directory, and no record that the job was submitted or completed
+
+STATUS_DIR = 'status'  # output directories polled by each job status dashboard, one per line
+
+STAGE_SCRIPT_TO_STATE = {  # pipelined launch mode
+    'stage_in.sh': STAGING,
+    'compute.sh': RUNNING,
+    'stage_out.sh': UPLOADING,
+}
+PIPELINED_MARKER_TO_STATE = {
+    'none': QUEUED,
+    'staged': QUEUED,  # waiting for the compute stage
+    'computed': UPLOADING,
+    'done': DONE,
+    'failed': FAILED,
+}
+
+
+class JobStatus:
+
+    name: str
+    state: str
+    size_kb: Optional[int]  # None if the output directory is absent
+    progress: List[str]  # last lines of progress.txt
+
+    def __init__(self, name: str, state: str, size_kb: Optional[int], progress: List[str]):
+        self.name = name
+        self.state = state
+        self.size_kb = size_kb
+        self.progress = progress
+
+
+def read_output_names(run_table: str) -> List[str]:
+    return pd.read_csv(run_table, usecols=['Output Name'], dtype=str)['Output Name'].tolist()
+
+
+def build_status_cmd(outdirs_file: str, n_lines: int = 3) -> str:
+    """
+    One remote command that collects everything needed to tell the state of all jobs:
+    screen sessions, running processes, the queue, the pipelined batches,
+    and the size and last progress lines of each output directory listed in outdirs_file,
+    which is uploaded beforehand so that the command keeps the same small size however many samples
+    """
+    return '; '.join([
+        f"touch '{outdirs_file}'",  # still in use, not to be removed as a stale list below
+        f"find {STATUS_DIR} -name '*.txt' -mtime +1 -delete 2>/dev/null",
+        "echo '@@screen'",
+        'screen -ls',
+        "echo '@@ps'",
+        'ps -eo args',
+        "echo '@@queue'",
+        f'for f in {QUEUE_DIR}/pending/*.job; do [ -e "$f" ] && cat "$f"; done',
+        "echo '@@pipelined'",
+        (
+            'for b in batches/*; do [ -f "$b/samples.txt" ] || continue; i=0; '
+            'while read -r s; do m=none; for x in staged computed done failed; do [ -e "$b/state/$i.$x" ] && m=$x; done; '
+            'echo "$s $m"; i=$((i + 1)); done < "$b/samples.txt"; done'
+        ),
+        (
+            'i=0; while IFS= read -r o; do echo "@@job $i"; '
+            f'if [ -d "$o" ]; then echo "@@size $(du -sk "$o" | cut -f1)"; tail -n {n_lines} "$o/progress.txt" 2>/dev/null; fi; '
+            f'[ -e "{CHECKPOINT_DIR}/$o/cleanup.done" ] && echo "@@finished"; '
+            f"i=$((i + 1)); done < '{outdirs_file}'"
+        ),
+    ])
+
+
+def build_outdirs_file_content(outdirs: List[str]) -> str:
+    return ''.join(f"{o.rstrip('/')}\n" for o in outdirs)
+
+
+class ParseStatus:
+
+    outdirs: List[str]
+    submitted: Set[str]  # output names recorded as submitted to this host
+
+    sessions: Set[str]
+    processes: List[List[str]]
+    queued: Set[str]
+    pipelined: Dict[str, str]
+    index_to_size: Dict[int, int]
+    index_to_progress: Dict[int, List[str]]
+    finished: Set[int]  # indices whose cleanup stage left its checkpoint marker
+
+    def main(self, stdout: str, outdirs: List[str], submitted: Optional[Set[str]] = None) -> List[JobStatus]:
+        self.outdirs = [o.rstrip('/') for o in outdirs]
+        self.submitted = set() if submitted is None else set(s.rstrip('/') for s in submitted)
+        self.parse_sections(stdout)
+        return [self.get_status(i) for i in range(len(self.outdirs))]
+
+    def parse_sections(self, stdout: str):
+        self.sessions = set()
+        self.processes = []
+        self.queued = set()
+        self.pipelined = {}
+        self.index_to_size = {}
+        self.index_to_progress = {}
+        self.finished = set()
+
+        section, index = '', -1
+        for line in stdout.splitlines():
+            if line.startswith('@@job '):
+                section, index = 'job', int(line.split()[1])
+                self.index_to_progress[index] = []
+            elif line.startswith('@@size '):
+                self.index_to_size[index] = int(line.split()[1])
+            elif line == '@@finished':
+                self.finished.add(index)
+            elif line.startswith('@@'):
+                section = line[2:].strip()
+            elif section == 'screen':
+                fields = line.split()
+                if len(fields) > 0 and '.' in fields[0]:
+                    self.sessions.add(fields[0].split('.', 1)[1])  # '12345.NAME' -> 'NAME'
+            elif section == 'ps':
+                self.processes.append(line.split())
+            elif section == 'queue':
+                fields = line.split()
+                if len(fields) > 0:
+                    self.queued.add(fields[0])
+            elif section == 'pipelined':
+                fields = line.rsplit(maxsplit=1)
+                if len(fields) == 2:
+                    self.pipelined[fields[0]] = fields[1]  # later batches override earlier ones
+            elif section == 'job':
+                self.index_to_progress[index].append(line)
+
+    def get_status(self, index: int) -> JobStatus:
+        outdir = self.outdirs[index]
+        size_kb = self.index_to_size.get(index, None)
+        return JobStatus(
+            name=outdir,
+            state=self.get_state(outdir=outdir, exists=size_kb is not None, finished=index in self.finished),
+            size_kb=size_kb,
+            progress=self.index_to_progress.get(index, []))
+
+    def get_state(self, outdir: str, exists: bool, finished: bool) -> str:
+        marker = self.pipelined.get(outdir, None)
+        if marker in ['done', 'failed']:
+            return PIPELINED_MARKER_TO_STATE[marker]
+
+        for args in self.processes:
+            if f'--outdir={outdir}' in args:
+                return RUNNING
+            if len(args) > 0 and args[0].endswith(('rsync', 'tar')) and outdir in args:
+                return UPLOADING
+            for script, state in STAGE_SCRIPT_TO_STATE.items():
+                if f'{outdir}/{script}' in args:
+                    return state
+
+        if outdir in self.queued:
+            return QUEUED
+        if outdir in self.sessions:
+            return STAGING  # alive but neither computing nor uploading
+        if marker is not None:
+            return PIPELINED_MARKER_TO_STATE[marker]
+        if exists:
+            return FAILED  # the '&&' chain stopped before removing the output directory
+        if finished or outdir in self.submitted:
+            return DONE  # the output directory, created on submission, was removed by the cleanup stage
+        return UNKNOWN  # never submitted from here, or submitted elsewhere
+
+
+def build_status_rows(statuses: List[JobStatus]) -> List[List[str]]:
+    rows = []
+    for s in statuses:
+        size = '' if s.size_kb is None else f'{s.size_kb / 1024 ** 2:.1f} GB'
+        progress = s.progress[-1] if len(s.progress) > 0 else ''
+        rows.append([s.name, s.state, size, progress])
+    return rows
+
+
+def summarize_status(statuses: List[JobStatus]) -> str:
+    counts = [f'{state}: {sum(s.state == state for s in statuses)}' for state in [
+        QUEUED, STAGING, RUNNING, UPLOADING, DONE, FAILED, UNKNOWN
+    ]]
+    return ', '.join(counts)
@@ -0,0 +1,677 @@
+import io
+import time
+import queue
+import tarfile
+import hashlib
+import threading
+from typing import List, Dict, Set, Tuple, Union, Callable, Optional
+from concurrent.futures import ThreadPoolExecutor
+from .lazy import lazy_import
+from .ledger import Ledger, SUBMITTED, FAILED, CANCELLED
+from .preflight import Preflight, PreflightReport
+from .validate import validate_submission
+from .timing import SubmissionTimer, timed_phase
+from .hosts import HostProbe, HostCapacity, PlaceJobs, Sizing, SuggestSizing, get_compute_hosts, with_host, \
+    build_probe_cmd, parse_probe, build_capacity_cmd, parse_capacity, get_sized_parameters
+from .model import Job, Batch, BuildSubmissionCommands, BuildBatchArchive, build_batch_launch_cmd, build_verify_cmd, \
+    build_extract_cmd, build_list_nas_outputs_cmd, parse_launch_statuses, iter_run_table, fill_default_parameters, \
+    add_to_tar, add_job_to_tar, COMPUTE_ROOT_DIR, COMPUTE_PROFILE, LOCAL_EXECUTOR
+
+
+fabric = lazy_import('fabric')  # paramiko and cryptography are only loaded when connecting
+
+
+class ConnectionPool:
+    """
+    At most `max_size` connections are opened, each on first demand,
+    and handed out to one worker at a time
+    """
+
+    new_connection: Callable[[], 'fabric.Connection']
+    max_size: int
+
+    idle: queue.Queue
+    opened: List['fabric.Connection']
+    lock: threading.Lock
+
+    def __init__(self, new_connection: Callable[[], 'fabric.Connection'], max_size: int):
+        assert max_size > 0, f'Connection pool size should be positive, got {max_size}'
+        self.new_connection = new_connection
+        self.max_size = max_size
+        self.idle = queue.Queue()
+        self.opened = []
+        self.lock = threading.Lock()
+
+    def acquire(self) -> 'fabric.Connection':
+        try:
+            return self.idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self.lock:
+            if len(self.opened) < self.max_size:
+                connection = self.new_connection()
+                self.opened.append(connection)
+                return connection
+
+        return self.idle.get()  # all connections are busy, wait for one to be released
+
+    def release(self, connection: 'fabric.Connection'):
+        self.idle.put(connection)
+
+    def close(self):
+        for connection in self.opened:
+            connection.close()
+
+
+class SubmitResult:
+
+    job_name: str
+    success: bool
+    error: str
+
+    def __init__(self, job_name: str, success: bool, error: str = ''):
+        self.job_name = job_name
+        self.success = success
+        self.error = error
+
+
+class Submit:
+
+    CANCELLED = 'Cancelled'
+
+    pool: ConnectionPool
+    on_result: Optional[Callable[[SubmitResult], None]]
+    timer: SubmissionTimer
+    cancelled: threading.Event
+
+    batch: Batch
+
+    def __init__(
+            self,
+            pool: ConnectionPool,
+            on_result: Optional[Callable[[SubmitResult], None]] = None,
+            timer: Optional[SubmissionTimer] = None):
+        self.pool = pool
+        self.on_result = on_result
+        self.timer = SubmissionTimer(file=None) if timer is None else timer
+        self.cancelled = threading.Event()
+
+    def cancel(self):
+        self.cancelled.set()
+
+    def report(self, result: SubmitResult) -> SubmitResult:
+        if self.on_result is not None:
+            self.on_result(result)
+        return result
+
+    def report_all(self, success: bool, error: str = '') -> List[SubmitResult]:
+        return [
+            self.report(SubmitResult(job_name=name, success=success, error=error)) for name in self.batch.job_names
+        ]
+
+
+class SetUpBatch:
+    """
+    Install the helper files of a batch as one archive over one connection, make the output directories,
+    then run its one-off setup commands. The job scripts are uploaded with each job by SubmitJobs,
+    unless the setup commands start the jobs themselves, in which case they are packed into the archive too
+    """
+
+    connection: 'fabric.Connection'
+    batch: Batch
+    cancelled: threading.Event
+
+    archive: str
+    outdirs_file: str  # the output directories, too many for the arguments of one mkdir
+
+    def main(self, connection: 'fabric.Connection', batch: Batch, cancelled: threading.Event) -> bool:
+        """
+        Returns False if cancelled before the setup commands, none of which has then run
+        """
+        self.connection = connection
+        self.batch = batch
+        self.cancelled = cancelled
+        self.archive = f'{self.batch.batch_id}_setup.tar.gz'
+        self.outdirs_file = f'batches/{self.batch.batch_id}/outdirs.txt'
+
+        data = self.build_archive()
+        if data is None or self.cancelled.is_set():
+            return False
+        self.install(data)
+        if self.cancelled.is_set():
+            return False
+        self.run_setup_cmds()
+        return True
+
+    def build_archive(self) -> Optional[bytes]:
+        # None if cancelled while the jobs are packed
+        buffer = io.BytesIO()
+        with tarfile.open(fileobj=buffer, mode='w:gz') as tar:
+            outdirs = ''.join(f"{name.rstrip('/')}\n" for name in self.batch.job_names)
+            add_to_tar(tar=tar, name=self.outdirs_file, content=outdirs)
+            for name, content in self.batch.files.items():
+                add_to_tar(tar=tar, name=name, content=content)
+            if self.batch.launched_by_setup:
+                for job in self.batch.jobs:
+                    if self.cancelled.is_set():
+                        return None
+                    add_job_to_tar(tar=tar, job=job)
+        return buffer.getvalue()
+
+    def install(self, data: bytes):
+        self.connection.put(io.BytesIO(data), remote=sftp_path(f'{COMPUTE_ROOT_DIR}/{self.archive}'), preserve_mode=False)
+        verify_cmd = build_verify_cmd(file=self.archive, checksum=hashlib.sha256(data).hexdigest())
+        mkdir_cmd = f'xargs -r -d "\\n" mkdir -p < "{self.outdirs_file}"'
+        extract_cmd = build_extract_cmd(self.archive)
+        with self.connection.cd(COMPUTE_ROOT_DIR):
+            self.connection.run(f'{verify_cmd}   &&   {extract_cmd}   &&   {mkdir_cmd}', echo=True)
+
+    def run_setup_cmds(self):
+        with self.connection.cd(COMPUTE_ROOT_DIR):
+            with self.connection.prefix(f'source {COMPUTE_PROFILE}'):
+                for cmd in self.batch.setup_cmds:
+                    self.connection.run(cmd, echo=True)
+
+
+class SubmitJobs(Submit):
+
+    results: List[SubmitResult]
+
+    def main(self, batch: Batch) -> List[SubmitResult]:
+        self.batch = batch
+
+        if self.cancelled.is_set():
+            return self.report_all(success=False, error=self.CANCELLED)
+
+        connection = self.pool.acquire()
+        try:
+            with self.timer.phase('set_up_batch'):
+                set_up = SetUpBatch().main(connection=connection, batch=self.batch, cancelled=self.cancelled)
+        except Exception as e:
+            return self.report_all(success=False, error=str(e))
+        finally:
+            self.pool.release(connection)
+
+        if not set_up:
+            return self.report_all(success=False, error=self.CANCELLED)
+
+        if self.batch.launched_by_setup:
+            return self.finish_launched_by_setup()
+
+        self.submit_all_jobs()
+        return self.results
+
+    def submit_all_jobs(self):
+        # each worker takes the next job only when free, so that jobs are built as they are sent, not all up front
+        jobs = enumerate(self.batch.jobs)
+        lock = threading.Lock()
+        index_to_result = {}
+
+        def work():
+            while True:
+                with lock:
+                    i, job = next(jobs, (None, None))
+                if job is None:
+                    return
+                index_to_result[i] = self.submit_one(job)
+
+        with ThreadPoolExecutor(max_workers=self.pool.max_size) as executor:
+            for future in [executor.submit(work) for _ in range(self.pool.max_size)]:
+                future.result()
+
+        self.results = [index_to_result[i] for i in range(len(index_to_result))]  # in the order of jobs
+
+    def finish_launched_by_setup(self) -> List[SubmitResult]:
+        # every job already runs, so that they are either all submitted or all stopped
+        if not self.cancelled.is_set():
+            return self.report_all(success=True)
+
+        connection = self.pool.acquire()
+        try:
+            with connection.cd(COMPUTE_ROOT_DIR):
+                for cmd in self.batch.cancel_cmds:
+                    connection.run(cmd, echo=True)
+        except Exception:
+            return self.report_all(success=True)  # still running, so that a resume does not run them twice
+        finally:
+            self.pool.release(connection)
+        return self.report_all(success=False, error=self.CANCELLED)
+
+    def submit_one(self, job: Job) -> SubmitResult:
+        if self.cancelled.is_set():
+            return self.report(SubmitResult(job_name=job.name, success=False, error=self.CANCELLED))
+
+        start = time.perf_counter()  # including the wait for a free connection
+        connection = self.pool.acquire()
+        try:
+            put_job_files(connection=connection, job=job)
+            with connection.cd(COMPUTE_ROOT_DIR):
+                with connection.prefix(f'source {COMPUTE_PROFILE}'):
+                    connection.run(job.command, echo=True)  # echo=True for printing out the command
+            result = SubmitResult(job_name=job.name, success=True)
+        except Exception as e:
+            result = SubmitResult(job_name=job.name, success=False, error=str(e))
+        finally:
+            self.pool.release(connection)
+        self.timer.record(event='job', name=job.name, seconds=time.perf_counter() - start, ok=result.success)
+
+        return self.report(result)
+
+
+class SubmitBatch(Submit):
+    """
+    Upload all job scripts as one archive over SFTP, then start all jobs with one remote command,
+    which reports the exit status of each launch
+    """
+
+    NOT_LAUNCHED = 'Not launched'
+
+    archive: str
+    checksum: str
+
+    def main(self, batch: Batch) -> List[SubmitResult]:
+        self.batch = batch
+        self.archive = f'{self.batch.batch_id}.tar.gz'
+
+        if self.cancelled.is_set():
+            return self.report_all(success=False, error=self.CANCELLED)
+
+        connection = self.pool.acquire()
+        try:
+            with self.timer.phase('upload_archive'):
+                self.upload(connection)
+            with self.timer.phase('launch_batch'):
+                stdout = self.launch(connection)
+        except Exception as e:
+            return self.report_all(success=False, error=str(e))
+        finally:
+            self.pool.release(connection)
+
+        index_to_status = parse_launch_statuses(stdout)
+        return [self.report(self.get_result(job_name=name, status=index_to_status.get(i, None)))
+                for i, name in enumerate(self.batch.job_names)]
+
+    def get_result(self, job_name: str, status: Optional[int]) -> SubmitResult:
+        if status is None:  # the launcher stopped before reaching this job
+            return SubmitResult(job_name=job_name, success=False, error=self.NOT_LAUNCHED)
+        if status != 0:
+            return SubmitResult(job_name=job_name, success=False, error=f'launch exited with status {status}')
+        return SubmitResult(job_name=job_name, success=True)
+
+    def upload(self, connection: 'fabric.Connection'):
+        data = BuildBatchArchive().main(batch=self.batch)
+        self.checksum = hashlib.sha256(data).hexdigest()
+        connection.put(io.BytesIO(data), remote=sftp_path(f'{COMPUTE_ROOT_DIR}/{self.archive}'), preserve_mode=False)
+
+    def launch(self, connection: 'fabric.Connection') -> str:
+        with connection.cd(COMPUTE_ROOT_DIR):
+            with connection.prefix(f'source {COMPUTE_PROFILE}'):
+                verify_cmd = build_verify_cmd(file=self.archive, checksum=self.checksum)
+                launch_cmd = build_batch_launch_cmd(batch_id=self.batch.batch_id, archive=self.archive)
+                result = connection.run(f'{verify_cmd}   &&   {launch_cmd}', echo=True)
+        return result.stdout
+
+
+class RunSubmission:
+    """
+    The whole submission from the run table to the final report, without any Qt,
+    shared by the GUI worker thread and the command line
+    """
+
+    run_table: str
+    parameters: Dict[str, Union[str, bool]]
+    ssh_password: str
+    on_jobs_built: Callable[[List[str]], None]
+    on_status: Callable[[str, str], None]  # job name, status
+    profile: bool
+    cancelled: bool
+
+    timer: SubmissionTimer
+    hosts: List[str]
+    host_to_pool: Dict[str, ConnectionPool]
+    pool: ConnectionPool  # of the first host, for the NAS listings
+    ledger: Ledger
+    done: Set[Tuple[str, str]]  # (sample, parameter_hash) already submitted to any of the hosts
+    nas_outputs: Set[str]
+    capacities: List[HostCapacity]
+    sizing: Optional[Sizing]
+    sized_parameters: Dict[str, str]
+    rows: List[Dict[str, Optional[str]]]  # the run table, read once
+    builder: BuildSubmissionCommands
+    skipped: List[str]
+    name_to_hash: Dict[str, str]  # jobs to submit, in order -> parameter hash
+    preflight_report: Optional[PreflightReport]
+    placement: Dict[str, str]  # job name -> host
+    submits: List[Submit]
+    results: List[SubmitResult]
+
+    def __init__(
+            self,
+            run_table: str,
+            parameters: Dict[str, Union[str, bool]],
+            ssh_password: str,
+            on_jobs_built: Optional[Callable[[List[str]], None]] = None,
+            on_status: Optional[Callable[[str, str], None]] = None,
+            profile: bool = False):
+        self.run_table = run_table
+        self.parameters = parameters.copy()
+        fill_default_parameters(self.parameters)
+        self.ssh_password = ssh_password
+        self.on_jobs_built = (lambda job_names: None) if on_jobs_built is None else on_jobs_built
+        self.on_status = (lambda job_name, status: None) if on_status is None else on_status
+        self.profile = profile
+        self.cancelled = False
+        self.host_to_pool = {}
+        self.submits = []
+        self.sizing = None
+        self.preflight_report = None
+
+    def cancel(self):
+        self.cancelled = True
+        for submit in self.submits:
+            submit.cancel()
+
+    def main(self) -> Tuple[str, bool]:
+        """
+        Returns the report and whether all jobs were submitted,
+        raises if the submission fails before any job is sent
+        """
+        self.set_timer()
+        success = False
+        try:
+            report, success = self.submit()
+        finally:
+            self.timer.finish(ok=success)
+        return f'{report}\n\n{self.timer.summary()}', success
+
+    def set_timer(self):
+        self.timer = SubmissionTimer(profile=self.profile)
+
+    def submit(self) -> Tuple[str, bool]:
+        self.validate()  # before connecting
+        self.set_hosts()
+        self.set_connection()
+        try:
+            self.set_ledger()
+            self.set_done()
+            self.auto_size()
+            self.build_submission_commands()
+            self.preflight()
+            if self.preflight_report is not None and not self.preflight_report.ok():
+                raise RuntimeError(self.preflight_report.summary())
+            if self.reserves_disk():  # for the jobs as they are built again to be sent
+                self.builder.sample_bytes = self.preflight_report.sample_bytes
+            self.place_jobs()
+        except Exception:
+            self.close()
+            raise
+
+        self.on_jobs_built(list(self.name_to_hash.keys()))
+
+        try:
+            self.submit_all()
+        finally:
+            self.close()
+
+        report = build_report(results=self.results, skipped=self.skipped)
+        if self.sizing is not None:
+            report = f'{report}\n\n{self.summarize_sizing()}'
+        if len(self.hosts) > 1:
+            report = f'{report}\n\n{self.summarize_placement()}'
+        if self.preflight_report is not None:
+            report = f'{report}\n\n{self.preflight_report.summary()}'
+        return report, all(r.success for r in self.results)
+
+    @timed_phase
+    def validate(self):
+        # the only read of the run table, every later phase works on its rows
+        try:
+            self.rows = list(iter_run_table(self.run_table))
+        except ValueError:
+            self.rows = None  # missing columns, reported by validate_submission()
+        validate_submission(parameters=self.parameters, run_table=self.run_table, rows=self.rows)
+
+    def set_hosts(self):
+        self.hosts = get_compute_hosts(self.parameters)
+
+    @timed_phase
+    def set_connection(self):
+        for host in self.hosts:
+            parameters = with_host(self.parameters, host)
+            self.host_to_pool[host] = ConnectionPool(
+                new_connection=lambda p=parameters: new_connection(parameters=p, ssh_password=self.ssh_password),
+                max_size=int(self.parameters['Submission Connections'])
+            )
+        self.pool = self.host_to_pool[self.hosts[0]]
+
+    @timed_phase
+    def set_ledger(self):
+        self.ledger = Ledger()
+
+    @timed_phase
+    def set_done(self):
+        self.done = set()
+        self.nas_outputs = set()
+        if not self.parameters['Resume Submission']:
+            return
+
+        self.done = set()
+        for host in self.hosts:
+            self.done |= self.ledger.get_submitted(host=host)
+
+        connection = self.pool.acquire()
+        try:
+            result = connection.run(build_list_nas_outputs_cmd(self.parameters), hide=True, warn=True)
+        finally:
+            self.pool.release(connection)
+        self.nas_outputs = set(line.strip().rstrip('/') for line in result.stdout.splitlines())
+
+    def is_done(self, job: Job) -> bool:
+        return (job.name, job.parameter_hash) in self.done or job.outdir.rstrip('/') in self.nas_outputs
+
+    @timed_phase
+    def auto_size(self):
+        if not self.parameters['Auto-size Threads']:
+            return
+
+        with ThreadPoolExecutor(max_workers=len(self.hosts)) as executor:
+            self.capacities = list(executor.map(self.probe_capacity, self.hosts))
+
+        # the same script runs on every host, so it is sized for the smallest one
+        smallest = min(self.capacities, key=lambda c: (c.cores, c.memory_gb))
+        n_jobs = len(self.rows)
+        self.sizing = SuggestSizing().main(
+            capacity=smallest,
+            memory_per_thread_gb=int(self.parameters['Memory per Thread (GB)']),
+            n_jobs=-(-n_jobs // len(self.hosts)))  # per host, rounded up
+        self.sized_parameters = get_sized_parameters(parameters=self.parameters, sizing=self.sizing)
+        self.parameters.update(self.sized_parameters)
+
+    def probe_capacity(self, host: str) -> HostCapacity:
+        pool = self.host_to_pool[host]
+        connection = pool.acquire()
+        try:
+            with connection.cd(COMPUTE_ROOT_DIR):
+                result = connection.run(build_capacity_cmd(), hide=True)
+            return parse_capacity(host=host, stdout=result.stdout)
+        finally:
+            pool.release(connection)
+
+    def summarize_sizing(self) -> str:
+        lines = [f'Auto-sized: {self.sizing.threads} threads per job, {self.sizing.concurrent_jobs} concurrent job(s) per host']
+        if self.parameters['Launch Mode'] == 'immediate':
+            lines.append('  (the immediate launch mode starts all jobs at once, the queue launch mode holds the rest)')
+        lines += [f'  {k}: {v}' for k, v in self.sized_parameters.items() if k.startswith('Queue')]
+        lines += [f'  {c.summary()}' for c in self.capacities]
+        return '\n'.join(lines)
+
+    @timed_phase
+    def build_submission_commands(self):
+        # only the names and hashes are kept, each job is built again from its row when it is sent
+        self.builder = BuildSubmissionCommands()
+        self.builder.prepare(
+            run_table=self.run_table,
+            parameters=self.parameters,
+            skip=self.is_done,
+            rows=self.rows)
+        self.name_to_hash = {job.name: job.parameter_hash for job in self.builder.iter_jobs()}
+        self.skipped = self.builder.skipped
+
+    @timed_phase
+    def preflight(self):
+        self.preflight_report = None
+        if not self.parameters['Pre-flight Check'] or len(self.name_to_hash) == 0:
+            return
+
+        rows = [row for row in self.rows if row['Output Name'] in self.name_to_hash]  # skipped jobs need no FASTQs
+
+        connection = self.pool.acquire()
+        try:
+            self.preflight_report = Preflight().main(
+                connection=connection,
+                run_table=rows,
+                parameters=self.parameters)
+        finally:
+            self.pool.release(connection)
+
+    def reserves_disk(self) -> bool:
+        return self.parameters['Launch Mode'] == 'queue' \
+            and int(self.parameters['Queue Max Disk (GB)']) > 0 \
+            and self.preflight_report is not None
+
+    @timed_phase
+    def place_jobs(self):
+        if len(self.hosts) == 1:
+            self.placement = {name: self.hosts[0] for name in self.name_to_hash}
+            return
+
+        with ThreadPoolExecutor(max_workers=len(self.hosts)) as executor:
+            probes = list(executor.map(self.probe, self.hosts))
+        reachable = [p for p in probes if p is not None]
+        if len(reachable) == 0:
+            raise RuntimeError(f'None of the compute hosts {self.hosts} could be probed')
+
+        self.placement = PlaceJobs().main(job_names=list(self.name_to_hash.keys()), probes=reachable)
+
+    def probe(self, host: str) -> Optional[HostProbe]:
+        pool = self.host_to_pool[host]
+        try:
+            connection = pool.acquire()
+        except Exception:
+            return None  # unreachable hosts get no jobs
+        try:
+            with connection.cd(COMPUTE_ROOT_DIR):
+                result = connection.run(build_probe_cmd(), hide=True)
+            return parse_probe(host=host, stdout=result.stdout)
+        except Exception:
+            return None
+        finally:
+            pool.release(connection)
+
+    @timed_phase
+    def submit_all(self):
+        submit_class = SubmitBatch if self.parameters['Submission Mode'] == 'batch' else SubmitJobs
+
+        host_to_names = {host: [] for host in self.hosts}
+        for name in self.name_to_hash:
+            host_to_names[self.placement[name]].append(name)
+
+        tasks = []
+        for host, names in host_to_names.items():
+            if len(names) == 0:
+                continue
+            batch = self.builder.build_batch(jobs=self.builder.iter_jobs(names=set(names)), job_names=names)
+            submit = submit_class(pool=self.host_to_pool[host], on_result=self.record_result, timer=self.timer)
+            self.submits.append(submit)
+            tasks.append((submit, batch))
+
+        if self.cancelled:
+            self.cancel()
+
+        with ThreadPoolExecutor(max_workers=max(len(tasks), 1)) as executor:
+            host_results = list(executor.map(lambda task: task[0].main(batch=task[1]), tasks))
+        self.results = [r for results in host_results for r in results]
+
+    def summarize_placement(self) -> str:
+        lines = ['Placement:']
+        for host in self.hosts:
+            n = sum(h == host for h in self.placement.values())
+            lines.append(f'  {host}: {n} job(s)')
+        return '\n'.join(lines)
+
+    def close(self):
+        for pool in self.host_to_pool.values():
+            pool.close()
+
+    def record_result(self, result: SubmitResult):
+        if result.success:
+            status, state = 'submitted', SUBMITTED
+        elif result.error == Submit.CANCELLED:
+            status, state = 'cancelled', CANCELLED
+        else:
+            status, state = f'failed: {result.error}', FAILED
+
+        self.ledger.record(
+            sample=result.job_name,
+            parameter_hash=self.name_to_hash[result.job_name],
+            host=self.placement[result.job_name],
+            batch_id=self.builder.batch_id,
+            state=state)
+
+        self.on_status(result.job_name, status)
+
+
+def new_connection(parameters: Dict[str, Union[str, bool]], ssh_password: str) -> 'fabric.Connection':
+    p = parameters
+    if is_local_executor(p):
+        from .executor import LocalConnection  # invoke is only loaded for the local executor
+        return LocalConnection()
+    return fabric.Connection(
+        host=p['Compute Public IP'],
+        user=p['Compute User'],
+        port=p['Compute Port'],
+        connect_kwargs={'password': ssh_password}
+    )
+
+
+def is_local_executor(parameters: Dict[str, Union[str, bool]]) -> bool:
+    return parameters.get('Executor', '') == LOCAL_EXECUTOR
+
+
+def put_file(connection: 'fabric.Connection', name: str, content: str):
+    connection.put(
+        io.BytesIO(content.encode('utf-8')),
+        remote=sftp_path(f'{COMPUTE_ROOT_DIR}/{name}'),
+        preserve_mode=False)
+
+
+def put_job_files(connection: 'fabric.Connection', job: Job):
+    put_file(connection=connection, name=job.script_file, content=job.get_script_content())
+    for name, content in job.files.items():
+        put_file(connection=connection, name=name, content=content)
+
+
+def sftp_path(path: str) -> str:
+    # SFTP does not expand '~', but relative paths are resolved from the home directory
+    return path[2:] if path.startswith('~/') else path
+
+
+def build_report(results: List[SubmitResult], skipped: Optional[List[str]] = None) -> str:
+    succeeded = [r for r in results if r.success]
+    failed = [r for r in results if not r.success]
+    skipped = [] if skipped is None else skipped
+
+    if len(failed) == 0:
+        lines = [f'All {len(results)} job(s) submitted!']
+    else:
+        lines = [f'{len(succeeded)} of {len(results)} job(s) submitted.']
+        if len(succeeded) > 0:
+            lines += ['', 'Succeeded:'] + [f'  {r.job_name}' for r in succeeded]
+        lines += ['', 'Failed:'] + [f'  {r.job_name}: {r.error}' for r in failed]
+
+    if len(skipped) > 0:
+        lines += ['', f'Skipped {len(skipped)} job(s) already submitted or present in the NAS destination:']
+        lines += [f'  {name}' for name in skipped]
+
+    return '\n'.join(lines)
@@ -0,0 +1,178 @@
+import os
+import sys
+import json
+import time
+import cProfile
+import functools
+import statistics
+import threading
+from datetime import datetime
+from contextlib import contextmanager
+from os.path import expanduser, dirname
+from typing import List, Dict, Tuple, Union, Callable, Optional
+from .lazy import LAZY_MODULES
+
+
+STARTUP_TIMING_FLAG = '--startup-timing'
+STARTUP_TIMING_ENV = 'SOMATIC_APP_STARTUP_TIMING'
+STARTUP_BUDGET_SECONDS = 1.5
+
+SUBMISSION_TIMING_LOG = '~/.somatic_app/submission_timing.jsonl'
+SUBMISSION_PROFILE_FLAG = '--submission-profile'
+SUBMISSION_PROFILE_ENV = 'SOMATIC_APP_SUBMISSION_PROFILE'
+
+
+def startup_timing_enabled() -> bool:
+    return STARTUP_TIMING_FLAG in sys.argv or os.environ.get(STARTUP_TIMING_ENV, '') not in ['', '0']
+
+
+def submission_profile_enabled() -> bool:
+    return SUBMISSION_PROFILE_FLAG in sys.argv or os.environ.get(SUBMISSION_PROFILE_ENV, '') not in ['', '0']
+
+
+class StartupTimer:
+    """
+    Time taken by each startup phase, from the import of the src package to the first event loop tick
+    """
+
+    start: float
+    last: float
+    phases: List[Tuple[str, float]]
+
+    def __init__(self, start: float):
+        self.start = start
+        self.last = start
+        self.phases = []
+
+    def mark(self, phase: str):
+        now = time.perf_counter()
+        self.phases.append((phase, now - self.last))
+        self.last = now
+
+    def report(self) -> str:
+        total = self.last - self.start
+        lines = ['Startup timing:']
+        lines += [f'  {phase:<28}{seconds * 1000:8.0f} ms' for phase, seconds in self.phases]
+        lines.append(f'  {"total":<28}{total * 1000:8.0f} ms')
+
+        if total > STARTUP_BUDGET_SECONDS:
+            lines.append(f'  OVER the budget of {STARTUP_BUDGET_SECONDS * 1000:.0f} ms')
+        else:
+            lines.append(f'  within the budget of {STARTUP_BUDGET_SECONDS * 1000:.0f} ms')
+
+        for m in LAZY_MODULES.values():
+            state = 'not loaded' if m.seconds is None else f'{m.seconds * 1000:.0f} ms'
+            lines.append(f'  lazy import {m.name:<16}{state:>12}')
+
+        return '\n'.join(lines)
+
+    def print_report(self):
+        print(self.report(), flush=True)
+
+
+class SubmissionTimer:
+    """
+    Time taken by each phase of a submission and by each job sent, appended as JSON lines to a log file,
+    optionally with a cProfile capture of the submitting thread
+    """
+
+    file: Optional[str]  # None to keep the records in memory only
+    profile: Optional[cProfile.Profile]
+
+    session: str
+    start: float
+    end: Optional[float]
+    lock: threading.Lock
+    records: List[Dict[str, Union[str, float, bool]]]
+    profile_file: Optional[str]
+
+    def __init__(self, file: Optional[str] = SUBMISSION_TIMING_LOG, profile: bool = False):
+        self.file = None if file is None else expanduser(file)
+        self.profile = cProfile.Profile() if profile else None
+
+        self.session = datetime.now().strftime('%Y%m%d_%H%M%S_%f')
+        self.start = time.perf_counter()
+        self.end = None
+        self.lock = threading.Lock()
+        self.records = []
+        self.profile_file = None
+
+        if self.file is not None:
+            os.makedirs(dirname(self.file) or '.', exist_ok=True)
+        if self.profile is not None:
+            self.profile.enable()  # the worker threads are covered by their job records instead
+
+    @contextmanager
+    def phase(self, name: str):
+        start = time.perf_counter()
+        ok = False
+        try:
+            yield
+            ok = True
+        finally:
+            self.record(event='phase', name=name, seconds=time.perf_counter() - start, ok=ok)
+
+    def record(self, event: str, name: str, seconds: float, ok: bool):
+        record = {
+            'session': self.session,
+            'event': event,
+            'name': name,
+            'seconds': round(seconds, 6),
+            'ok': ok,
+            'thread': threading.current_thread().name,
+        }
+        with self.lock:  # jobs are recorded from the submission threads
+            self.records.append(record)
+            if self.file is not None:
+                with open(self.file, 'a') as fh:
+                    fh.write(json.dumps(record) + '\n')
+
+    def finish(self, ok: bool):
+        if self.profile is not None:
+            self.profile.disable()
+            self.profile_file = f'{dirname(self.file or expanduser(SUBMISSION_TIMING_LOG))}/submission_{self.session}.prof'
+            self.profile.dump_stats(self.profile_file)
+        self.end = time.perf_counter()
+        self.record(event='total', name='submission', seconds=self.end - self.start, ok=ok)
+
+    def summary(self) -> str:
+        phase_to_seconds = {}
+        phase_to_count = {}
+        for r in self.records:
+            if r['event'] == 'phase':
+                phase_to_seconds[r['name']] = phase_to_seconds.get(r['name'], 0) + r['seconds']
+                phase_to_count[r['name']] = phase_to_count.get(r['name'], 0) + 1
+
+        lines = ['Timing:']
+        for name, seconds in phase_to_seconds.items():
+            count = phase_to_count[name]
+            label = name if count == 1 else f'{name} x{count}'
+            lines.append(f'  {label:<28}{seconds * 1000:8.0f} ms')
+
+        jobs = [r for r in self.records if r['event'] == 'job']
+        if len(jobs) > 0:
+            median = statistics.median(r['seconds'] for r in jobs)
+            slowest = max(jobs, key=lambda r: r['seconds'])
+            lines.append(
+                f'  {len(jobs)} job(s) sent, median {median * 1000:.0f} ms, '
+                f'slowest {slowest["seconds"] * 1000:.0f} ms ({slowest["name"]})')
+
+        end = time.perf_counter() if self.end is None else self.end
+        lines.append(f'  {"total":<28}{(end - self.start) * 1000:8.0f} ms')
+        if self.file is not None:
+            lines.append(f'  log: {self.file}')
+        if self.profile_file is not None:
+            lines.append(f'  profile: {self.profile_file}')
+
+        return '\n'.join(lines)
+
+
+def timed_phase(method: Callable) -> Callable:
+    """
+    Records each call of a method as a phase of the `timer` of its instance
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self.timer.phase(method.__name__):
+            return method(self, *args, **kwargs)
+    return wrapper
@@ -0,0 +1,160 @@
+import re
+from typing import List, Dict, Set, Union, Optional
+from .model import PARAMETER_SCHEMA, iter_run_table, get_nas_dstdir, get_output_manifest, get_transfer_profile, \
+    fill_default_parameters
+from .hosts import get_compute_hosts
+from .preflight import FASTQ_COLUMNS
+
+
+MAX_LISTED_ERRORS = 20
+UNSAFE_CHARS = re.compile(r"'")  # ends the single quotes around every value in the generated commands
+# where a value is split on whitespace or has its quotes interpreted: the output name (screen sessions,
+#   queue job files, status parsing), FASTQ names read by xargs -I, and find patterns of the output manifest
+UNQUOTED_UNSAFE_CHARS = re.compile(r'[\'"`$\\\s]')
+
+
+def validate_parameters(parameters: Dict[str, Union[str, int, bool]]) -> List[str]:
+    """
+    Returns one message per invalid parameter, absent parameters take their (valid) defaults
+    """
+    errors = []
+    for key, value in parameters.items():
+        field = PARAMETER_SCHEMA.get(key, None)
+        if field is None:
+            continue
+        try:
+            field.parse(value)
+        except ValueError as e:
+            errors.append(str(e))
+
+    if parameters.get('FASTQ Input', '') == 'streamed' and int_or_zero(parameters.get('FASTQ Cache Size (GB)', 0)) > 0:
+        errors.append("'FASTQ Input' streamed keeps no local copy to cache, set 'FASTQ Cache Size (GB)' to 0")
+
+    if 'Output Manifest' in parameters:
+        for pattern in get_output_manifest(parameters):
+            if UNQUOTED_UNSAFE_CHARS.search(pattern):
+                errors.append(f"'Output Manifest' has a path with quotes, '$', '\\' or whitespace: '{pattern}'")
+
+    if 'NAS Destination Directory' in parameters:
+        try:
+            get_nas_dstdir(parameters)
+        except ValueError as e:
+            errors.append(str(e))
+
+    if int_or_zero(parameters.get('Queue Max Disk (GB)', 0)) > 0 and not parameters.get('Pre-flight Check', True):
+        errors.append("'Queue Max Disk (GB)' needs the 'Pre-flight Check' to know the FASTQ sizes")
+
+    if int_or_zero(parameters.get('Queue Max Disk (GB)', 0)) > 0 and parameters.get('Launch Mode', 'queue') != 'queue':
+        errors.append("'Queue Max Disk (GB)' only applies to the 'queue' launch mode, set it to 0 or use the queue")
+
+    if 'Compute Public IP' in parameters:
+        for host in get_compute_hosts(parameters):
+            ip, _, port = host.partition(':')
+            if ip == '' or (port != '' and not port.isdigit()):
+                errors.append(f"'Compute Host Pool' has an invalid host '{host}', should be 'IP' or 'IP:PORT'")
+
+    return errors
+
+
+class ValidateRunTable:
+    """
+    Checks every row of the run table for what would only fail on the compute node, hours into a job
+    """
+
+    run_table: str
+    parameters: Dict[str, Union[str, int, bool]]
+    rows: Optional[List[Dict[str, Optional[str]]]]  # the run table if already read
+
+    xargs_columns: List[str]
+    errors: List[str]
+    output_names: Set[str]
+
+    def main(
+            self,
+            run_table: str,
+            parameters: Optional[Dict[str, Union[str, int, bool]]] = None,
+            rows: Optional[List[Dict[str, Optional[str]]]] = None) -> List[str]:
+
+        self.run_table = run_table
+        self.parameters = {} if parameters is None else parameters.copy()
+        self.rows = rows
+        fill_default_parameters(self.parameters)
+
+        self.set_xargs_columns()
+        self.errors = []
+        self.output_names = set()
+        try:
+            rows = iter_run_table(self.run_table) if self.rows is None else self.rows
+            for i, row in enumerate(rows):
+                self.check_row(row=row, line=i + 2)  # 1-based, after the header
+        except ValueError as e:
+            self.errors.append(str(e))
+
+        return self.errors
+
+    def set_xargs_columns(self):
+        # FASTQs downloaded in several streams are fed to xargs -I, which strips blanks and interprets quotes
+        try:
+            streams = get_transfer_profile(self.parameters).streams
+        except ValueError:
+            streams = 1  # an invalid transfer profile is reported by validate_parameters()
+        uses_xargs = streams > 1 and self.parameters['FASTQ Input'] != 'streamed'
+        self.xargs_columns = FASTQ_COLUMNS if uses_xargs else []
+
+    def check_row(self, row: Dict[str, Optional[str]], line: int):
+        name = row['Output Name']
+        where = f'Run table line {line}' if name is None else f'Run table line {line} ({name})'
+
+        for column in ['Output Name', 'Sequencing Batch ID', 'Tumor Fastq R1', 'Tumor Fastq R2']:
+            if row[column] is None:
+                self.errors.append(f"{where}: '{column}' is empty")
+
+        if (row['Normal Fastq R1'] is None) != (row['Normal Fastq R2'] is None):
+            self.errors.append(f"{where}: 'Normal Fastq R1' and 'Normal Fastq R2' should be given together")
+
+        for column, value in row.items():
+            if value is None:
+                continue
+            if column == 'Output Name' or column in self.xargs_columns:
+                if UNQUOTED_UNSAFE_CHARS.search(value):
+                    self.errors.append(f"{where}: '{column}' contains quotes, '$', '\\' or whitespace: '{value}'")
+            elif UNSAFE_CHARS.search(value):
+                self.errors.append(f"{where}: '{column}' contains a single quote: '{value}'")
+
+        if name is None:
+            return
+        outdir = name.rstrip('/')
+        if '/' in outdir or outdir in ['', '.', '..']:
+            self.errors.append(f"{where}: 'Output Name' should be a plain directory name")
+        if outdir in self.output_names:
+            self.errors.append(f"{where}: 'Output Name' is duplicated")
+        self.output_names.add(outdir)
+
+
+def validate_submission(
+        parameters: Dict[str, Union[str, int, bool]],
+        run_table: str,
+        rows: Optional[List[Dict[str, Optional[str]]]] = None):
+    """
+    Raises ValueError listing every invalid parameter and run table row,
+    the rows are those of the run table if already read
+    """
+    errors = validate_parameters(parameters) + ValidateRunTable().main(
+        run_table=run_table, parameters=parameters, rows=rows)
+    if len(errors) > 0:
+        raise ValueError(summarize_errors(errors))
+
+
+def int_or_zero(value: Union[str, int, bool]) -> int:
+    # an invalid value is already reported by its field
+    try:
+        return int(value)
+    except ValueError:
+        return 0
+
+
+def summarize_errors(errors: List[str]) -> str:
+    lines = [f'{len(errors)} problem(s) found, nothing was submitted:'] + [f'  {e}' for e in errors[:MAX_LISTED_ERRORS]]
+    if len(errors) > MAX_LISTED_ERRORS:
+        lines.append(f'  ... and {len(errors) - MAX_LISTED_ERRORS} more')
+    return '\n'.join(lines)
@@ -4,8 +4,9 @@ from PyQt5.QtCore import Qt
 from PyQt5.QtGui import QIcon
 from PyQt5.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QLabel, QComboBox, \
     QPushButton, QScrollArea, QCheckBox, QMessageBox, QFileDialog, QDialog, QFormLayout, \
-    QLineEdit, QDialogButtonBox
-from .model import DEFAULT_COMPUTE_PARAMETERS, DEFAULT_NAS_PARAMETERS, DEFAULT_PIPELINE_PARAMETERS
+    QLineEdit, QDialogButtonBox, QProgressBar, QListWidget, QListWidgetItem, QTableWidget, QTableWidgetItem, \
+    QHeaderView
+from .model import DEFAULT_COMPUTE_PARAMETERS, DEFAULT_NAS_PARAMETERS, DEFAULT_PIPELINE_PARAMETERS, PARAMETER_SCHEMA
 
 
 COMPUTE_TITLE = 'COMPUTE'
@@ -15,6 +16,10 @@ BUTTON_KEY_TO_LABEL = {
     'load_parameters': 'Load Parameters',
     'save_parameters': 'Save Parameters',
     'submit_jobs': 'Submit Jobs',
+    'cancel_submission': 'Cancel Submission',
+    'queue_status': 'Queue Status',
+    'job_status': 'Job Status',
+    'probe_capacity': 'Probe Capacity',
 }
 
 
@@ -45,6 +50,7 @@ class View(QWidget):
     TITLE = 'Somatic App'
     ICON_PNG = 'icon/logo.ico'
     WIDTH, HEIGHT = 800, 1000
+    STATUS_LIST_HEIGHT = 150
 
     title_to_edits: Dict[str, List[Edit]]
     buttons: List[Button]
@@ -53,6 +59,9 @@ class View(QWidget):
     button_layout: QHBoxLayout
     scroll_area: QScrollArea
     scroll_contents: QWidget
+    progress_bar: QProgressBar
+    status_list: QListWidget
+    job_name_to_item: Dict[str, QListWidgetItem]
     main_layout: QVBoxLayout
 
     def __init__(self):
@@ -67,6 +76,7 @@ class View(QWidget):
         self.__init_question_layout()
         self.__init_button_layout()
         self.__init_scroll_area_and_contents()
+        self.__init_progress()
         self.__init_main_layout()
         self.__init_methods()
 
@@ -81,7 +91,7 @@ class View(QWidget):
             for key, values in default_parameters.items():
                 qlabel = QLabel(f'{key}:', self)
 
-                if type(values) is bool:
+                if PARAMETER_SCHEMA[key].dtype is bool:
                     qedit = QCheckBox(self)
                     qedit.setChecked(values)
                 else:
@@ -129,9 +139,18 @@ class View(QWidget):
         self.scroll_area.setWidget(self.scroll_contents)  # set the scroll_area's widget to be scroll_contents
         self.scroll_area.setWidgetResizable(True)
 
+    def __init_progress(self):
+        self.progress_bar = QProgressBar(self)
+        self.progress_bar.setValue(0)
+        self.status_list = QListWidget(self)
+        self.status_list.setMaximumHeight(self.STATUS_LIST_HEIGHT)
+        self.job_name_to_item = {}
+
     def __init_main_layout(self):
         self.main_layout = QVBoxLayout()
         self.main_layout.addWidget(self.scroll_area)  # add scroll_area to the main_layout
+        self.main_layout.addWidget(self.progress_bar)
+        self.main_layout.addWidget(self.status_list)
         self.setLayout(self.main_layout)
 
     def __init_methods(self):
@@ -141,6 +160,7 @@ class View(QWidget):
         self.file_dialog_open = FileDialogOpen(self)
         self.file_dialog_save = FileDialogSave(self)
         self.password_dialog = PasswordDialog(self)
+        self.status_dialog = StatusDialog(self)
 
     def get_parameters(self) -> Dict[str, Union[str, bool]]:
         ret = {}
@@ -177,6 +197,33 @@ class View(QWidget):
                 elif type(q) is QCheckBox:
                     q.setChecked(True)  # when the key if present, the flag should be True
 
+    def set_parameter(self, key: str, val: str):
+        for edits in self.title_to_edits.values():
+            for edit in edits:
+                if edit.key == key and type(edit.qedit) is QComboBox:
+                    edit.qedit.setCurrentText(val)
+
+    def start_progress(self, job_names: List[str]):
+        # an empty list sets the range to (0, 0), which shows a busy indicator
+        self.status_list.clear()
+        self.job_name_to_item = {}
+        for name in job_names:
+            self.job_name_to_item[name] = QListWidgetItem(f'{name}: pending', self.status_list)
+        self.progress_bar.setRange(0, len(job_names))
+        self.progress_bar.setValue(0)
+
+    def update_progress(self, job_name: str, status: str):
+        item = self.job_name_to_item.get(job_name)
+        if item is not None:
+            item.setText(f'{job_name}: {status}')
+        self.progress_bar.setValue(self.progress_bar.value() + 1)
+
+    def stop_progress(self):
+        # leave the busy indicator, when the submission ends before any job is built
+        if self.progress_bar.maximum() == 0:
+            self.progress_bar.setRange(0, 1)
+            self.progress_bar.setValue(0)
+
 
 #
 
@@ -321,3 +368,64 @@ class PasswordDialog:
             return self.line_edit.text()
         else:
             return ''
+
+
+#
+
+
+class StatusDialog:
+
+    TITLE = 'Job Status'
+    COLUMNS = ['Sample', 'State', 'Size', 'Progress']
+    WIDTH, HEIGHT = 1000, 600
+
+    parent: QWidget
+
+    dialog: QDialog
+    layout: QVBoxLayout
+    summary: QLabel
+    table: QTableWidget
+
+    def __init__(self, parent: QWidget):
+        self.parent = parent
+        self.__init_dialog()
+        self.__init_layout()
+        self.__init_summary()
+        self.__init_table()
+
+    def __init_dialog(self):
+        self.dialog = QDialog(parent=self.parent)
+        self.dialog.setWindowTitle(self.TITLE)
+        self.dialog.resize(self.WIDTH, self.HEIGHT)
+
+    def __init_layout(self):
+        self.layout = QVBoxLayout(self.dialog)
+
+    def __init_summary(self):
+        self.summary = QLabel('', parent=self.dialog)
+        self.layout.addWidget(self.summary)
+
+    def __init_table(self):
+        self.table = QTableWidget(0, len(self.COLUMNS), parent=self.dialog)
+        self.table.setHorizontalHeaderLabels(self.COLUMNS)
+        self.table.horizontalHeader().setSectionResizeMode(len(self.COLUMNS) - 1, QHeaderView.Stretch)
+        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.layout.addWidget(self.table)
+
+    def open(self):
+        # not modal, the main window stays usable while the status is polled
+        self.summary.setText('Polling...')
+        self.table.setRowCount(0)
+        self.dialog.show()
+
+    def set_rows(self, rows: List[List[str]], summary: str):
+        self.summary.setText(summary)
+        self.table.setRowCount(len(rows))
+        for r, row in enumerate(rows):
+            for c, text in enumerate(row):
+                item = QTableWidgetItem(text)
+                item.setToolTip(text)
+                self.table.setItem(r, c, item)
+
+    def set_error(self, msg: str):
+        self.summary.setText(f'Error: {msg}')
@@ -0,0 +1,42 @@
+import io
+import sys
+import subprocess
+from contextlib import redirect_stdout
+from src.cli import EntryPoint, read_parameters
+from .setup import TestCase
+
+
+class TestCli(TestCase):
+
+    def setUp(self):
+        self.set_up(py_path=__file__)
+        self.parameters_file = f'{self.workdir}/parameters.txt'
+        with open(self.parameters_file, 'w') as fh:
+            fh.write('NAS User: me\nthreads: 8\ndiscard-bam\n')
+
+    def tearDown(self):
+        self.tear_down()
+
+    def test_read_parameters(self):
+        parameters = read_parameters(self.parameters_file)
+        self.assertEqual('8', parameters['threads'])
+        self.assertTrue(parameters['discard-bam'])
+        self.assertFalse(parameters['Pre-flight Check'])  # absent flags are unchecked, as in the GUI
+
+    def test_dry_run(self):
+        stdout = io.StringIO()
+        with redirect_stdout(stdout):
+            exit_code = EntryPoint().main([
+                '--parameters', self.parameters_file,
+                '--run-table', 'test/test_model/run_table_tumor_only.csv',
+                '--dry-run',
+            ])
+        self.assertEqual(0, exit_code)
+        self.assertIn("me@255.255.255.255:'/NGS1070824/VGH01_T_R1.fastq.gz'", stdout.getvalue())
+        self.assertIn('--threads=8', stdout.getvalue())
+
+    def test_qt_not_imported(self):
+        stdout = subprocess.check_output(
+            [sys.executable, '-c', 'import sys, src.cli; print("PyQt5" in sys.modules)'],
+            text=True)
+        self.assertEqual('False', stdout.strip())
@@ -0,0 +1,37 @@
+import io
+import os
+from src.executor import LocalConnection
+from src.submit import new_connection
+from .setup import TestCase
+
+
+class TestLocalConnection(TestCase):
+
+    def setUp(self):
+        self.set_up(py_path=__file__)
+
+    def tearDown(self):
+        self.tear_down()
+
+    def test_cd_prefix_run(self):
+        workdir = os.path.abspath(self.workdir)
+        with open(f'{workdir}/.profile', 'w') as fh:
+            fh.write('export GREETING=hello\n')
+
+        with LocalConnection() as connection:
+            with connection.cd(workdir):
+                with connection.prefix('source .profile'):
+                    result = connection.run('echo "$GREETING" > out.txt && cat out.txt', hide=True)
+            failed = connection.run('exit 3', hide=True, warn=True)
+
+        self.assertEqual('hello\n', result.stdout)
+        self.assertEqual(3, failed.return_code)
+
+    def test_put(self):
+        remote = os.path.abspath(f'{self.workdir}/uploaded.txt')
+        LocalConnection().put(io.BytesIO(b'content'), remote=remote, preserve_mode=False)
+        with open(remote) as fh:
+            self.assertEqual('content', fh.read())
+
+    def test_new_connection(self):
+        self.assertIsInstance(new_connection(parameters={'Executor': 'local'}, ssh_password=''), LocalConnection)
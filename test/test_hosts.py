@@ -0,0 +1,68 @@
+from src.hosts import PlaceJobs, SuggestSizing, get_compute_hosts, with_host, parse_probe, parse_capacity, \
+    get_sized_parameters
+from .setup import TestCase
+
+
+class TestHosts(TestCase):
+
+    def test_get_compute_hosts(self):
+        parameters = {'Compute Public IP': '10.0.0.1', 'Compute Host Pool': ''}
+        self.assertEqual(['10.0.0.1'], get_compute_hosts(parameters))
+
+        parameters['Compute Host Pool'] = '10.0.0.2, 10.0.0.3:2222,10.0.0.2'
+        self.assertEqual(['10.0.0.2', '10.0.0.3:2222'], get_compute_hosts(parameters))
+
+    def test_with_host(self):
+        parameters = {'Compute Public IP': '10.0.0.1', 'Compute Port': '22'}
+        self.assertEqual({'Compute Public IP': '10.0.0.3', 'Compute Port': '2222'}, with_host(parameters, '10.0.0.3:2222'))
+        self.assertEqual({'Compute Public IP': '10.0.0.2', 'Compute Port': '22'}, with_host(parameters, '10.0.0.2'))
+
+    def test_place_jobs(self):
+        job_names = [f'S{i}' for i in range(12)]
+        probes = [
+            parse_probe(host='big', stdout='32 0.00 0\n'),
+            parse_probe(host='small', stdout='16 0.00 0\n'),
+            parse_probe(host='busy', stdout='16 15.80 4\n'),
+        ]
+        placement = PlaceJobs().main(job_names=job_names, probes=probes)
+
+        counts = {host: list(placement.values()).count(host) for host in ['big', 'small', 'busy']}
+        self.assertEqual({'big': 8, 'small': 4, 'busy': 0}, counts)
+
+    def test_parse_capacity(self):
+        capacity = parse_capacity(host='10.0.0.1', stdout='64 251 240 1830\n')
+        self.assertEqual(
+            (64, 251, 240, 1830),
+            (capacity.cores, capacity.memory_gb, capacity.available_memory_gb, capacity.disk_free_gb))
+
+    def test_suggest_sizing(self):
+        capacity = parse_capacity(host='big', stdout='64 512 500 1000')
+
+        sizing = SuggestSizing().main(capacity=capacity, memory_per_thread_gb=8)
+        self.assertEqual((4, 16), (sizing.threads, sizing.concurrent_jobs))
+        self.assertEqual((64, 900), (sizing.max_cores, sizing.max_disk_gb))
+
+        sizing = SuggestSizing().main(capacity=capacity, memory_per_thread_gb=8, n_jobs=2)
+        self.assertEqual((16, 2), (sizing.threads, sizing.concurrent_jobs))
+
+    def test_suggest_sizing_memory_bound(self):
+        capacity = parse_capacity(host='small', stdout='64 128 120 1000')
+        sizing = SuggestSizing().main(capacity=capacity, memory_per_thread_gb=8)
+        self.assertEqual((4, 4), (sizing.threads, sizing.concurrent_jobs))  # 16 threads in all fit in 128 GB
+
+    def test_get_sized_parameters(self):
+        capacity = parse_capacity(host='big', stdout='64 512 500 1000')
+        sizing = SuggestSizing().main(capacity=capacity, memory_per_thread_gb=8)
+
+        parameters = {'Launch Mode': 'immediate', 'Pre-flight Check': True}
+        self.assertEqual({'threads': '4'}, get_sized_parameters(parameters=parameters, sizing=sizing))
+
+        parameters['Launch Mode'] = 'queue'
+        self.assertEqual(
+            {'threads': '4', 'Queue Max Cores': '64', 'Queue Max Disk (GB)': '900'},
+            get_sized_parameters(parameters=parameters, sizing=sizing))
+
+        parameters['Pre-flight Check'] = False  # nothing to reserve without the FASTQ sizes
+        self.assertEqual(
+            {'threads': '4', 'Queue Max Cores': '64'},
+            get_sized_parameters(parameters=parameters, sizing=sizing))
@@ -59,3 +59,12 @@ class TestIO(TestCase):
             f'{self.outdir}/written.csv',
             f'{self.indir}/written.csv'
         )
+
+    def test_read_empty_value_of_known_field(self):
+        file = f'{self.workdir}/parameters.txt'
+        with open(file, 'w') as fh:
+            fh.write('Transfer Streams: \ndiscard-bam\nskip-otu\n')
+        actual = IO().read(file)
+        self.assertEqual('', actual['Transfer Streams'])
+        self.assertEqual(True, actual['discard-bam'])
+        self.assertEqual(True, actual['skip-otu'])
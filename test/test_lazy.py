@@ -0,0 +1,23 @@
+import sys
+import subprocess
+from src.lazy import lazy_import, load
+from .setup import TestCase
+
+
+class TestLazyImport(TestCase):
+
+    def test_main(self):
+        json = lazy_import('json')
+        self.assertIs(json, lazy_import('json'))
+        self.assertEqual('[1]', json.dumps([1]))
+        self.assertIsNotNone(json.seconds)
+
+    def test_load(self):
+        csv = lazy_import('csv')
+        self.assertIs(sys.modules['csv'], load(csv))
+        self.assertIsNotNone(csv.seconds)
+
+    def test_heavy_modules_not_imported(self):
+        code = 'import sys, src.view, src.controller; print("pandas" in sys.modules, "fabric" in sys.modules)'
+        stdout = subprocess.check_output([sys.executable, '-c', code], text=True)
+        self.assertEqual('False False', stdout.strip())
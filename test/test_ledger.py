@@ -0,0 +1,35 @@
+from src.ledger import Ledger, SUBMITTED, FAILED
+from .setup import TestCase
+
+
+class TestLedger(TestCase):
+
+    def setUp(self):
+        self.set_up(py_path=__file__)
+
+    def tearDown(self):
+        self.tear_down()
+
+    def test_get_submitted(self):
+        ledger = Ledger(file=f'{self.workdir}/ledger.sqlite')
+        ledger.record(sample='S1', parameter_hash='H1', host='10.0.0.1', batch_id='B1', state=SUBMITTED)
+        ledger.record(sample='S2', parameter_hash='H2', host='10.0.0.1', batch_id='B1', state=FAILED)
+        ledger.record(sample='S3', parameter_hash='H3', host='10.0.0.2', batch_id='B2', state=SUBMITTED)
+
+        self.assertEqual({('S1', 'H1')}, ledger.get_submitted(host='10.0.0.1'))
+
+    def test_persistent(self):
+        file = f'{self.workdir}/ledger.sqlite'
+        Ledger(file=file).record(sample='S1', parameter_hash='H1', host='10.0.0.1', batch_id='B1', state=FAILED)
+        Ledger(file=file).record(sample='S1', parameter_hash='H1', host='10.0.0.1', batch_id='B2', state=SUBMITTED)
+
+        history = Ledger(file=file).get_history(sample='S1')
+        self.assertEqual([('B1', FAILED), ('B2', SUBMITTED)], [(h[2], h[4]) for h in history])
+
+    def test_get_hosts(self):
+        ledger = Ledger(file=f'{self.workdir}/ledger.sqlite')
+        ledger.record(sample='S1', parameter_hash='H1', host='10.0.0.1', batch_id='B1', state=SUBMITTED)
+        ledger.record(sample='S1', parameter_hash='H1', host='10.0.0.2', batch_id='B2', state=SUBMITTED)
+        ledger.record(sample='S2', parameter_hash='H2', host='10.0.0.1', batch_id='B2', state=FAILED)
+
+        self.assertEqual({'S1': '10.0.0.2'}, ledger.get_hosts())
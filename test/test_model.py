@@ -1,5 +1,14 @@
+import io
+import os
+import hashlib
+import subprocess
+import tarfile
 import pandas as pd
-from src.model import BuildSubmissionCommands, BuildExecutionScript, build_submit_cmd, is_subdir
+from src.scripts import FASTQ_CACHE, FASTQ_CACHE_SH
+from src.model import Job, Batch, BuildSubmissionCommands, BuildExecutionScript, BuildBatchArchive, PipelineTemplate, \
+    BuildCheckpoints, \
+    build_submit_cmd, build_batch_launch_cmd, build_enqueue_cmd, build_list_nas_outputs_cmd, parse_queue_status, \
+    parse_launch_statuses, is_subdir, iter_run_table, estimate_disk_gb
 from .setup import TestCase
 
 
@@ -32,8 +41,79 @@ class TestBuildSubmissionCommands(TestCase):
         )
 
 
+    def test_queue_launch_mode(self):
+        builder = BuildSubmissionCommands()
+        commands = builder.main(
+            run_table=f'{self.indir}/run_table_tumor_only.csv',
+            parameters={
+                'Launch Mode': 'queue',
+                'threads': '8',
+                'Memory per Thread (GB)': '4',
+            }
+        )
+        self.assertNotIn('screen -S VGH01_T', commands[0])
+        self.assertIn(f"echo 'VGH01_T 8 32 VGH01_T' > 'queue/pending/{builder.batch_id}_000000.job'", commands[0])
+        self.assertEqual(['queue/scheduler.sh'], list(builder.batch.files.keys()))
+        self.assertEqual(1, len(builder.batch.setup_cmds))
+
+    def test_skip(self):
+        builder = BuildSubmissionCommands()
+        commands = builder.main(
+            run_table=f'{self.indir}/run_table_tumor_only.csv',
+            parameters={},
+            skip=lambda job: job.name in ['VGH01_T', 'YMUH011_T']
+        )
+        self.assertEqual(['VGH01_T', 'YMUH011_T'], builder.skipped)
+        self.assertEqual(len(commands), len(builder.batch.jobs))
+        self.assertNotIn('VGH01_T', [job.name for job in builder.batch.jobs])
+
+    def test_iter_jobs_of_given_names(self):
+        builder = BuildSubmissionCommands()
+        builder.prepare(
+            run_table=f'{self.indir}/run_table_tumor_only.csv',
+            parameters={'Launch Mode': 'queue'},
+            rows=list(iter_run_table(f'{self.indir}/run_table_tumor_only.csv')))
+
+        jobs = list(builder.iter_jobs(names={'YMUH011_T'}))
+
+        self.assertEqual(['YMUH011_T'], [job.name for job in jobs])
+        self.assertIn(f'{builder.batch_id}_000001.job', jobs[0].command)  # keeps its place in the queue order
+
+    def test_pipelined_launch_mode(self):
+        builder = BuildSubmissionCommands()
+        commands = builder.main(
+            run_table=f'{self.indir}/run_table_tumor_only.csv',
+            parameters={
+                'Launch Mode': 'pipelined',
+                'Pipelined Look-ahead': '2',
+            }
+        )
+        files = builder.batch.files
+        job_files = builder.jobs[0].files
+
+        self.assertNotIn('screen -S VGH01_T', commands[0])
+        self.assertEqual(['VGH01_T/stage_in.sh', 'VGH01_T/compute.sh', 'VGH01_T/stage_out.sh'], list(job_files.keys()))
+        self.assertTrue(job_files['VGH01_T/compute.sh'].startswith('python somatic_pipeline-1.0.0 main'))
+        self.assertEqual(
+            'VGH01_T\nYMUH011_T\n',
+            files[f'batches/{builder.batch_id}/samples.txt'][:len('VGH01_T\nYMUH011_T\n')]
+        )
+        self.assertEqual(
+            [f'screen -S somatic_app_{builder.batch_id} -dm bash bin/pipelined.sh "batches/{builder.batch_id}/samples.txt" 2'],
+            builder.batch.setup_cmds
+        )
+        self.assertTrue(builder.batch.launched_by_setup)
+        self.assertEqual([f'screen -S somatic_app_{builder.batch_id} -X quit'], builder.batch.cancel_cmds)
+
+
 class TestBuildExecutionScript(TestCase):
 
+    def setUp(self):
+        self.set_up(py_path=__file__)
+
+    def tearDown(self):
+        self.tear_down()
+
     def test_tn_paired(self):
         parameters = {
             'NAS User': 'me',
@@ -215,6 +295,228 @@ rm './fastq/TUMOR_R1.fastq.gz'   &&   \\
 rm './fastq/TUMOR_R2.fastq.gz'"""
         self.assertEqual(expected, actual)
 
+    def test_fastq_cache(self):
+        parameters = {
+            'NAS User': 'me',
+            'FASTQ Cache Size (GB)': '500',
+        }
+        sample_row = pd.Series({
+            'Sequencing Batch ID': 'SEQUENCING_BATCH_ID',
+            'Tumor Fastq R1': 'TUMOR_R1.fastq.gz',
+            'Tumor Fastq R2': 'TUMOR_R2.fastq.gz',
+            'Output Name': 'OUTPUT_NAME',
+        })
+        actual = BuildExecutionScript().main(parameters=parameters, sample_row=sample_row).split('   &&   \\\n')
+
+        self.assertEqual(
+            "bash bin/fastq_cache.sh acquire 'OUTPUT_NAME' 'SEQUENCING_BATCH_ID/TUMOR_R1.fastq.gz' "
+            "rsync -avz -e 'ssh -p 22' me@255.255.255.255:'/SEQUENCING_BATCH_ID/TUMOR_R1.fastq.gz' "
+            "'./fastq/SEQUENCING_BATCH_ID/TUMOR_R1.fastq.gz' "
+            "2>&1 >> 'OUTPUT_NAME/progress.txt'",
+            actual[0]
+        )
+        self.assertIn("--tumor-fq1='./fastq/SEQUENCING_BATCH_ID/TUMOR_R1.fastq.gz'", actual[2])
+        self.assertEqual(
+            [
+                "rm -r 'OUTPUT_NAME'",
+                "bash bin/fastq_cache.sh release 'OUTPUT_NAME' 'SEQUENCING_BATCH_ID/TUMOR_R1.fastq.gz'",
+                "bash bin/fastq_cache.sh release 'OUTPUT_NAME' 'SEQUENCING_BATCH_ID/TUMOR_R2.fastq.gz'",
+            ],
+            actual[-3:]
+        )
+
+    def test_fastq_cache_keyed_by_sequencing_batch(self):
+        os.makedirs(f'{self.workdir}/bin')
+        with open(f'{self.workdir}/{FASTQ_CACHE_SH}', 'w') as fh:
+            fh.write(FASTQ_CACHE)
+
+        def acquire(holder: str, key: str, reads: str) -> str:
+            download = f"echo {reads} > 'fastq/{key}'"
+            subprocess.run(['bash', FASTQ_CACHE_SH, 'acquire', holder, key, 'bash', '-c', download],
+                           cwd=self.workdir, check=True)
+            with open(f'{self.workdir}/fastq/{key}') as fh:
+                return fh.read().strip()
+
+        self.assertEqual('old', acquire(holder='S1', key='B1/R1.fastq.gz', reads='old'))
+        self.assertEqual('new', acquire(holder='S2', key='B2/R1.fastq.gz', reads='new'))  # same name, re-sequenced
+        self.assertEqual('old', acquire(holder='S3', key='B1/R1.fastq.gz', reads='not downloaded again'))
+
+    def test_transfer_profile(self):
+        parameters = {
+            'NAS User': 'me',
+            'Transfer Profile': 'wan',
+            'Transfer Streams': '3',
+            'Transfer Bandwidth Limit (KB/s)': '1000',
+        }
+        sample_row = pd.Series({
+            'Sequencing Batch ID': 'SEQUENCING_BATCH_ID',
+            'Tumor Fastq R1': 'TUMOR_R1.fastq.gz',
+            'Tumor Fastq R2': 'TUMOR_R2.fastq.gz',
+            'Output Name': 'OUTPUT_NAME',
+        })
+        actual = BuildExecutionScript().main(parameters=parameters, sample_row=sample_row).split('   &&   \\\n')
+
+        rsync = 'rsync -avz --skip-compress=gz/bgz/bz2/zst/zip/bam/cram/bai/crai/csi/tbi --bwlimit=1000'
+        self.assertEqual(  # the limit is split between the 2 FASTQs downloaded at the same time
+            f"printf '%s\\n' 'TUMOR_R1.fastq.gz' 'TUMOR_R2.fastq.gz' | xargs -P 3 -I {{}} "
+            f"{rsync.replace('1000', '500')} -e 'ssh -p 22' me@255.255.255.255:'/SEQUENCING_BATCH_ID/{{}}' './fastq/' "
+            f"2>&1 >> 'OUTPUT_NAME/progress.txt'",
+            actual[0]
+        )
+        self.assertEqual(
+            f"{rsync} -e 'ssh -p 22' 'OUTPUT_NAME' me@255.255.255.255:'~/SomaticApp/'",
+            actual[2]
+        )
+
+    def test_output_transfer(self):
+        parameters = {
+            'NAS User': 'me',
+            'NAS Destination Directory': 'test',
+            'Output Transfer': 'tar-zstd',
+            'Output Manifest': '*.vcf.gz, ./report/*',
+        }
+        sample_row = pd.Series({
+            'Sequencing Batch ID': 'SEQUENCING_BATCH_ID',
+            'Tumor Fastq R1': 'TUMOR_R1.fastq.gz',
+            'Tumor Fastq R2': 'TUMOR_R2.fastq.gz',
+            'Output Name': 'OUTPUT_NAME',
+        })
+        find = "(cd 'OUTPUT_NAME' && find . -type f \\( -path './*.vcf.gz' -o -path './report/*' \\) -print0) " \
+               "> 'OUTPUT_NAME.manifest'   &&   [ -s 'OUTPUT_NAME.manifest' ]"
+
+        actual = BuildExecutionScript().main(parameters=parameters, sample_row=sample_row).split('   &&   \\\n')
+        nas_outdir = "~/'\\''SomaticApp/test/OUTPUT_NAME'\\''"
+        self.assertEqual(
+            f"{find}   &&   set -o pipefail   &&   "
+            f"tar -C 'OUTPUT_NAME' -cf - --null -T - < 'OUTPUT_NAME.manifest' | zstd -q -T0 | "
+            f"ssh -p 22 me@255.255.255.255 'mkdir -p {nas_outdir} && zstd -dcq | tar -xf - -C {nas_outdir}'",
+            actual[3]
+        )
+
+        parameters['Output Transfer'] = 'rsync'
+        actual = BuildExecutionScript().main(parameters=parameters, sample_row=sample_row).split('   &&   \\\n')
+        self.assertEqual(
+            f"{find}   &&   rsync -avz --from0 --files-from='OUTPUT_NAME.manifest' -e 'ssh -p 22' "
+            f"'OUTPUT_NAME' me@255.255.255.255:'~/SomaticApp/test/OUTPUT_NAME/'",
+            actual[3]
+        )
+        self.assertEqual("rm -f 'OUTPUT_NAME.manifest'", actual[5])
+
+    def test_output_manifest_matching_nothing(self):
+        parameters = {'NAS User': 'me', 'Output Manifest': '*.vcf.gz'}
+        sample_row = pd.Series({
+            'Sequencing Batch ID': 'SEQUENCING_BATCH_ID',
+            'Tumor Fastq R1': 'TUMOR_R1.fastq.gz',
+            'Tumor Fastq R2': 'TUMOR_R2.fastq.gz',
+            'Output Name': 'OUTPUT_NAME',
+        })
+        builder = BuildExecutionScript()
+        builder.main(parameters=parameters, sample_row=sample_row)
+        os.makedirs(f'{self.workdir}/OUTPUT_NAME')
+        open(f'{self.workdir}/OUTPUT_NAME/report.html', 'w').close()
+
+        # only the upload and the cleanup, a failed upload should stop the chain before the cleanup
+        script = '   &&   '.join([builder.rsync_output_cmd.replace('rsync', 'true', 1)] + builder.rm_cmds)
+        returncode = subprocess.run(['bash', '-c', script], cwd=self.workdir).returncode
+
+        self.assertNotEqual(0, returncode)
+        self.assertTrue(os.path.isfile(f'{self.workdir}/OUTPUT_NAME/report.html'))
+
+    def test_fastq_name_with_quotes_and_dollar(self):
+        fq = 'T1 "$HOME".fastq.gz'
+        sample_row = pd.Series({
+            'Sequencing Batch ID': 'SEQUENCING_BATCH_ID',
+            'Tumor Fastq R1': fq,
+            'Tumor Fastq R2': 'TUMOR_R2.fastq.gz',
+            'Output Name': 'OUTPUT_NAME',
+        })
+        script = BuildExecutionScript().main(parameters={'NAS User': 'me'}, sample_row=sample_row)
+        job = Job(name='OUTPUT_NAME', outdir='OUTPUT_NAME', script=script)
+
+        arg = f"'./fastq/{fq}'"
+        self.assertIn(f'--tumor-fq1={arg}', job.get_script_content())  # uploaded as is over SFTP
+        self.assertNotIn('$HOME', job.command)
+        stdout = subprocess.run(['bash', '-c', f'printf %s {arg}'], capture_output=True, text=True).stdout
+        self.assertEqual(f'./fastq/{fq}', stdout)  # not expanded by the shell running commands.txt
+
+    def test_streamed_fastqs(self):
+        sample_row = pd.Series({
+            'Sequencing Batch ID': 'SEQUENCING_BATCH_ID',
+            'Tumor Fastq R1': 'TUMOR_R1.fastq.gz',
+            'Tumor Fastq R2': 'TUMOR_R2.fastq.gz',
+            'Output Name': 'OUTPUT_NAME',
+        })
+        actual = BuildExecutionScript().main(
+            parameters={'NAS User': 'me', 'FASTQ Input': 'streamed'},
+            sample_row=sample_row).split('   &&   \\\n')
+
+        fifos = "'./fastq/OUTPUT_NAME/TUMOR_R1.fastq.gz' './fastq/OUTPUT_NAME/TUMOR_R2.fastq.gz'"
+        self.assertEqual(f"mkdir -p './fastq/OUTPUT_NAME'   &&   rm -f {fifos}   &&   mkfifo {fifos}", actual[0])
+        self.assertTrue(actual[1].startswith(
+            "( ssh -p 22 -o BatchMode=yes me@255.255.255.255 'cat '\\''/SEQUENCING_BATCH_ID/TUMOR_R1.fastq.gz'\\''' "
+            "> './fastq/OUTPUT_NAME/TUMOR_R1.fastq.gz' 2>> 'OUTPUT_NAME/progress.txt' & "))
+        self.assertIn("--tumor-fq1='./fastq/OUTPUT_NAME/TUMOR_R1.fastq.gz'", actual[1])
+        self.assertTrue(actual[1].endswith('then wait %1 && wait %2; else kill %1 %2 2>/dev/null; false; fi )'))
+        self.assertEqual(["rm -r 'OUTPUT_NAME'", "rm -r './fastq/OUTPUT_NAME'"], actual[3:])
+
+    def test_stage_checkpoints(self):
+        sample_row = pd.Series({
+            'Sequencing Batch ID': 'SEQUENCING_BATCH_ID',
+            'Tumor Fastq R1': 'TUMOR_R1.fastq.gz',
+            'Tumor Fastq R2': 'TUMOR_R2.fastq.gz',
+            'Output Name': 'OUTPUT_NAME',
+        })
+        builder = BuildExecutionScript()
+        actual = builder.main(parameters={'Stage Checkpoints': True}, sample_row=sample_row).split('   &&   \\\n')
+
+        self.assertEqual("mkdir -p 'checkpoints/OUTPUT_NAME'", actual[0])
+        self.assertTrue(actual[1].startswith("( ( [ -f './fastq/TUMOR_R1.fastq.gz' ] && [ -f './fastq/TUMOR_R2.fastq.gz' ] && "))
+        self.assertIn("> 'checkpoints/OUTPUT_NAME/cleanup.done' ) )", actual[-1])
+        self.assertEqual(['stage_in.sh', 'compute.sh', 'stage_out.sh'], list(builder.get_stage_scripts().keys()))
+
+    def test_build_checkpoints(self):
+        stages = {'a': 'A', 'b': 'B'}
+        actual = BuildCheckpoints().main(stages=stages, checkpoint_dir='ckpt', preconditions={'a': ['[ -f x ]']})
+        changed = BuildCheckpoints().main(stages={'a': 'A2', 'b': 'B'}, checkpoint_dir='ckpt')
+
+        hash_a = actual['a'].split('echo ')[1].split()[0]
+        hash_b = actual['b'].split('echo ')[1].split()[0]
+        self.assertEqual(
+            f"( ( [ -f x ] && grep -qsxF {hash_a} 'ckpt/a.done' ) || grep -qsxF {hash_b} 'ckpt/b.done' || "
+            f"( A   &&   echo {hash_a} > 'ckpt/a.done' ) )",
+            actual['a'])
+        self.assertNotEqual(actual['b'], changed['b'])  # a later stage reruns when an earlier one changes
+
+    def test_template(self):
+        template = PipelineTemplate(parameters={'threads': '8', 'discard-bam': True})
+        self.assertIn('--threads=8', template.pipeline_flags)
+        self.assertIn('--discard-bam', template.pipeline_flags)
+
+        for name in ['S1', 'S2']:
+            sample_row = {
+                'Sequencing Batch ID': 'SEQUENCING_BATCH_ID',
+                'Tumor Fastq R1': f'{name}_R1.fastq.gz',
+                'Tumor Fastq R2': f'{name}_R2.fastq.gz',
+                'Normal Fastq R1': None,
+                'Normal Fastq R2': None,
+                'BED File': None,
+                'Output Name': name,
+            }
+            self.assertEqual(
+                BuildExecutionScript().main(parameters={'threads': '8', 'discard-bam': True}, sample_row=sample_row),
+                BuildExecutionScript().main(parameters=template.parameters, sample_row=sample_row, template=template)
+            )
+
+    def test_raise_transfer_profile_error(self):
+        sample_row = pd.Series({
+            'Sequencing Batch ID': 'SEQUENCING_BATCH_ID',
+            'Tumor Fastq R1': 'TUMOR_R1.fastq.gz',
+            'Tumor Fastq R2': 'TUMOR_R2.fastq.gz',
+            'Output Name': 'OUTPUT_NAME',
+        })
+        with self.assertRaises(ValueError):
+            BuildExecutionScript().main(parameters={'Transfer Profile': 'fast'}, sample_row=sample_row)
+
     def test_raise_dstdir_error(self):
         # multiple '../' buried in the path is dangerous, causing writing to super directories or even root
         parameters = {
@@ -233,6 +535,97 @@ rm './fastq/TUMOR_R2.fastq.gz'"""
             BuildExecutionScript().main(parameters=parameters, sample_row=sample_row)
 
 
+class TestIterRunTable(TestCase):
+
+    def setUp(self):
+        self.set_up(py_path=__file__)
+
+    def tearDown(self):
+        self.tear_down()
+
+    def test_main(self):
+        file = f'{self.workdir}/run_table.csv'
+        with open(file, 'w') as fh:
+            fh.write('''\
+Sequencing Batch ID,Tumor Fastq R1,Tumor Fastq R2,Normal Fastq R1,Output Name,Unused
+00123,T1_R1.fq.gz,T1_R2.fq.gz,N1_R1.fq.gz,S1,x
+00124,T2_R1.fq.gz,T2_R2.fq.gz,,S2,x
+00125,T3_R1.fq.gz,T3_R2.fq.gz,,S3,x
+''')
+        rows = list(iter_run_table(run_table=file, chunksize=2))
+
+        self.assertEqual(3, len(rows))
+        self.assertEqual({
+            'Sequencing Batch ID': '00123',  # not parsed as an int
+            'Tumor Fastq R1': 'T1_R1.fq.gz',
+            'Tumor Fastq R2': 'T1_R2.fq.gz',
+            'Normal Fastq R1': 'N1_R1.fq.gz',
+            'Output Name': 'S1',
+            'Normal Fastq R2': None,
+            'BED File': None,
+        }, rows[0])
+        self.assertIsNone(rows[2]['Normal Fastq R1'])
+
+    def test_raise_missing_column(self):
+        file = f'{self.workdir}/run_table.csv'
+        with open(file, 'w') as fh:
+            fh.write('Sequencing Batch ID,Tumor Fastq R1,Output Name\nB1,T1_R1.fq.gz,S1\n')
+        with self.assertRaises(ValueError):
+            list(iter_run_table(run_table=file))
+
+
+class TestBuildBatchArchive(TestCase):
+
+    def test_main(self):
+        jobs = [
+            Job(name='S1', outdir='S1', script='echo "$HOME"'),
+            Job(name='S2', outdir='S2/', script='echo S2', files={'S2/compute.sh': 'echo S2\n'}),
+        ]
+        data = BuildBatchArchive().main(batch=Batch(batch_id='BATCH', jobs=jobs))
+
+        with tarfile.open(fileobj=io.BytesIO(data), mode='r:gz') as tar:
+            self.assertEqual(
+                ['S1/commands.txt', 'S2/commands.txt', 'S2/compute.sh', 'batches/BATCH/launch.sh'],
+                tar.getnames()
+            )
+            commands = tar.extractfile('S1/commands.txt').read().decode()
+            launcher = tar.extractfile('batches/BATCH/launch.sh').read().decode()
+
+        self.assertEqual('echo "$HOME"\n', commands)  # script is written verbatim, no shell quoting involved
+        expected = '''\
+set -e
+set +e
+screen -S S1 -dm bash "S1/commands.txt"; echo "@@launched 0 $?"
+screen -S S2 -dm bash "S2/commands.txt"; echo "@@launched 1 $?"
+'''
+        self.assertEqual(expected, launcher)
+
+    def test_failed_launch_does_not_stop_the_rest(self):
+        jobs = [
+            Job(name='S1', outdir='S1', script='echo', launch_cmd='true'),
+            Job(name='S2', outdir='S2', script='echo', launch_cmd='false'),
+            Job(name='S3', outdir='S3', script='echo', launch_cmd='true'),
+        ]
+        batch = Batch(batch_id='BATCH', jobs=jobs, setup_cmds=['true'])
+        builder = BuildBatchArchive()
+        builder.batch = batch
+        builder.launch_cmds = [job.launch_cmd for job in jobs]
+        stdout = subprocess.run(
+            ['bash', '-c', builder.build_launcher()], capture_output=True, text=True, check=True).stdout
+
+        self.assertEqual({0: 0, 1: 1, 2: 0}, parse_launch_statuses(stdout))
+
+    def test_failed_setup_launches_nothing(self):
+        jobs = [Job(name='S1', outdir='S1', script='echo', launch_cmd='true')]
+        builder = BuildBatchArchive()
+        builder.batch = Batch(batch_id='BATCH', jobs=jobs, setup_cmds=['false'])
+        builder.launch_cmds = [job.launch_cmd for job in jobs]
+        result = subprocess.run(['bash', '-c', builder.build_launcher()], capture_output=True, text=True)
+
+        self.assertNotEqual(0, result.returncode)
+        self.assertEqual({}, parse_launch_statuses(result.stdout))
+
+
 class TestFunctions(TestCase):
 
     def test_is_subdir(self):
@@ -246,11 +639,75 @@ class TestFunctions(TestCase):
         actual = build_submit_cmd(
             job_name='job_name',
             outdir='outdir',
-            script='BASH SCRIPT'
+            checksum='CHECKSUM'
         )
         expected = '''\
-mkdir -p "outdir"   &&   \\
-echo "BASH SCRIPT" > "outdir/commands.txt"   &&   \\
+echo 'CHECKSUM  outdir/commands.txt' | sha256sum -c --status   &&   \\
 screen -S job_name -dm bash "outdir/commands.txt"
 '''
         self.assertEqual(expected, actual)
+
+    def test_job_command_size_does_not_depend_on_script(self):
+        short = Job(name='S1', outdir='S1/', script='echo')
+        long = Job(name='S1', outdir='S1/', script='echo "$HOME"\n' * 1000)
+        self.assertEqual('S1/commands.txt', short.script_file)
+        self.assertEqual(len(short.command), len(long.command))
+        self.assertNotIn('$HOME', long.command)
+        self.assertEqual(hashlib.sha256(b'echo\n').hexdigest(), short.checksum)
+
+    def test_build_enqueue_cmd(self):
+        actual = build_enqueue_cmd(job_name='S1', outdir='S1/', key='BATCH_000001', threads=4, memory_gb=32)
+        expected = "echo 'S1 4 32 S1' > 'queue/pending/BATCH_000001.job'"
+        self.assertEqual(expected, actual)
+
+        actual = build_enqueue_cmd(job_name='S1', outdir='S1/', key='BATCH_000001', threads=4, memory_gb=32, disk_gb=40)
+        expected = "echo 'S1 4 32 S1 40' > 'queue/pending/BATCH_000001.job'"
+        self.assertEqual(expected, actual)
+
+    def test_estimate_disk_gb(self):
+        parameters = {'Output Size Multiplier': '3', 'discard-bam': False}
+        self.assertEqual(40, estimate_disk_gb(fastq_bytes=10 * 10 ** 9, parameters=parameters))
+        parameters['discard-bam'] = True
+        self.assertEqual(25, estimate_disk_gb(fastq_bytes=10 * 10 ** 9, parameters=parameters))
+
+    def test_parse_queue_status_with_disk(self):
+        stdout = '''\
+32 128 500
+pending S3 8 64 S3 200
+running S1 8 64 S1 120
+running S2 4 32 S2
+done 0
+'''
+        self.assertIn('Disk reserved: 120 / 500 GB', parse_queue_status(stdout))
+
+    def test_parse_queue_status(self):
+        stdout = '''\
+32 128
+pending S3 8 64 S3
+running S1 8 64 S1
+running S2 4 32 S2
+done 5
+'''
+        expected = '''\
+Cores in use: 12 / 32
+Memory in use: 96 / 128 GB
+
+Running (2): S1, S2
+Pending (1): S3
+Done: 5'''
+        self.assertEqual(expected, parse_queue_status(stdout))
+
+    def test_build_list_nas_outputs_cmd(self):
+        actual = build_list_nas_outputs_cmd(parameters={
+            'NAS User': 'me',
+            'NAS Local IP': '10.0.0.1',
+            'NAS Port': '22',
+            'NAS Destination Directory': './project/',
+        })
+        expected = '''ssh -p 22 -o BatchMode=yes me@10.0.0.1 "ls -1 ~/'SomaticApp/project/'"'''
+        self.assertEqual(expected, actual)
+
+    def test_build_batch_launch_cmd(self):
+        actual = build_batch_launch_cmd(batch_id='BATCH', archive='BATCH.tar.gz')
+        expected = 'tar -xzf "BATCH.tar.gz"   &&   rm "BATCH.tar.gz"   &&   bash "batches/BATCH/launch.sh"'
+        self.assertEqual(expected, actual)
@@ -0,0 +1,122 @@
+import os
+import subprocess
+from src.model import fill_default_parameters
+from src.preflight import Preflight, build_list_fastqs_cmd, parse_fastq_listing, format_duration
+from .setup import TestCase
+
+
+STDOUT = '''\
+@@batch B1
+1000000000 S1_R1.fastq.gz
+1000000000 S1_R2.fastq.gz
+500000000 N1_R1.fastq.gz
+500000000 N1_R2.fastq.gz
+@@batch B2
+2000000000 S2 R1.fastq.gz
+700000000 lane2/S5_R1.fastq.gz
+700000000 lane2/S5_R2.fastq.gz
+@@batch B3
+@@missing
+'''
+
+
+class MockResult:
+
+    def __init__(self, stdout: str, return_code: int = 0):
+        self.stdout = stdout
+        self.stderr = ''
+        self.return_code = return_code
+
+
+class MockConnection:
+
+    def __init__(self, stdout: str, return_code: int = 0):
+        self.stdout = stdout
+        self.return_code = return_code
+        self.commands = []
+
+    def run(self, command: str, **kwargs):
+        self.commands.append(command)
+        return MockResult(stdout=self.stdout, return_code=self.return_code)
+
+
+class TestPreflight(TestCase):
+
+    def setUp(self):
+        self.parameters = {'NAS Sequencing Directory': '~/seq/'}
+        fill_default_parameters(self.parameters)
+        self.run_table = [
+            {'Output Name': name, 'Sequencing Batch ID': batch_id, 'Tumor Fastq R1': r1, 'Tumor Fastq R2': r2,
+             'Normal Fastq R1': n1, 'Normal Fastq R2': n2}
+            for name, batch_id, r1, r2, n1, n2 in [
+                ('S1', 'B1', 'S1_R1.fastq.gz', 'S1_R2.fastq.gz', 'N1_R1.fastq.gz', 'N1_R2.fastq.gz'),
+                ('S2', 'B2', 'S2 R1.fastq.gz', 'S2_R2.fastq.gz', None, None),
+                ('S3', 'B3', 'S3_R1.fastq.gz', 'S3_R2.fastq.gz', None, None),
+                ('S4', 'B1', 'S1_R1.fastq.gz', 'S1_R2.fastq.gz', None, None),
+                ('S5', 'B2', 'lane2/S5_R1.fastq.gz', 'lane2/S5_R2.fastq.gz', None, None),
+            ]
+        ]
+
+    def test_main(self):
+        connection = MockConnection(stdout=STDOUT)
+        report = Preflight().main(connection=connection, run_table=self.run_table, parameters=self.parameters)
+
+        self.assertEqual(1, len(connection.commands))
+        self.assertEqual([
+            'S2: B2/S2_R2.fastq.gz',
+            'S3: B3/S3_R1.fastq.gz (no such batch directory)',
+            'S3: B3/S3_R2.fastq.gz (no such batch directory)',
+        ], report.missing)
+        self.assertEqual(6_400_000_000, report.total_bytes)  # S4 shares the FASTQs of S1
+        self.assertEqual(
+            {'S1': 3 * 10 ** 9, 'S2': 2 * 10 ** 9, 'S4': 2 * 10 ** 9, 'S5': 1_400_000_000},  # S5 in a subdirectory
+            report.sample_bytes)
+        self.assertEqual(64, report.estimated_seconds)
+        self.assertFalse(report.ok())
+
+    def test_bandwidth_limit(self):
+        self.parameters['Transfer Bandwidth Limit (KB/s)'] = '10000'
+        report = Preflight().main(
+            connection=MockConnection(stdout=STDOUT), run_table=self.run_table, parameters=self.parameters)
+        self.assertAlmostEqual(10.24, report.bandwidth_mb)
+
+    def test_ssh_failure(self):
+        with self.assertRaises(RuntimeError):
+            Preflight().main(
+                connection=MockConnection(stdout='', return_code=255),
+                run_table=self.run_table,
+                parameters=self.parameters)
+
+    def test_build_list_fastqs_cmd(self):
+        actual = build_list_fastqs_cmd(parameters=self.parameters, batch_ids=['B1', 'B2'])
+        self.assertTrue(actual.startswith("ssh -p 22 -o BatchMode=yes @255.255.255.255 sh -s <<'SOMATIC_APP_EOF'\n"))
+        self.assertIn("if [ -d ~/'seq/B1' ]; then find -L ~/'seq/B1' -type f -printf '%s %P\\n' 2>/dev/null;", actual)
+        self.assertEqual(2, actual.count('@@missing'))
+
+    def test_list_batch_ids_with_printf_directives(self):
+        self.set_up(py_path=__file__)
+        batch_ids = ['B%s', 'B\\n', 'B3']
+        for batch_id in batch_ids[:2]:
+            os.makedirs(f'{self.workdir}/seq/{batch_id}/lane2')
+            with open(f'{self.workdir}/seq/{batch_id}/lane2/R1.fastq.gz', 'w') as fh:
+                fh.write('ACGT')
+
+        self.parameters['NAS Sequencing Directory'] = os.path.abspath(f'{self.workdir}/seq')
+        cmd = build_list_fastqs_cmd(parameters=self.parameters, batch_ids=batch_ids)
+        script = cmd.split('\n', 1)[1].rsplit('\n', 1)[0]  # the heredoc fed to the shell of the NAS
+        stdout = subprocess.run(['sh', '-c', script], capture_output=True, text=True, check=True).stdout
+        self.tear_down()
+
+        index, missing_dirs = parse_fastq_listing(stdout)
+        self.assertEqual({('B%s', 'lane2/R1.fastq.gz'): 4, ('B\\n', 'lane2/R1.fastq.gz'): 4}, index)
+        self.assertEqual({'B3'}, missing_dirs)
+
+    def test_parse_fastq_listing(self):
+        index, missing_dirs = parse_fastq_listing(STDOUT)
+        self.assertEqual(2000000000, index[('B2', 'S2 R1.fastq.gz')])
+        self.assertEqual(700000000, index[('B2', 'lane2/S5_R1.fastq.gz')])
+        self.assertEqual({'B3'}, missing_dirs)
+
+    def test_format_duration(self):
+        self.assertEqual('5 min', format_duration(300))
+        self.assertEqual('2 h 5 min', format_duration(7500))
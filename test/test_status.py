@@ -0,0 +1,102 @@
+import os
+import subprocess
+from src.status import ParseStatus, build_status_cmd, build_outdirs_file_content, build_status_rows, summarize_status
+from .setup import TestCase
+
+
+STDOUT = '''\
+@@screen
+There are screens on:
+\t1001.S2\t(Detached)
+\t1002.S3\t(Detached)
+\t1003.S4\t(Detached)
+2 Sockets in /run/screen/S-me.
+@@ps
+COMMAND
+bash S2/commands.txt
+rsync -avz -e ssh -p 22 me@255.255.255.255:/BATCH/S2_R1.fastq.gz ./fastq/
+python somatic_pipeline-1.0.0 main --tumor-fq1=./fastq/S3_R1.fastq.gz --outdir=S3 --threads=4
+rsync -avz -e ssh -p 22 S4 me@255.255.255.255:~/SomaticApp/
+bash P1/compute.sh
+@@queue
+S1 4 32 S1
+@@pipelined
+P1 staged
+P2 none
+P3 failed
+@@job 0
+@@job 1
+@@size 1048576
+receiving incremental file list
+S2_R1.fastq.gz
+@@job 2
+@@size 2097152
+@@job 3
+@@size 10
+@@job 4
+@@size 20
+@@job 5
+@@job 6
+@@size 30
+@@job 7
+@@size 40
+@@job 8
+'''
+
+
+class TestParseStatus(TestCase):
+
+    def test_main(self):
+        outdirs = ['S1', 'S2', 'S3', 'S4', 'S5', 'S6', 'P1', 'P2', 'P3']
+        statuses = ParseStatus().main(stdout=STDOUT, outdirs=outdirs, submitted={'S5', 'S6'})
+
+        self.assertEqual(
+            ['queued', 'staging', 'running', 'uploading', 'failed', 'done', 'running', 'queued', 'failed'],
+            [s.state for s in statuses]
+        )
+        self.assertEqual(['receiving incremental file list', 'S2_R1.fastq.gz'], statuses[1].progress)
+        self.assertEqual(
+            ['S2', 'staging', '1.0 GB', 'S2_R1.fastq.gz'],
+            build_status_rows(statuses)[1]
+        )
+        self.assertEqual(
+            'queued: 2, staging: 1, running: 2, uploading: 1, done: 1, failed: 2, unknown: 0',
+            summarize_status(statuses)
+        )
+
+    def test_no_output_directory_is_not_done_without_evidence(self):
+        statuses = ParseStatus().main(stdout=STDOUT, outdirs=['S1', 'S2', 'S3', 'S4', 'S5', 'S6'])
+        self.assertEqual('unknown', statuses[5].state)
+
+
+class TestBuildStatusCmd(TestCase):
+
+    def setUp(self):
+        self.set_up(py_path=__file__)
+
+    def tearDown(self):
+        self.tear_down()
+
+    def test_main(self):
+        # the command size does not grow with the number of samples, which are read from the uploaded file
+        self.assertEqual(
+            len(build_status_cmd(outdirs_file='status/a.txt')),
+            len(build_status_cmd(outdirs_file='status/b.txt')))
+
+        os.makedirs(f'{self.workdir}/status')
+        os.makedirs(f'{self.workdir}/FAILED')
+        with open(f'{self.workdir}/FAILED/progress.txt', 'w') as fh:
+            fh.write('line 1\nline 2\n')
+        os.makedirs(f'{self.workdir}/checkpoints/FINISHED')
+        open(f'{self.workdir}/checkpoints/FINISHED/cleanup.done', 'w').close()
+
+        outdirs = ['FAILED', 'FINISHED', 'SUBMITTED', 'NEVER_SEEN']
+        with open(f'{self.workdir}/status/list.txt', 'w') as fh:
+            fh.write(build_outdirs_file_content(outdirs))
+        stdout = subprocess.run(
+            ['bash', '-c', build_status_cmd(outdirs_file='status/list.txt')],
+            cwd=self.workdir, capture_output=True, text=True).stdout
+
+        statuses = ParseStatus().main(stdout=stdout, outdirs=outdirs, submitted={'SUBMITTED'})
+        self.assertEqual(['failed', 'done', 'done', 'unknown'], [s.state for s in statuses])
+        self.assertEqual(['line 1', 'line 2'], statuses[0].progress)
@@ -0,0 +1,262 @@
+import io
+import tarfile
+import threading
+import subprocess
+from contextlib import contextmanager
+from src.model import Job, Batch
+from src.submit import ConnectionPool, SubmitJobs, SubmitBatch, build_report, sftp_path
+from src.timing import SubmissionTimer
+from .setup import TestCase
+
+
+class MockResult:
+
+    def __init__(self, stdout: str):
+        self.stdout = stdout
+        self.stderr = ''
+        self.return_code = 0
+
+
+class MockConnection:
+
+    lock = threading.Lock()
+    opened = 0
+
+    def __init__(self):
+        with self.lock:
+            MockConnection.opened += 1
+        self.commands = []
+        self.uploads = {}
+
+    @contextmanager
+    def cd(self, path):
+        yield
+
+    @contextmanager
+    def prefix(self, command):
+        yield
+
+    def run(self, command, **kwargs):
+        if 'FAIL' in command:
+            raise RuntimeError('remote command failed')
+        self.commands.append(command)
+        stdout = self.run_batch_launcher() if 'launch.sh' in command else ''
+        return MockResult(stdout=stdout)
+
+    def run_batch_launcher(self) -> str:
+        # the launcher of the uploaded archive, with the launch commands given to the jobs of the test
+        data = [v for k, v in self.uploads.items() if k.endswith('.tar.gz')][-1]
+        with tarfile.open(fileobj=io.BytesIO(data), mode='r:gz') as tar:
+            name = [n for n in tar.getnames() if n.endswith('launch.sh')][0]
+            launcher = tar.extractfile(name).read().decode()
+        return subprocess.run(['bash', '-c', launcher], capture_output=True, text=True, check=True).stdout
+
+    def put(self, local, remote, **kwargs):
+        self.uploads[remote] = local.read()
+
+    def close(self):
+        pass
+
+
+def read_archive(data: bytes) -> dict:
+    with tarfile.open(fileobj=io.BytesIO(data), mode='r:gz') as tar:
+        return {name: tar.extractfile(name).read() for name in tar.getnames()}
+
+
+class TestSubmitJobs(TestCase):
+
+    def setUp(self):
+        MockConnection.opened = 0
+
+    def test_all_jobs_submitted_over_bounded_pool(self):
+        jobs = [Job(name=f'S{i}', outdir=f'S{i}', script='echo') for i in range(20)]
+        pool = ConnectionPool(new_connection=MockConnection, max_size=3)
+        timer = SubmissionTimer(file=None)
+
+        results = SubmitJobs(pool=pool, timer=timer).main(batch=Batch(batch_id='BATCH', jobs=jobs))
+
+        self.assertEqual([f'S{i}' for i in range(20)], [r.job_name for r in results])
+        self.assertTrue(all(r.success for r in results))
+        self.assertLessEqual(MockConnection.opened, 3)
+        self.assertEqual(1 + 20, sum(len(c.uploads) for c in pool.opened))  # the setup archive, then each script
+        self.assertEqual(1 + 20, sum(len(c.commands) for c in pool.opened))  # the setup archive, one launch per job
+        self.assertEqual('set_up_batch', timer.records[0]['name'])
+        self.assertEqual(20, sum(r['event'] == 'job' for r in timer.records))
+
+    def test_set_up_batch_before_jobs(self):
+        jobs = [Job(name=f'S{i}', outdir=f'S{i}', script='echo') for i in range(3)]
+        batch = Batch(batch_id='BATCH', jobs=jobs, files={'queue/scheduler.sh': 'sleep'}, setup_cmds=['SETUP'])
+        pool = ConnectionPool(new_connection=MockConnection, max_size=1)
+
+        results = SubmitJobs(pool=pool).main(batch=batch)
+
+        self.assertTrue(all(r.success for r in results))
+        connection = pool.opened[0]
+        expected = ['SomaticApp/BATCH_setup.tar.gz',
+                    'SomaticApp/S0/commands.txt', 'SomaticApp/S1/commands.txt', 'SomaticApp/S2/commands.txt']
+        self.assertEqual(expected, list(connection.uploads.keys()))
+        self.assertEqual(b'echo\n', connection.uploads['SomaticApp/S0/commands.txt'])
+
+        archive = read_archive(connection.uploads['SomaticApp/BATCH_setup.tar.gz'])
+        self.assertEqual(['batches/BATCH/outdirs.txt', 'queue/scheduler.sh'], list(archive.keys()))
+        self.assertEqual(b'S0\nS1\nS2\n', archive['batches/BATCH/outdirs.txt'])
+        self.assertTrue(connection.commands[0].endswith(
+            'tar -xzf "BATCH_setup.tar.gz"   &&   rm "BATCH_setup.tar.gz"   &&   '
+            'xargs -r -d "\\n" mkdir -p < "batches/BATCH/outdirs.txt"'))
+        self.assertEqual('SETUP', connection.commands[1])
+
+    def test_jobs_built_as_they_are_sent(self):
+        built = []
+
+        def iter_jobs():
+            for i in range(5):
+                built.append(i)
+                yield Job(name=f'S{i}', outdir=f'S{i}', script='echo')
+
+        n_built_at_upload = []
+
+        class RecordBuilt(MockConnection):
+            def put(self, local, remote, **kwargs):
+                n_built_at_upload.append(len(built))
+                super().put(local, remote, **kwargs)
+
+        pool = ConnectionPool(new_connection=RecordBuilt, max_size=1)
+        batch = Batch(batch_id='BATCH', jobs=iter_jobs(), job_names=[f'S{i}' for i in range(5)])
+        results = SubmitJobs(pool=pool).main(batch=batch)
+
+        self.assertEqual([f'S{i}' for i in range(5)], [r.job_name for r in results])
+        self.assertEqual([0, 1, 2, 3, 4, 5], n_built_at_upload)  # the setup archive, then one job at a time
+
+    def test_failure_does_not_stop_batch(self):
+        jobs = [
+            Job(name='S1', outdir='S1', script='echo'),
+            Job(name='S2', outdir='S2', script='echo', launch_cmd='FAIL'),
+            Job(name='S3', outdir='S3', script='echo'),
+        ]
+        pool = ConnectionPool(new_connection=MockConnection, max_size=2)
+
+        results = SubmitJobs(pool=pool).main(batch=Batch(batch_id='BATCH', jobs=jobs))
+
+        self.assertEqual([True, False, True], [r.success for r in results])
+        self.assertEqual('remote command failed', results[1].error)
+
+        expected = '''\
+2 of 3 job(s) submitted.
+
+Succeeded:
+  S1
+  S3
+
+Failed:
+  S2: remote command failed'''
+        self.assertEqual(expected, build_report(results))
+
+    def test_cancel(self):
+        jobs = [Job(name=f'S{i}', outdir=f'S{i}', script='echo') for i in range(3)]
+        pool = ConnectionPool(new_connection=MockConnection, max_size=1)
+
+        reported = []
+        submit = SubmitJobs(pool=pool, on_result=reported.append)
+        submit.cancel()
+        results = submit.main(batch=Batch(batch_id='BATCH', jobs=jobs))
+
+        self.assertEqual(['Cancelled'] * 3, [r.error for r in results])
+        self.assertEqual(3, len(reported))
+        self.assertEqual(0, len(pool.opened))
+
+
+    def test_launched_by_setup(self):
+        jobs = [Job(name=f'S{i}', outdir=f'S{i}', script='echo') for i in range(3)]
+        batch = Batch(batch_id='BATCH', jobs=jobs, setup_cmds=['START'], launched_by_setup=True, cancel_cmds=['STOP'])
+        pool = ConnectionPool(new_connection=MockConnection, max_size=2)
+
+        results = SubmitJobs(pool=pool).main(batch=batch)
+
+        self.assertTrue(all(r.success for r in results))
+        connection = pool.opened[0]
+        self.assertEqual(2, len(connection.commands))  # the setup archive and START, no command per job
+        self.assertEqual(['SomaticApp/BATCH_setup.tar.gz'], list(connection.uploads.keys()))
+        self.assertIn('S2/commands.txt', read_archive(connection.uploads['SomaticApp/BATCH_setup.tar.gz']))
+
+    def test_cancel_after_setup_stops_what_it_started(self):
+        jobs = [Job(name=f'S{i}', outdir=f'S{i}', script='echo') for i in range(3)]
+        batch = Batch(batch_id='BATCH', jobs=jobs, setup_cmds=['START'], launched_by_setup=True, cancel_cmds=['STOP'])
+        submit = None
+
+        class CancelOnStart(MockConnection):
+            def run(self, command, **kwargs):
+                if command == 'START':
+                    submit.cancel()  # e.g. the user cancels while the setup commands run
+                return super().run(command, **kwargs)
+
+        pool = ConnectionPool(new_connection=CancelOnStart, max_size=1)
+        submit = SubmitJobs(pool=pool)
+        results = submit.main(batch=batch)
+
+        self.assertEqual(['Cancelled'] * 3, [r.error for r in results])
+        self.assertEqual('STOP', pool.opened[0].commands[-1])
+
+    def test_cancel_while_packing_the_setup_archive(self):
+        submit = None
+
+        def iter_jobs():
+            for i in range(3):
+                if i == 1:
+                    submit.cancel()  # e.g. the user cancels while the scripts of a large batch are built
+                yield Job(name=f'S{i}', outdir=f'S{i}', script='echo')
+
+        batch = Batch(
+            batch_id='BATCH', jobs=iter_jobs(), job_names=['S0', 'S1', 'S2'], setup_cmds=['START'],
+            launched_by_setup=True, cancel_cmds=['STOP'])
+        pool = ConnectionPool(new_connection=MockConnection, max_size=1)
+        submit = SubmitJobs(pool=pool)
+        results = submit.main(batch=batch)
+
+        self.assertEqual(['Cancelled'] * 3, [r.error for r in results])
+        self.assertEqual({}, pool.opened[0].uploads)
+        self.assertEqual([], pool.opened[0].commands)
+
+
+class TestSubmitBatch(TestCase):
+
+    def test_one_upload_and_one_command(self):
+        jobs = [Job(name=f'S{i}', outdir=f'S{i}', script='echo', launch_cmd='true') for i in range(50)]
+        pool = ConnectionPool(new_connection=MockConnection, max_size=4)
+
+        results = SubmitBatch(pool=pool).main(batch=Batch(batch_id='BATCH', jobs=jobs))
+
+        self.assertTrue(all(r.success for r in results))
+        self.assertEqual(1, len(pool.opened))
+        connection = pool.opened[0]
+        self.assertEqual(1, len(connection.uploads))
+        self.assertEqual(1, len(connection.commands))
+
+    def test_helper_files_are_packed_not_uploaded(self):
+        jobs = [Job(name='S1', outdir='S1', script='echo', launch_cmd='true')]
+        batch = Batch(batch_id='BATCH', jobs=jobs, files={'queue/scheduler.sh': 'sleep'}, setup_cmds=['true'])
+        pool = ConnectionPool(new_connection=MockConnection, max_size=1)
+
+        SubmitBatch(pool=pool).main(batch=batch)
+
+        self.assertEqual(1, len(pool.opened[0].uploads))
+        self.assertEqual(1, len(pool.opened[0].commands))
+
+    def test_status_of_each_launch(self):
+        jobs = [
+            Job(name='S1', outdir='S1', script='echo', launch_cmd='true'),
+            Job(name='S2', outdir='S2', script='echo', launch_cmd='false'),
+            Job(name='S3', outdir='S3', script='echo', launch_cmd='exec true'),  # the launcher stops, e.g. killed
+            Job(name='S4', outdir='S4', script='echo', launch_cmd='true'),
+        ]
+        pool = ConnectionPool(new_connection=MockConnection, max_size=1)
+
+        results = SubmitBatch(pool=pool).main(batch=Batch(batch_id='BATCH', jobs=jobs))
+
+        self.assertEqual([True, False, False, False], [r.success for r in results])
+        self.assertEqual(
+            ['', 'launch exited with status 1', 'Not launched', 'Not launched'],
+            [r.error for r in results])
+
+    def test_sftp_path(self):
+        self.assertEqual('SomaticApp/a.tar.gz', sftp_path('~/SomaticApp/a.tar.gz'))
+        self.assertEqual('/abs/a.tar.gz', sftp_path('/abs/a.tar.gz'))
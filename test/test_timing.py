@@ -0,0 +1,53 @@
+import os
+import json
+import time
+from src.timing import StartupTimer, SubmissionTimer
+from .setup import TestCase
+
+
+class TestStartupTimer(TestCase):
+
+    def test_report(self):
+        timer = StartupTimer(start=time.perf_counter())
+        timer.mark('import')
+        timer.mark('window')
+        lines = timer.report().splitlines()
+
+        self.assertEqual('Startup timing:', lines[0])
+        self.assertTrue(lines[1].strip().startswith('import'))
+        self.assertTrue(lines[3].strip().startswith('total'))
+        self.assertIn('within the budget', lines[4])
+
+
+class TestSubmissionTimer(TestCase):
+
+    def setUp(self):
+        self.set_up(py_path=__file__)
+
+    def tearDown(self):
+        self.tear_down()
+
+    def test_log_and_summary(self):
+        file = f'{self.workdir}/timing.jsonl'
+        timer = SubmissionTimer(file=file, profile=True)
+        with timer.phase('build_submission_commands'):
+            pass
+        with self.assertRaises(RuntimeError):
+            with timer.phase('set_done'):
+                raise RuntimeError
+        timer.record(event='job', name='S1', seconds=0.2, ok=True)
+        timer.record(event='job', name='S2', seconds=0.5, ok=False)
+        timer.finish(ok=False)
+
+        with open(file) as fh:
+            records = [json.loads(line) for line in fh]
+        self.assertEqual(['phase', 'phase', 'job', 'job', 'total'], [r['event'] for r in records])
+        self.assertFalse(records[1]['ok'])
+        self.assertEqual(1, len(set(r['session'] for r in records)))
+        self.assertTrue(os.path.isfile(timer.profile_file))
+
+        lines = timer.summary().splitlines()
+        self.assertEqual('Timing:', lines[0])
+        self.assertTrue(lines[1].strip().startswith('build_submission_commands'))
+        self.assertEqual('  2 job(s) sent, median 350 ms, slowest 500 ms (S2)', lines[3])
+        self.assertIn(f'log: {file}', lines[5])
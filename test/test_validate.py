@@ -0,0 +1,88 @@
+from src.model import PARAMETER_SCHEMA
+from src.validate import validate_parameters, validate_submission, ValidateRunTable
+from .setup import TestCase
+
+
+class TestValidate(TestCase):
+
+    def setUp(self):
+        self.set_up(py_path=__file__)
+
+    def tearDown(self):
+        self.tear_down()
+
+    def test_schema(self):
+        self.assertIs(int, PARAMETER_SCHEMA['threads'].dtype)
+        self.assertIs(float, PARAMETER_SCHEMA['segmentation-threshold'].dtype)
+        self.assertIs(bool, PARAMETER_SCHEMA['discard-bam'].dtype)
+        self.assertIs(int, PARAMETER_SCHEMA['Compute Port'].dtype)  # the default '22' is a str
+        self.assertEqual(8, PARAMETER_SCHEMA['threads'].parse(' 8 '))
+        self.assertIsNone(PARAMETER_SCHEMA['Transfer Streams'].parse(''))
+
+    def test_validate_parameters(self):
+        parameters = {
+            'threads': '0',
+            'segmentation-threshold': 'abc',
+            'Launch Mode': 'later',
+            'NAS Port': 22,
+            'Transfer Streams': '',
+            'discard-bam': True,
+        }
+        expected = [
+            "'threads' should be >= 1, got '0'",
+            "'segmentation-threshold' should be a number, got 'abc'",
+            "'Launch Mode' should be one of ['immediate', 'queue', 'pipelined'], got 'later'",
+        ]
+        self.assertEqual(expected, validate_parameters(parameters))
+
+    def test_validate_output_manifest(self):
+        parameters = {'Output Manifest': "*.vcf.gz, report/my report.html"}
+        expected = ["'Output Manifest' has a path with quotes, '$', '\\' or whitespace: 'report/my report.html'"]
+        self.assertEqual(expected, validate_parameters(parameters))
+
+    def test_validate_queue_max_disk(self):
+        parameters = {'Queue Max Disk (GB)': '500', 'Pre-flight Check': True, 'Launch Mode': 'immediate'}
+        expected = ["'Queue Max Disk (GB)' only applies to the 'queue' launch mode, set it to 0 or use the queue"]
+        self.assertEqual(expected, validate_parameters(parameters))
+        parameters['Launch Mode'] = 'queue'
+        self.assertEqual([], validate_parameters(parameters))
+
+    def test_validate_streamed_fastq_without_cache(self):
+        parameters = {'FASTQ Input': 'streamed', 'FASTQ Cache Size (GB)': '100'}
+        self.assertEqual(1, len(validate_parameters(parameters)))
+        parameters['FASTQ Cache Size (GB)'] = '0'
+        self.assertEqual([], validate_parameters(parameters))
+
+    def test_validate_run_table(self):
+        run_table = f'{self.workdir}/run_table.csv'
+        with open(run_table, 'w') as fh:
+            fh.write('''\
+Sequencing Batch ID,Tumor Fastq R1,Tumor Fastq R2,Normal Fastq R1,Output Name
+B1,T1_R1.fq.gz,T1_R2.fq.gz,,S1
+B1,T2_R1.fq.gz,,N2_R1.fq.gz,S2
+B1,T3 R1.fq.gz,T3_R2.fq.gz,,S1
+B1,T4_R1.fq.gz,T4's_R2.fq.gz,,S4 x
+''')
+        expected = [
+            "Run table line 3 (S2): 'Tumor Fastq R2' is empty",
+            "Run table line 3 (S2): 'Normal Fastq R1' and 'Normal Fastq R2' should be given together",
+            "Run table line 4 (S1): 'Output Name' is duplicated",
+            "Run table line 5 (S4 x): 'Tumor Fastq R2' contains a single quote: 'T4's_R2.fq.gz'",
+            "Run table line 5 (S4 x): 'Output Name' contains quotes, '$', '\\' or whitespace: 'S4 x'",
+        ]
+        self.assertEqual(expected, ValidateRunTable().main(run_table))
+
+    def test_validate_fastq_names_by_transfer_streams(self):
+        run_table = f'{self.workdir}/run_table.csv'
+        with open(run_table, 'w') as fh:
+            fh.write('Sequencing Batch ID,Tumor Fastq R1,Tumor Fastq R2,Output Name\n')
+            fh.write('B1,"T1 ""$x"".fq.gz",T1_R2.fq.gz,S1\n')
+
+        self.assertEqual([], ValidateRunTable().main(run_table, parameters={'Transfer Streams': '1'}))
+        errors = ValidateRunTable().main(run_table, parameters={'Transfer Streams': '4'})  # read by xargs -I
+        expected = "Run table line 2 (S1): 'Tumor Fastq R1' contains quotes, '$', '\\' or whitespace: 'T1 \"$x\".fq.gz'"
+        self.assertEqual([expected], errors)
+
+    def test_validate_submission(self):
+        with self.assertRaises(ValueError):
+            validate_submission(parameters={'threads': 'four'}, run_table=f'{self.indir}/run_table.csv')